@@ -86,12 +86,59 @@ def create_app(config_class = Config):
 
     if app.config["ELASTICSEARCH_URL"]:
 
-        app.elasticsearch = Elasticsearch([app.config["ELASTICSEARCH_URL"]])    
+        app.elasticsearch = Elasticsearch([app.config["ELASTICSEARCH_URL"]],
+                                          maxsize = app.config["ELASTICSEARCH_MAXSIZE"],
+                                          timeout = app.config["ELASTICSEARCH_TIMEOUT"],
+                                          max_retries = app.config["ELASTICSEARCH_MAX_RETRIES"],
+                                          retry_on_timeout = True)
 
     else:
 
         app.elasticsearch = None    
 
+    # search backend configuration
+    # ============================
+
+    from app.search import create_backend, create_fallback_backend, create_search_breaker, create_search_cache, \
+                           create_search_semantic, create_search_spelling, create_search_suggester
+
+    app.search_backend = create_backend(app)
+    app.search_fallback_backend = create_fallback_backend(app)
+    app.search_breaker = create_search_breaker(app)
+    app.search_cache = create_search_cache(app)
+    app.search_suggester = create_search_suggester(app)
+    app.search_spelling = create_search_spelling(app)
+    app.search_semantic = create_search_semantic(app)
+
+    # new versions of the indexes being rebuilt (see "app.search.get_rebuild_versions")
+    app.search_rebuilds = {"expiration": 0., "versions": {}}
+
+    # indexing outbox drainer (sends the committed changes to Elasticsearch in background, including the ones
+    # queued while Elasticsearch was not available)
+    if app.config["SEARCH_OUTBOX_DRAINER_THREAD"] and app.search_backend.external and not app.testing:
+
+        from app.indexing import OutboxDrainer
+
+        app.outbox_drainer = OutboxDrainer(app)
+        app.outbox_drainer.start()
+
+    else:
+
+        app.outbox_drainer = None
+
+    # related articles drainer (computes the related articles involving the committed changes of articles, started
+    # once the first changes are committed)
+    if app.config["RELATED_ARTICLES_DRAINER_THREAD"] and not app.testing:
+
+        from app.indexing import OutboxDrainer
+        from app.related import drain_related_changes
+
+        app.related_drainer = OutboxDrainer(app, drain_related_changes, "related-articles-drainer")
+
+    else:
+
+        app.related_drainer = None
+
 
     # blueprints registration
     # =======================
@@ -121,6 +168,13 @@ def create_app(config_class = Config):
     app.register_blueprint(api_bp, url_prefix = "/api")
 
 
+    # command line commands registration
+    # ==================================
+
+    from app import cli
+    cli.register(app)
+
+
     # logging definition
     # ==================
 
@@ -14,7 +14,7 @@ bp = Blueprint("api",
                __name__,
                template_folder = "templates")
 
-from app.api import users, articles, errors, tokens
+from app.api import users, articles, errors, tokens, search
 
 
 # ==================================================================================================
@@ -0,0 +1,155 @@
+"""
+    Module to handle the api to search among the articles
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import os
+
+from flask import current_app, jsonify, request
+
+from app.api import bp
+from app.api.auth import token_auth
+from app.api.errors import bad_request, error_response
+
+from app.indexing import get_search_metrics
+from app.models import Article
+from app.search import multi_query_index
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ====================================
+@bp.route("/search", methods = ["POST"])
+@token_auth.login_required
+def search():
+    """
+        API that enables to run several searches among the articles of the current user at once (they are sent
+        to Elasticsearch through a single "_msearch" request)
+
+        The request data contains a "queries" list, each query being a dict with the "q" (the searched text, see
+        "app.search.query" for its syntax) and the optional "page", "per_page" and "cursor" (returned with the
+        previous page, along with the number of the page it leads to) keys
+
+        :return: the Response object containing, for each query, the ids of the found articles, their total number
+                 and the cursor of the next page (in JSON format)
+        :rtype: flask.wrappers.Response
+    """
+
+    data = request.get_json() or {}
+    queries_data = data.get("queries")
+
+    if not isinstance(queries_data, list) or not queries_data:
+
+        return bad_request("Must include a non-empty queries list")
+
+    if len(queries_data) > current_app.config["SEARCH_API_MAX_QUERIES"]:
+
+        return bad_request("Too many queries: {} at most".format(current_app.config["SEARCH_API_MAX_QUERIES"]))
+
+    queries = []
+
+    for query_data in queries_data:
+
+        if not isinstance(query_data, dict) or not isinstance(query_data.get("q"), str) or not query_data["q"].strip():
+
+            return bad_request("Each query must include a non-empty q field")
+
+        page = query_data.get("page", 1)
+        per_page = query_data.get("per_page", current_app.config["SEARCH_ARTICLES_PER_PAGE"])
+        cursor = query_data.get("cursor")
+
+        if not isinstance(page, int) or page < 1 \
+           or not isinstance(per_page, int) or not 1 <= per_page <= current_app.config["SEARCH_API_MAX_PER_PAGE"]:
+
+            return bad_request("Invalid page or per_page field")
+
+        if cursor is not None and not isinstance(cursor, str):
+
+            return bad_request("Invalid cursor field")
+
+        # beyond the first pages, the pages are only reached through the cursor of the previous page
+        if cursor is None and page * per_page > current_app.config["SEARCH_MAX_RESULT_WINDOW"]:
+
+            return bad_request("Page beyond the results window: use the cursor of the previous page")
+
+        queries.append((query_data["q"], page, per_page, cursor))
+
+    try:
+
+        results = multi_query_index(Article.__tablename__, queries, token_auth.current_user().id)
+
+    except ValueError as error:
+
+        return bad_request(str(error))
+
+    items = []
+
+    for (q, page, per_page, cursor), (documents, total, next_cursor) in zip(queries, results):
+
+        if len(documents) < per_page or total <= page * per_page:
+
+            next_cursor = None
+
+        items.append({"q": q, "ids": [ document["id"] for document in documents ], "total": total,
+                      "next_cursor": next_cursor})
+
+    data = {}
+    data["items"] = items
+    data["_meta"] = {"total_items": len(data["items"])}
+
+    return jsonify(data)
+
+# ============================================
+@bp.route("/search/metrics", methods = ["GET"])
+@token_auth.login_required
+def metrics():
+    """
+        API that enables the administrators (see ADMINS) to get the metrics of the search of the process which
+        serves the request (see "app.indexing.get_search_metrics") : the search results cache and the circuit
+        breaker live into each process, so they cannot be read by a command line command
+
+        Each process having its own counters (e.g. its cache hits and misses), the id of the process is returned
+        along with them
+
+        :return: the Response object containing the metrics and the process id (in JSON format)
+        :rtype: flask.wrappers.Response
+    """
+
+    administrators = [ email.strip() for email in (current_app.config["ADMINS"] or "").split(",") ]
+
+    if token_auth.current_user().email not in administrators:
+
+        return error_response(403)
+
+    data = get_search_metrics()
+    data["process_id"] = os.getpid()
+
+    return jsonify(data)
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -15,12 +15,14 @@ from werkzeug.urls import url_parse
 
 from app import db
 
-from app.models import User, Article
+from app.models import User
 
 from app.auth import bp
 from app.auth.forms import LoginForm, ResetPasswordRequestForm, ResetPasswordForm
 from app.auth.email import send_password_reset_email
 
+from app.draft import clear_draft
+
 from string import ascii_uppercase, digits
 from random import choices
 from rauth import OAuth2Service
@@ -246,15 +248,10 @@ def logout():
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
     current_user_username = current_user.username
     current_user_is_guest = current_user.is_guest
 
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
+    clear_draft()
 
     logout_user()
 
@@ -279,13 +276,6 @@ def reset_password_request():
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     if current_user.is_authenticated:
 
         return redirect(url_for("main.index"))
@@ -321,13 +311,6 @@ def reset_password(token):
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     if current_user.is_authenticated:
 
         return redirect(url_for("main.index"))
@@ -0,0 +1,400 @@
+"""
+    Module to handle the several command line commands for the application
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import click
+
+from flask import current_app
+
+from app.models import User, SearchableMixin
+from app.related import drain_related_changes, rebuild_related_articles
+from app.indexing import drain_outbox, get_outbox_metrics, rebuild_index, reindex as reindex_model, sync_index, \
+                         verify_index
+from app.search.semantic import benchmark_semantic_search, build_semantic_model
+
+from time import sleep, time
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# =================
+def register(app):
+    """
+        Function to register the command line commands into the application
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: nothing
+        :rtype: None
+    """
+
+    # ===============
+    @app.cli.group()
+    def articles():
+        """
+            Commands to handle the articles
+        """
+
+        pass
+
+    # ===================
+    @articles.command()
+    def recount():
+        """
+            Repair the articles counters of the users
+        """
+
+        repaired_users = User.repair_article_counts()
+
+        click.echo("{} user(s) repaired".format(repaired_users))
+
+    # =================================================================================
+    @articles.command()
+    @click.option("--user", type = int, default = None, help = "Id of the user whose articles are processed.")
+    def related(user):
+        """
+            Compute again the related articles of all the articles (with the current word frequencies)
+        """
+
+        start = time()
+
+        total = rebuild_related_articles(user)
+
+        click.echo("Related articles of {} article(s) computed in {:.1f} s".format(total, time() - start))
+
+    # ====================================================================================
+    @articles.command("drain")
+    @click.option("--once", is_flag = True, help = "Handle a single batch of changes and exit.")
+    @click.option("--batch-size", type = int, default = None, help = "Maximum number of users per batch.")
+    def drain_related(once, batch_size):
+        """
+            Compute the related articles involving the pending changes of articles
+        """
+
+        while True:
+
+            handled = drain_related_changes(batch_size)
+
+            if handled:
+
+                click.echo("{} change(s) handled".format(handled))
+
+            if once:
+
+                break
+
+            if not handled:
+
+                sleep(current_app.config["SEARCH_OUTBOX_POLL_INTERVAL"])
+
+    # =============
+    @app.cli.group()
+    def search():
+        """
+            Commands to handle the search indexes
+        """
+
+        pass
+
+    # ====================================================================================
+    @search.command()
+    @click.option("--once", is_flag = True, help = "Send a single batch of changes and exit.")
+    @click.option("--batch-size", type = int, default = None, help = "Maximum number of changes per batch.")
+    def drain(once, batch_size):
+        """
+            Send the pending changes of the indexing outbox to Elasticsearch
+        """
+
+        while True:
+
+            shipped = drain_outbox(batch_size)
+
+            if shipped:
+
+                click.echo("{} change(s) sent".format(shipped))
+
+            if once:
+
+                break
+
+            if not shipped:
+
+                sleep(current_app.config["SEARCH_OUTBOX_POLL_INTERVAL"])
+
+    # ===========================================================================================
+    @search.command()
+    @click.option("--index", default = "article", help = "Name of the index to be created.")
+    @click.option("--recreate", is_flag = True, help = "Delete the existing index first (its documents are lost).")
+    def init(index, recreate):
+        """
+            Create an index with its settings and its mappings
+        """
+
+        model = SearchableMixin.get_searchable_model(index)
+
+        if model is None:
+
+            raise click.BadParameter("unknown index {}".format(index), param_hint = "--index")
+
+        if current_app.search_backend.init_index(model, recreate):
+
+            click.echo("Index {} created".format(index))
+
+        else:
+
+            click.echo("Index {} not created (it already exists or it is maintained by the database)".format(index))
+
+    # ===========================================================================================
+    @search.command()
+    @click.option("--index", default = "article", help = "Name of the index to be rebuilt.")
+    @click.option("--chunk-size", type = int, default = None, help = "Number of documents per _bulk request.")
+    @click.option("--workers", type = int, default = 1, help = "Number of worker processes.")
+    def reindex(index, chunk_size, workers):
+        """
+            Reindex all the documents of an index
+        """
+
+        model = SearchableMixin.get_searchable_model(index)
+
+        if model is None:
+
+            raise click.BadParameter("unknown index {}".format(index), param_hint = "--index")
+
+        total = model.query.count()
+        progress = {"indexed": 0}
+        start = time()
+
+        # =======================
+        def report(indexed):
+            """
+                Function to display the progress of the reindexing
+            """
+
+            progress["indexed"] += indexed
+            rate = progress["indexed"] / max(time() - start, 1e-6)
+
+            click.echo("\r{}/{} documents indexed ({:.0f} docs/s)".format(progress["indexed"], total, rate), nl = False)
+
+        indexed, failed = reindex_model(model, chunk_size, workers, report)
+
+        duration = time() - start
+
+        click.echo("")
+        click.echo("{} documents indexed in {:.1f} s ({:.0f} docs/s), {} failure(s)".format(indexed,
+                                                                                          duration,
+                                                                                          indexed / max(duration, 1e-6),
+                                                                                          failed))
+
+    # ===========================================================================================
+    @search.command()
+    @click.option("--index", default = "article", help = "Name of the index to be rebuilt.")
+    @click.option("--chunk-size", type = int, default = None, help = "Number of documents per _bulk request.")
+    @click.option("--workers", type = int, default = 1, help = "Number of worker processes.")
+    def rebuild(index, chunk_size, workers):
+        """
+            Rebuild an index into a new version (with the current mappings), then switch to it without any downtime
+        """
+
+        model = SearchableMixin.get_searchable_model(index)
+
+        if model is None:
+
+            raise click.BadParameter("unknown index {}".format(index), param_hint = "--index")
+
+        if not current_app.search_backend.external:
+
+            raise click.ClickException("The {} search backend is maintained by the database, use \"flask search reindex\"".format(current_app.search_backend.name))
+
+        start = time()
+
+        try:
+
+            indexed, failed, version = rebuild_index(model, chunk_size, workers)
+
+        except RuntimeError as error:
+
+            raise click.ClickException(str(error))
+
+        if version:
+
+            click.echo("{} documents indexed in {:.1f} s, index {} now uses {}".format(indexed,
+                                                                                      time() - start,
+                                                                                      index,
+                                                                                      version))
+
+        else:
+
+            click.echo("{} documents indexed in {:.1f} s, {} failure(s), index {} unchanged".format(indexed,
+                                                                                                 time() - start,
+                                                                                                 failed,
+                                                                                                 index))
+
+    # ===========================================================================================
+    @search.command()
+    @click.option("--index", default = "article", help = "Name of the index to be synchronized.")
+    @click.option("--chunk-size", type = int, default = None, help = "Number of documents per _bulk request.")
+    def sync(index, chunk_size):
+        """
+            Synchronize an index with the changes made since the last synchronization
+        """
+
+        model = SearchableMixin.get_searchable_model(index)
+
+        if model is None:
+
+            raise click.BadParameter("unknown index {}".format(index), param_hint = "--index")
+
+        if not current_app.search_backend.external:
+
+            raise click.ClickException("The {} search backend is maintained by the database".format(current_app.search_backend.name))
+
+        if not current_app.config["SEARCH_SYNC_ENABLED"]:
+
+            click.echo("Warning: SEARCH_SYNC_ENABLED is not set, the deletions are not synchronized")
+
+        start = time()
+
+        indexed, removed, failed = sync_index(model, chunk_size)
+
+        click.echo("{} document(s) indexed, {} document(s) removed in {:.1f} s, {} failure(s)".format(indexed,
+                                                                                                     removed,
+                                                                                                     time() - start,
+                                                                                                     failed))
+
+    # ===========================================================================================
+    @search.command()
+    @click.option("--index", default = "article", help = "Name of the index to be checked.")
+    @click.option("--repair", is_flag = True, help = "Send the differences to the index.")
+    def verify(index, repair):
+        """
+            Check that an index matches the database (by comparing checksums of buckets of ids)
+        """
+
+        model = SearchableMixin.get_searchable_model(index)
+
+        if model is None:
+
+            raise click.BadParameter("unknown index {}".format(index), param_hint = "--index")
+
+        if not current_app.search_backend.external:
+
+            raise click.ClickException("The {} search backend is maintained by the database".format(current_app.search_backend.name))
+
+        start = time()
+
+        missing_ids, outdated_ids, extra_ids, failed = verify_index(model, repair)
+
+        click.echo("{} missing, {} outdated, {} extra document(s) found in {:.1f} s".format(len(missing_ids),
+                                                                                        len(outdated_ids),
+                                                                                        len(extra_ids),
+                                                                                        time() - start))
+
+        for name, ids in (("missing", missing_ids), ("outdated", outdated_ids), ("extra", extra_ids)):
+
+            if ids:
+
+                click.echo("{}: {}".format(name, " ".join( str(object_id) for object_id in ids )))
+
+        if repair:
+
+            click.echo("{} document(s) repaired, {} failure(s)".format(len(missing_ids) + len(outdated_ids) + len(extra_ids),
+                                                                       failed))
+
+    # ===========================================================================================
+    @search.command()
+    @click.option("--index", default = "article", help = "Name of the index whose semantic model is built.")
+    @click.option("--dimensions", type = int, default = None, help = "Number of dimensions of the vectors.")
+    def semantic(index, dimensions):
+        """
+            Build the semantic search model of an index (latent semantic analysis of its searched fields)
+        """
+
+        model = SearchableMixin.get_searchable_model(index)
+
+        if model is None:
+
+            raise click.BadParameter("unknown index {}".format(index), param_hint = "--index")
+
+        documents, dimensions, durations = build_semantic_model(model,
+                                                                current_app.config["SEARCH_SEMANTIC_PATH"],
+                                                                dimensions or current_app.config["SEARCH_SEMANTIC_DIMENSIONS"])
+
+        click.echo("Semantic model of {} built from {} document(s) with {} dimension(s) in {:.2f} s "
+                   "(TF-IDF {:.2f} s, SVD {:.2f} s, storage {:.2f} s)".format(index,
+                                                                            documents,
+                                                                            dimensions,
+                                                                            sum(durations.values()),
+                                                                            durations["tfidf"],
+                                                                            durations["svd"],
+                                                                            durations["storage"]))
+
+    # ===========================================================================================
+    @search.command("semantic-benchmark")
+    @click.option("--index", default = "article", help = "Name of the index whose semantic model is queried.")
+    @click.option("--queries", type = click.IntRange(1), default = 1000, help = "Number of queries.")
+    @click.option("--size", type = int, default = None, help = "Number of results per query.")
+    @click.option("--user", type = int, default = None, help = "Id of the user whose articles are searched.")
+    def semantic_benchmark(index, queries, size, user):
+        """
+            Measure the latency of the semantic searches of an index
+        """
+
+        durations = benchmark_semantic_search(current_app.search_semantic,
+                                              index,
+                                              queries,
+                                              size or current_app.config["SEARCH_SEMANTIC_CANDIDATES"],
+                                              user)
+
+        if durations is None:
+
+            raise click.ClickException("The semantic model of {} has not been built, use \"flask search semantic\"".format(index))
+
+        durations = sorted( duration * 1000 for duration in durations )
+
+        click.echo("{} queries: mean {:.3f} ms, median {:.3f} ms, p95 {:.3f} ms, max {:.3f} ms".format(len(durations),
+                                                                                                      sum(durations) / len(durations),
+                                                                                                      durations[len(durations) // 2],
+                                                                                                      durations[int(len(durations) * 0.95)],
+                                                                                                      durations[-1]))
+
+    # ================
+    @search.command()
+    def metrics():
+        """
+            Display the metrics of the indexing outbox (the search results cache and the circuit breaker live into
+            each process serving the application: see GET /api/search/metrics)
+        """
+
+        for name, value in sorted(get_outbox_metrics().items()):
+
+            click.echo("{}: {}".format(name, value))
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,149 @@
+"""
+    Module to handle the article drafts for the application
+
+    A draft holds the references added to an article which is still being created (i.e. not yet saved
+    into the database). It is stored into the Flask session and keyed by the current User id, so that
+    displaying a page never requires a database write and drafts of several users never collide.
+
+    As the session is stored into a cookie (dropped by the browsers beyond about 4 KB), the number of references
+    of a draft and the length of their descriptions are limited. A draft lasts until the article is created or
+    until the User logs out.
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from flask import session
+from flask_login import current_user
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+DRAFT_SESSION_KEY = "article_draft"
+
+# maximum number of references of a draft, and maximum length of their descriptions (the one of the database)
+DRAFT_MAX_REFERENCES = 10
+DRAFT_DESCRIPTION_LENGTH = 100
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# =================
+def _get_draft():
+    """
+        Function to get the draft of the current User (an empty one is created if needed)
+
+        :return: the draft of the current User
+        :rtype: dict
+    """
+
+    draft = session.get(DRAFT_SESSION_KEY)
+
+    if not draft or draft.get("user_id") != current_user.id:
+
+        draft = {"user_id": current_user.id,
+                 "next_reference_id": 1,
+                 "references": []}
+
+    return draft
+
+# ========================
+def get_draft_references():
+    """
+        Function to get the references of the current User draft
+
+        Each reference is a dict with the "id" and "description" keys, so that it can be used in the
+        templates in the same way as an instance of the Reference class
+
+        :return: the references of the draft
+        :rtype: list(dict)
+    """
+
+    return _get_draft()["references"]
+
+# ========================================
+def add_draft_reference(description):
+    """
+        Function to add a reference to the current User draft (its description is truncated to
+        DRAFT_DESCRIPTION_LENGTH characters, and it is not added if the draft already holds DRAFT_MAX_REFERENCES
+        references)
+
+        :param description: the reference description
+        :type description: str
+
+        :return: the references of the draft
+        :rtype: list(dict)
+    """
+
+    draft = _get_draft()
+
+    if len(draft["references"]) >= DRAFT_MAX_REFERENCES:
+
+        return draft["references"]
+
+    draft["references"].append({"id": draft["next_reference_id"],
+                                "description": description[:DRAFT_DESCRIPTION_LENGTH]})
+    draft["next_reference_id"] += 1
+
+    session[DRAFT_SESSION_KEY] = draft
+
+    return draft["references"]
+
+# ============================================
+def remove_draft_reference(reference_id):
+    """
+        Function to remove a reference from the current User draft
+
+        :param reference_id: the id of the reference within the draft
+        :type reference_id: int
+
+        :return: the references of the draft
+        :rtype: list(dict)
+    """
+
+    draft = _get_draft()
+
+    draft["references"] = [ reference for reference in draft["references"] if reference["id"] != reference_id ]
+
+    session[DRAFT_SESSION_KEY] = draft
+
+    return draft["references"]
+
+# ==================
+def clear_draft():
+    """
+        Function to clear the current User draft
+
+        :return: the references of the cleared draft
+        :rtype: list(dict)
+    """
+
+    references = get_draft_references()
+
+    session.pop(DRAFT_SESSION_KEY, None)
+
+    return references
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,846 @@
+"""
+    Module to handle the maintenance of the search indexes for the application (indexing outbox draining...)
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from flask import current_app
+from elasticsearch.exceptions import TransportError
+
+from app import db
+from app.models import SearchableMixin, SearchOutbox, SearchRebuild, SearchTombstone, SearchSyncState
+from app.search import bulk_index, get_children_payloads, get_payloads, get_routing, invalidate_search_cache
+from app.search.backend import CHECKSUM_MODULUS, CHECKSUM_MULTIPLIERS
+
+from datetime import datetime, timedelta
+from threading import Thread, Event, Lock
+from time import sleep
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# counters of the current process, exposed with the search metrics
+outbox_counters = {"shipped": 0, "failed": 0}
+
+# application instance of a reindexing worker process
+worker_app = None
+
+# greatest id checked by the consistency checks (the greatest value of an Elasticsearch "integer")
+MAX_ID = 2 ** 31 - 1
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==========================
+class OutboxDrainer(Thread):
+    """
+        Class that represents a background thread which sends the indexing outbox content to Elasticsearch (or
+        which handles another queue of changes, e.g. the one of the related articles)
+    """
+
+    # ==================================================================
+    def __init__(self, app, drain = None, name = "search-outbox-drainer"):
+        """
+            Class constructor
+
+            :param app: the application instance
+            :type app: flask.app.Flask
+
+            :param drain: the function handling a batch of changes and returning their number ("drain_outbox"
+                          if None)
+            :type drain: None | function
+
+            :param name: the name of the thread
+            :type name: str
+        """
+
+        super(OutboxDrainer, self).__init__(name = name, daemon = True)
+
+        self.app = app
+        self.drain = drain or drain_outbox
+        self.wake_up_event = Event()
+        self.stop_event = Event()
+        self.start_lock = Lock()
+
+    # ================
+    def wake_up(self):
+        """
+            Method to wake the drainer up (e.g. once new changes have been committed), the drainer being started
+            first if it has not been started yet
+        """
+
+        with self.start_lock:
+
+            if self.ident is None:
+
+                self.start()
+
+        self.wake_up_event.set()
+
+    # =============
+    def stop(self):
+        """
+            Method to stop the drainer
+        """
+
+        self.stop_event.set()
+        self.wake_up_event.set()
+
+    # ============
+    def run(self):
+        """
+            Method executed by the thread : the outbox is drained until it is empty, then the drainer waits to
+            be woken up (or for the poll interval to be elapsed)
+        """
+
+        while not self.stop_event.is_set():
+
+            with self.app.app_context():
+
+                try:
+
+                    shipped = self.drain()
+
+                except Exception:
+
+                    self.app.logger.exception("Draining of {} failed".format(self.name))
+                    shipped = 0
+
+                finally:
+
+                    db.session.remove()
+
+            if not shipped:
+
+                self.wake_up_event.wait(self.app.config["SEARCH_OUTBOX_POLL_INTERVAL"])
+                self.wake_up_event.clear()
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ========================
+def retry_delay(attempts):
+    """
+        Function to get the delay before the next attempt to send a change (exponential back-off)
+
+        :param attempts: the number of failed attempts
+        :type attempts: int
+
+        :return: the delay (in seconds)
+        :rtype: float
+    """
+
+    delay = current_app.config["SEARCH_OUTBOX_RETRY_DELAY"] * 2 ** (attempts - 1)
+
+    return min(delay, current_app.config["SEARCH_OUTBOX_MAX_RETRY_DELAY"])
+
+# ===================================
+def drain_outbox(batch_size = None):
+    """
+        Function to send a batch of pending changes of the indexing outbox to Elasticsearch (through a single
+        "_bulk" request)
+
+        The current state of each changed object is sent (or its deletion if it does not exist anymore),
+        so sending several times the same change is harmless. The entries that cannot be sent are retried
+        later (with an exponential back-off)
+
+        :param batch_size: the maximum number of outbox entries handled
+        :type batch_size: None | int
+
+        :return: the number of outbox entries that have been sent
+        :rtype: int
+    """
+
+    batch_size = batch_size or current_app.config["SEARCH_OUTBOX_BATCH_SIZE"]
+    now = datetime.utcnow()
+
+    entries = SearchOutbox.query.filter(SearchOutbox.next_attempt_date <= now) \
+                                .order_by(SearchOutbox.id) \
+                                .limit(batch_size) \
+                                .all()
+
+    if not entries:
+
+        return 0
+
+    # several entries of the same object are sent only once
+    entries_by_key = {}
+
+    for entry in entries:
+
+        entries_by_key.setdefault((entry.index, entry.object_id), []).append(entry)
+
+    actions = []
+
+    for index in set( key[0] for key in entries_by_key ):
+
+        model = SearchableMixin.get_searchable_model(index)
+        ids = [ key[1] for key in entries_by_key if key[0] == index ]
+
+        objects = {}
+
+        if model:
+
+            objects = { obj.id: obj for obj in model.query.filter(model.id.in_(ids)) }
+
+        # the objects whose children only have changed are partially updated
+        updated = [ object_id for object_id in ids if object_id in objects
+                    and all( entry.operation == "update" for entry in entries_by_key[(index, object_id)] ) ]
+        indexed = [ objects[object_id] for object_id in ids if object_id in objects and object_id not in updated ]
+
+        payloads = dict(zip([ obj.id for obj in indexed ], get_payloads(indexed)))
+        payloads.update(get_children_payloads(model, updated) if updated else {})
+
+        # the update date of the objects whose children have changed is sent along with their children values
+        for object_id in updated:
+
+            payloads[object_id]["update_date"] = objects[object_id].update_date
+
+        for object_id in ids:
+
+            if object_id in objects:
+
+                actions.append({"operation": "update" if object_id in updated else "index",
+                                "index": index,
+                                "id": object_id,
+                                "payload": payloads[object_id],
+                                "routing": get_routing(objects[object_id])})
+
+            else:
+
+                actions.append({"operation": "delete",
+                                "index": index,
+                                "id": object_id,
+                                "routing": entries_by_key[(index, object_id)][-1].routing})
+
+    try:
+
+        failures = bulk_index(actions)
+
+    except TransportError as error:
+
+        failures = [ (action, str(error)) for action in actions ]
+
+    failed_keys = { (action["index"], action["id"]): error for action, error in failures }
+
+    shipped_ids = []
+    failed_entries = 0
+
+    for key, key_entries in entries_by_key.items():
+
+        if key in failed_keys:
+
+            for entry in key_entries:
+
+                entry.attempts += 1
+                entry.last_error = failed_keys[key]
+                entry.next_attempt_date = now + timedelta(seconds = retry_delay(entry.attempts))
+
+            failed_entries += len(key_entries)
+
+        else:
+
+            shipped_ids.extend( entry.id for entry in key_entries )
+
+    if shipped_ids:
+
+        SearchOutbox.query.filter(SearchOutbox.id.in_(shipped_ids)).delete(synchronize_session = False)
+
+    db.session.commit()
+
+    outbox_counters["shipped"] += len(shipped_ids)
+    outbox_counters["failed"] += failed_entries
+
+    # the cached search results may have been computed before the changes reached the index
+    if shipped_ids:
+
+        invalidate_search_cache()
+
+    if failures:
+
+        current_app.logger.warning("{} search outbox entries could not be sent".format(failed_entries))
+
+    return len(shipped_ids)
+
+# ===========================================
+def get_id_ranges(min_id, max_id, partitions):
+    """
+        Function to split a range of ids into contiguous partitions
+
+        :param min_id: the first id
+        :type min_id: int
+
+        :param max_id: the last id
+        :type max_id: int
+
+        :param partitions: the number of partitions
+        :type partitions: int
+
+        :return: the partitions, each one being a tuple (first id, last id)
+        :rtype: list(tuple(int, int))
+    """
+
+    size = max(1, -(-(max_id - min_id + 1) // partitions))
+
+    return [ (first_id, min(first_id + size - 1, max_id)) for first_id in range(min_id, max_id + 1, size) ]
+
+# ===========================
+def init_reindex_worker():
+    """
+        Function executed at the start of a reindexing worker process to create its application instance
+    """
+
+    global worker_app
+
+    from app import create_app
+
+    worker_app = create_app()
+
+# ==========================================================================
+def reindex_partition(index, chunk_size, min_id, max_id, version = None):
+    """
+        Function executed by a reindexing worker process to reindex a partition of an index
+
+        :param index: the index name
+        :type index: str
+
+        :param chunk_size: the number of documents sent per "_bulk" request
+        :type chunk_size: int
+
+        :param min_id: the first id of the partition
+        :type min_id: int
+
+        :param max_id: the last id of the partition
+        :type max_id: int
+
+        :param version: the version of the index to be filled (the index itself if None)
+        :type version: None | str
+
+        :return: the number of indexed documents and the number of failures
+        :rtype: tuple(int, int)
+    """
+
+    with worker_app.app_context():
+
+        try:
+
+            return SearchableMixin.get_searchable_model(index).reindex(chunk_size, min_id, max_id, index = version)
+
+        finally:
+
+            db.session.remove()
+
+# ===========================================================================================
+def reindex(model, chunk_size = None, workers = 1, callback = None, version = None):
+    """
+        Function to reindex all the objects of a model
+
+        If the search backend is maintained by the database, the index is only rebuilt by the database, otherwise
+        the index (unless a version of the index is filled) is created first if needed.
+        With several workers, the ids range is split into partitions that are reindexed by a pool of
+        processes (there are more partitions than workers to report the progress regularly)
+
+        :param model: the searchable model
+        :type model: class
+
+        :param chunk_size: the number of documents sent per "_bulk" request
+        :type chunk_size: None | int
+
+        :param workers: the number of worker processes
+        :type workers: int
+
+        :param callback: function called with the number of documents indexed since its previous call
+        :type callback: None | function
+
+        :param version: the version of the index to be filled (see "rebuild_index"), the index itself if None
+        :type version: None | str
+
+        :return: the number of indexed documents and the number of failures
+        :rtype: tuple(int, int)
+    """
+
+    chunk_size = chunk_size or current_app.config["SEARCH_REINDEX_CHUNK_SIZE"]
+
+    # the index is rebuilt by the database itself
+    if not current_app.search_backend.external:
+
+        indexed = current_app.search_backend.rebuild(model)
+
+        if callback:
+
+            callback(indexed)
+
+        return indexed, 0
+
+    # the index is created with its mappings before any document is sent
+    if version is None:
+
+        current_app.search_backend.init_index(model)
+
+    if workers <= 1:
+
+        return model.reindex(chunk_size, callback = callback, index = version)
+
+    min_id, max_id = db.session.query(db.func.min(model.id), db.func.max(model.id)).one()
+
+    if min_id is None:
+
+        return 0, 0
+
+    indexed = 0
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers = workers, initializer = init_reindex_worker) as executor:
+
+        futures = [ executor.submit(reindex_partition, model.__tablename__, chunk_size, first_id, last_id, version)
+                    for first_id, last_id in get_id_ranges(min_id, max_id, workers * 4) ]
+
+        for future in as_completed(futures):
+
+            partition_indexed, partition_failed = future.result()
+
+            indexed += partition_indexed
+            failed += partition_failed
+
+            if callback:
+
+                callback(partition_indexed)
+
+    return indexed, failed
+
+# ===================================================================
+def rebuild_index(model, chunk_size = None, workers = 1, callback = None):
+    """
+        Function to rebuild the index of a model without any downtime (blue/green) :
+
+        1. a new version of the index is created (with the current mappings), the searches still use the current one
+        2. the changes committed from then on are sent to both versions (see "app.search.bulk_index")
+        3. once every process has noticed the rebuild (after SEARCH_REBUILD_CHECK_INTERVAL seconds, the deletions
+           being recorded as tombstones from then on), the new version is filled from the database, then the
+           objects updated (or deleted) since the start of the rebuild (minus SEARCH_SYNC_OVERLAP seconds) are sent
+           again : an object read by the rebuild may have been changed or deleted before its document was sent
+        4. the alias of the index is moved to the new version and the previous one is deleted, atomically
+
+        If a document cannot be sent, the new version is deleted and the current one is kept
+
+        :raise RuntimeError: if a rebuild of the index is already in progress
+
+        :param model: the searchable model
+        :type model: class
+
+        :param chunk_size: the number of documents sent per "_bulk" request
+        :type chunk_size: None | int
+
+        :param workers: the number of worker processes
+        :type workers: int
+
+        :param callback: function called with the number of documents indexed since its previous call
+        :type callback: None | function
+
+        :return: the number of indexed documents, the number of failures and the new version (None if the index
+                 has not been replaced)
+        :rtype: tuple(int, int, None | str)
+    """
+
+    backend = current_app.search_backend
+
+    # the index is rebuilt by the database itself
+    if not backend.external:
+
+        return reindex(model, chunk_size, workers, callback) + (None,)
+
+    index = model.__tablename__
+
+    if SearchRebuild.query.get(index):
+
+        raise RuntimeError("A rebuild of the {} index is already in progress (if it has been interrupted, "
+                           "delete its search_rebuild row)".format(index))
+
+    start = datetime.utcnow()
+    version = backend.create_version(model)
+
+    db.session.add(SearchRebuild(index = index, version = version, start_date = start))
+    db.session.commit()
+
+    try:
+
+        sleep(current_app.config["SEARCH_REBUILD_CHECK_INTERVAL"])
+
+        indexed, failed = reindex(model, chunk_size, workers, callback, version)
+
+        since = start - timedelta(seconds = current_app.config["SEARCH_SYNC_OVERLAP"])
+
+        deleted_ids = [ object_id for object_id, in SearchTombstone.query.filter(SearchTombstone.index == index,
+                                                                                 SearchTombstone.deletion_date >= since)
+                                                                         .with_entities(SearchTombstone.object_id) ]
+
+        failed += len(bulk_index([ {"operation": "delete", "index": version, "id": object_id}
+                                   for object_id in deleted_ids ]))
+
+        failed += model.reindex(chunk_size, since = since, index = version)[1]
+
+        if failed:
+
+            backend.drop_version(version)
+
+            return indexed, failed, None
+
+        backend.swap_version(model, version)
+
+    except Exception:
+
+        backend.drop_version(version)
+
+        raise
+
+    finally:
+
+        SearchRebuild.query.filter(SearchRebuild.index == index).delete()
+
+        # the tombstones are only kept for the incremental synchronization
+        if not current_app.config["SEARCH_SYNC_ENABLED"]:
+
+            SearchTombstone.query.filter(SearchTombstone.index == index).delete()
+
+        db.session.commit()
+
+    invalidate_search_cache()
+
+    return indexed, failed, version
+
+# ============================================================
+def sync_index(model, chunk_size = None, callback = None):
+    """
+        Function to synchronize incrementally an index : only the objects updated since the last
+        synchronization (the watermark) are indexed and the objects deleted since then are removed
+
+        The watermark is moved back by SEARCH_SYNC_OVERLAP seconds at each run, so that the changes committed
+        by the transactions which were still in progress during the previous run are not missed
+
+        :param model: the searchable model
+        :type model: class
+
+        :param chunk_size: the number of documents sent per "_bulk" request
+        :type chunk_size: None | int
+
+        :param callback: function called with the number of documents of each chunk once it is sent
+        :type callback: None | function
+
+        :return: the number of indexed documents, the number of removed documents and the number of failures
+        :rtype: tuple(int, int, int)
+    """
+
+    chunk_size = chunk_size or current_app.config["SEARCH_REINDEX_CHUNK_SIZE"]
+    index = model.__tablename__
+    start = datetime.utcnow()
+
+    state = SearchSyncState.query.get(index)
+
+    if state is None:
+
+        state = SearchSyncState(index = index)
+        db.session.add(state)
+
+    since = None
+
+    if state.watermark:
+
+        since = state.watermark - timedelta(seconds = current_app.config["SEARCH_SYNC_OVERLAP"])
+
+    # the deletions are sent first, in case an id has been reused since then
+    tombstones = SearchTombstone.query.filter(SearchTombstone.index == index)
+
+    if since:
+
+        tombstones = tombstones.filter(SearchTombstone.deletion_date >= since)
+
+    routings = dict(tombstones.with_entities(SearchTombstone.object_id, SearchTombstone.routing))
+    deleted_ids = sorted(routings)
+
+    failed = 0
+
+    for position in range(0, len(deleted_ids), chunk_size):
+
+        actions = [ {"operation": "delete", "index": index, "id": object_id, "routing": routings[object_id]}
+                    for object_id in deleted_ids[position:position + chunk_size] ]
+
+        failed += len(bulk_index(actions))
+
+    indexed, indexing_failed = model.reindex(chunk_size, since = since, callback = callback)
+    failed += indexing_failed
+
+    # in case of failure, the watermark is not moved so that the same changes are sent again next time
+    if not failed:
+
+        state.watermark = start
+
+        SearchTombstone.query.filter(SearchTombstone.index == index,
+                                     SearchTombstone.deletion_date < start - timedelta(seconds = current_app.config["SEARCH_SYNC_OVERLAP"])) \
+                             .delete(synchronize_session = False)
+
+    db.session.commit()
+
+    return indexed, len(deleted_ids), failed
+
+# =========================================
+def verify_index(model, repair = False):
+    """
+        Function to check that the documents of an index match the objects of a model, through the ids and the
+        update dates (the contents are supposed to follow them) :
+
+        - the ids are split into SEARCH_VERIFY_FANOUT buckets, whose checksums (number of ids and sum of the hashes
+          of the ids and update dates, see "app.search.backend.get_checksum_hash") are computed by the database and
+          by the index
+        - only the buckets whose checksums differ are split again, until they hold at most SEARCH_VERIFY_LEAF_SIZE
+          ids : then the update dates of their objects and of their documents are compared one by one
+
+        So the cost of a check depends on the number of differences rather than on the size of the index.
+        As the index is refreshed periodically, the objects committed just before the check can be reported
+        as missing or outdated (repairing them is harmless)
+
+        :param model: the searchable model
+        :type model: class
+
+        :param repair: True to send the missing and outdated objects and to remove the extra documents
+        :type repair: bool
+
+        :return: the ids of the objects missing from the index, of the outdated objects and of the extra documents
+                 (whose objects do not exist anymore), and the number of failures of the repair
+        :rtype: tuple(list(int), list(int), list(int), int)
+    """
+
+    index = model.__tablename__
+    backend = current_app.search_backend
+    fanout = current_app.config["SEARCH_VERIFY_FANOUT"]
+    leaf_size = current_app.config["SEARCH_VERIFY_LEAF_SIZE"]
+
+    max_id = db.session.query(db.func.max(model.id)).scalar() or 0
+
+    missing_ids = []
+    outdated_ids = []
+    routings = {}
+
+    # the first level covers all the ids, in case the index holds documents beyond the last object
+    ranges = [(0, MAX_ID, max(-(-(max_id + 1) // fanout), 1))]
+
+    while ranges:
+
+        min_id, max_id, bucket_size = ranges.pop()
+
+        checksums = get_checksums(model, min_id, max_id, bucket_size)
+        index_checksums = backend.get_checksums(index, min_id, max_id, bucket_size)
+
+        for key in sorted(set(checksums) | set(index_checksums)):
+
+            if checksums.get(key) == index_checksums.get(key):
+
+                continue
+
+            first_id, last_id = max(key, min_id), min(key + bucket_size - 1, max_id)
+
+            if bucket_size > leaf_size:
+
+                ranges.append((first_id, last_id, -(-bucket_size // fanout)))
+
+                continue
+
+            update_dates = dict(db.session.query(model.id, get_timestamp(model.update_date))
+                                          .filter(model.id.between(first_id, last_id)))
+
+            index_update_dates = backend.get_update_dates(index, first_id, last_id,
+                                                          index_checksums.get(key, (0,))[0])
+
+            for object_id, update_date, routing in index_update_dates:
+
+                if object_id not in update_dates:
+
+                    routings[object_id] = routing
+
+                elif update_date != update_dates[object_id] and object_id not in outdated_ids:
+
+                    outdated_ids.append(object_id)
+
+            indexed_ids = { object_id for object_id, update_date, routing in index_update_dates }
+
+            missing_ids.extend( object_id for object_id in update_dates if object_id not in indexed_ids )
+
+    missing_ids.sort()
+    outdated_ids.sort()
+    extra_ids = sorted(routings)
+
+    failed = 0
+
+    if repair:
+
+        chunk_size = current_app.config["SEARCH_REINDEX_CHUNK_SIZE"]
+        ids = missing_ids + outdated_ids
+
+        for position in range(0, len(ids), chunk_size):
+
+            objects = model.query.filter(model.id.in_(ids[position:position + chunk_size])).all()
+
+            failed += len(bulk_index(model.get_index_actions(objects)))
+
+        for position in range(0, len(extra_ids), chunk_size):
+
+            failed += len(bulk_index([ {"operation": "delete", "index": index, "id": object_id,
+                                        "routing": routings[object_id]}
+                                       for object_id in extra_ids[position:position + chunk_size] ]))
+
+        invalidate_search_cache()
+
+    return missing_ids, outdated_ids, extra_ids, failed
+
+# ======================================================
+def get_checksums(model, min_id, max_id, bucket_size):
+    """
+        Function to get the checksums of the objects of a model, by buckets of ids (see
+        "app.search.backend.SearchBackend.get_checksums")
+
+        :param model: the searchable model
+        :type model: class
+
+        :param min_id: the first id of the checked objects
+        :type min_id: int
+
+        :param max_id: the last id of the checked objects
+        :type max_id: int
+
+        :param bucket_size: the number of ids of a bucket
+        :type bucket_size: int
+
+        :return: the number of objects and the sum of the hashes of their ids and update dates, by bucket key
+        :rtype: dict
+    """
+
+    key = model.id - model.id % bucket_size
+
+    rows = db.session.query(key, db.func.count(model.id), db.func.sum(get_checksum_expression(model))) \
+                     .filter(model.id.between(min_id, max_id)) \
+                     .group_by(key)
+
+    return { int(key): (count, int(hashes or 0)) for key, count, hashes in rows }
+
+# ==================================
+def get_checksum_expression(model):
+    """
+        Function to get the SQL expression of the hash of the id and the update date of an object (see
+        "app.search.backend.get_checksum_hash")
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the expression
+        :rtype: sqlalchemy.sql.expression.ColumnElement
+    """
+
+    object_id = db.cast(model.id, db.BigInteger)
+
+    value = (object_id * CHECKSUM_MULTIPLIERS[0] + db.cast(get_timestamp(model.update_date), db.BigInteger)) \
+            % CHECKSUM_MODULUS
+    value = (value * value % CHECKSUM_MODULUS * CHECKSUM_MULTIPLIERS[1] + object_id) % CHECKSUM_MODULUS
+
+    return value * value % CHECKSUM_MODULUS
+
+# ===========================
+def get_timestamp(column):
+    """
+        Function to get the SQL expression of the timestamp (in seconds) of a date column (0 if it is null)
+
+        :param column: the date column
+        :type column: sqlalchemy.Column
+
+        :return: the expression
+        :rtype: sqlalchemy.sql.expression.ColumnElement
+    """
+
+    # SQLite rounds the fractional seconds to milliseconds (a date ending with ".9995" would be counted in the
+    # next second), they are then dropped as by the search backends
+    if db.engine.dialect.name == "sqlite":
+
+        timestamp = db.cast(db.func.strftime("%s", db.func.substr(column, 1, 19)), db.Integer)
+
+    else:
+
+        timestamp = db.func.floor(db.extract("epoch", column))
+
+    return db.func.coalesce(timestamp, 0)
+
+# =======================
+def get_outbox_metrics():
+    """
+        Function to get the metrics of the indexing outbox, shared by all the processes (read from the database) :
+
+        - "outbox_depth": number of pending changes into the indexing outbox
+        - "outbox_lag": age (in seconds) of the oldest pending change
+        - "outbox_retrying": number of pending changes that have already failed to be sent
+
+        :return: the metrics
+        :rtype: dict
+    """
+
+    depth, oldest_creation_date = db.session.query(db.func.count(SearchOutbox.id),
+                                                   db.func.min(SearchOutbox.creation_date)).one()
+
+    if oldest_creation_date:
+
+        lag = (datetime.utcnow() - oldest_creation_date).total_seconds()
+
+    else:
+
+        lag = 0.
+
+    return {"outbox_depth": depth,
+            "outbox_lag": lag,
+            "outbox_retrying": SearchOutbox.query.filter(SearchOutbox.attempts > 0).count()}
+
+# =======================
+def get_search_metrics():
+    """
+        Function to get the metrics of the search indexes maintenance : the metrics of the indexing outbox (see
+        "get_outbox_metrics") and the counters of the current process (i.e. only meaningful within a process
+        serving the application, see "app.api.search.metrics") :
+
+        - "outbox_shipped" / "outbox_failed": number of changes sent / failed to be sent by the current process
+        - "cache_hits" / "cache_misses" / "cache_size" / "cache_generation": state of the search results cache
+          of the current process
+        - "breaker_state" / "breaker_failures" / "breaker_openings" / "breaker_rejected_requests": state of the
+          Elasticsearch circuit breaker of the current process
+
+        :return: the metrics
+        :rtype: dict
+    """
+
+    metrics = get_outbox_metrics()
+
+    metrics.update({"outbox_shipped": outbox_counters["shipped"],
+                    "outbox_failed": outbox_counters["failed"]})
+
+    metrics.update(current_app.search_cache.get_metrics())
+    metrics.update(current_app.search_breaker.get_metrics())
+
+    return metrics
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -8,7 +8,7 @@
 #
 # ==================================================================================================
 
-from flask import render_template, flash, redirect, url_for, request, jsonify, g, current_app
+from flask import render_template, flash, redirect, url_for, request, jsonify, g, current_app, abort
 from flask_login import current_user, login_required
 
 from app import db
@@ -17,6 +17,9 @@ from app.models import User, Article, Reference
 from app.main import bp
 from app.main.forms import CreateArticle, ModifyArticle, SearchForm
 
+from app.search import correct_query, set_refresh_policy, suggest
+from app.draft import get_draft_references, add_draft_reference, remove_draft_reference, clear_draft
+
 from datetime import datetime
 
 
@@ -42,18 +45,20 @@ from datetime import datetime
 @bp.before_request
 def before_request():
     """
-        Function performed before each request to add the SearchForm instance to each page
+        Function performed before each request to add the SearchForm instance to each page, and to make the
+        changes searchable before the response (the author expects to find them at once)
 
         :return: nothing
         :rtype: None
     """
 
+    set_refresh_policy(current_app.config["SEARCH_INTERACTIVE_REFRESH_POLICY"])
+
     if current_user.is_authenticated:
 
         g.search_form = SearchForm()
 
-        articles = current_user.articles.all()
-        g.number_of_articles = len(articles)
+        g.number_of_articles = current_user.get_article_count()
 
 # ==================
 @bp.route("/")
@@ -67,13 +72,6 @@ def index():
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     return render_template("main/index.html", title = "Index")
 
 # ============================================================
@@ -91,35 +89,21 @@ def create_article():
 
         return redirect(url_for("main.index"))
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        references = tmp_article.references.all()
-
-    else:
-
-        references = []
+    references = get_draft_references()
 
     form = CreateArticle()
 
     if form.validate_on_submit():
 
-        tmp_article = Article.query.filter_by(title = "TMP").first()
-
-        if not tmp_article:
-
-            tmp_article = Article(title = "TMP",
-                                  synthesis = "tmp",
-                                  user_id = int(current_user.id))
+        article = Article(title = form.title.data,
+                          synthesis = form.synthesis.data,
+                          user_id = int(current_user.id))
 
-            db.session.add(tmp_article)
-            db.session.commit()
+        db.session.add(article)
 
-            tmp_article = Article.query.filter_by(title = "TMP").first()
+        for reference in clear_draft():
 
-        tmp_article.title = form.title.data
-        tmp_article.synthesis = form.synthesis.data
+            db.session.add(Reference(description = reference["description"], article = article))
 
         db.session.commit()
 
@@ -146,13 +130,6 @@ def user_articles_list():
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     articles_list = User.query.filter_by(username = current_user.username).first().articles.all()
 
     return render_template("main/user_articles_list.html",
@@ -173,13 +150,6 @@ def article(article_number):
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     article = Article.query.get_or_404(int(article_number))
 
     if article.user_id != current_user.id:
@@ -198,7 +168,9 @@ def article(article_number):
              "article_update_date_for_display" : article_update_date_for_display
             }
 
-    return render_template("main/article.html", article = article, dates = dates)
+    related_articles = article.get_related_articles()
+
+    return render_template("main/article.html", article = article, dates = dates, related_articles = related_articles)
 
 # =======================================================================
 @bp.route("/modify_article/<article_number>", methods = ["GET", "POST"])
@@ -214,13 +186,6 @@ def modify_article(article_number):
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     article = Article.query.get_or_404(int(article_number))
 
     references = article.references.all()
@@ -267,13 +232,6 @@ def delete_article(article_number):
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     article = Article.query.get_or_404(int(article_number))
 
     db.session.delete(article)
@@ -304,29 +262,18 @@ def add_reference(user_id, current_article_id):
 
     if int(current_article_id) != -1:
 
-        tmp_article = Article.query.filter_by(id = int(current_article_id)).first()
-
-    else:
-
-        tmp_article = Article.query.filter_by(title = "TMP").first()
-
-        if not tmp_article:
-
-            tmp_article = Article(title = "TMP",
-                                  synthesis = "tmp",
-                                  user_id = int(user_id))
+        article = Article.query.filter_by(id = int(current_article_id)).first()
 
-            db.session.add(tmp_article)
-            db.session.commit()
+        reference = Reference(description = request.form["references"], article = article)
 
-            tmp_article = Article.query.filter_by(title = "TMP").first()
+        db.session.add(reference)
+        db.session.commit()
 
-    reference = Reference(description = request.form["references"], article = tmp_article)
+        references = article.references.all()
 
-    db.session.add(reference)
-    db.session.commit()
+    else:
 
-    references = tmp_article.references.all()
+        references = add_draft_reference(request.form["references"])
 
     data["html_form"] = render_template("main/references_list.html",
                                         references = references,
@@ -353,20 +300,20 @@ def delete_reference(reference_id, current_article_id):
 
     data = {}
 
-    reference = Reference.query.filter_by(id = int(reference_id)).first()
+    if int(current_article_id) != -1:
 
-    db.session.delete(reference)
-    db.session.commit()
+        reference = Reference.query.filter_by(id = int(reference_id)).first()
 
-    if int(current_article_id) != -1:
+        db.session.delete(reference)
+        db.session.commit()
 
-        tmp_article = Article.query.filter_by(id = int(current_article_id)).first()
+        article = Article.query.filter_by(id = int(current_article_id)).first()
 
-    else:
+        references = article.references.all()
 
-        tmp_article = Article.query.filter_by(title = "TMP").first()
+    else:
 
-    references = tmp_article.references.all()
+        references = remove_draft_reference(int(reference_id))
 
     data["html_form"] = render_template("main/references_list.html",
                                         references = references,
@@ -399,12 +346,36 @@ def check_article_title():
 
     return jsonify(data)
 
+# ===========================
+@bp.route("/search/suggest")
+@login_required
+def search_suggest():
+    """
+        View function to suggest the titles of the articles of the current User while typing a search
+        (through AJAX request)
+
+        :return: the suggestions at JSON format
+        :rtype: str
+    """
+
+    suggestions = suggest("article",
+                          request.args.get("q", ""),
+                          current_app.config["SEARCH_SUGGEST_SIZE"],
+                          current_user.id)
+
+    for suggestion in suggestions:
+
+        suggestion["url"] = url_for("main.article", article_number = suggestion["id"])
+
+    return jsonify({"suggestions": suggestions})
+
 # ===================
 @bp.route("/search")
 @login_required
 def search():
     """
-        View function to search for words among Article title and synthesis
+        View function to search for words among Article title and synthesis (along with the corrected search,
+        if some words seem misspelled), or for articles of close meaning as well ("semantic" mode)
 
         :return: the view to be displayed
         :rtype: str
@@ -415,31 +386,58 @@ def search():
         return redirect(url_for("main.user_articles_list"))
 
     page = request.args.get("page", 1, type = int)
+    cursor = request.args.get("cursor")
+    per_page = current_app.config["SEARCH_ARTICLES_PER_PAGE"]
+
+    # the semantic results are only reached by their page number
+    mode = "semantic" if request.args.get("mode") == "semantic" else None
+
+    # beyond the first pages, the pages are only reached through the cursor of the previous page
+    if cursor is None and page * per_page > current_app.config["SEARCH_MAX_RESULT_WINDOW"]:
 
-    articles, total = Article.search(g.search_form.q.data,
-                                     page,
-                                     current_app.config["SEARCH_ARTICLES_PER_PAGE"])
+        abort(404)
 
+    try:
 
-    if total > page * current_app.config["SEARCH_ARTICLES_PER_PAGE"]:
+        articles, total, next_cursor = Article.search(g.search_form.q.data, page, per_page, current_user.id, cursor,
+                                                      semantic = mode == "semantic")
 
-        next_url = url_for("main.search", q = g.search_form.q.data, page = page + 1)
+    except ValueError:
+
+        abort(400)
+
+    if total > page * per_page and (next_cursor or mode):
+
+        next_url = url_for("main.search", q = g.search_form.q.data, page = page + 1, cursor = next_cursor, mode = mode)
 
     else:
 
         next_url = None
 
-    if page > 1:
+    if page > 1 and (page - 1) * per_page <= current_app.config["SEARCH_MAX_RESULT_WINDOW"]:
 
-        prev_url = url_for("main.search", q = g.search_form.q.data, page = page - 1)
+        prev_url = url_for("main.search", q = g.search_form.q.data, page = page - 1, mode = mode)
 
     else:
 
         prev_url = None
 
+    # the misspelled words of the searches with few results are corrected in-process, from the words of the articles
+    # of the user
+    if page == 1 and total <= current_app.config["SEARCH_SPELLING_MAX_RESULTS"]:
+
+        correction = correct_query(Article.__tablename__, g.search_form.q.data, current_user.id)
+
+    else:
+
+        correction = None
+
     return render_template("main/search.html",
                            title = "Résultat de la recherche",
                            articles = articles,
+                           query = g.search_form.q.data,
+                           mode = mode,
+                           correction = correction,
                            next_url = next_url,
                            prev_url = prev_url)
 
@@ -9,10 +9,17 @@
 # ==================================================================================================
 
 from flask import current_app, url_for
+from elasticsearch.exceptions import TransportError
 from app import db, login
-from app.search import add_to_index, remove_from_index, query_index
+from app.search import bulk_index, record_recent_writes, get_payload, get_payloads, get_children_payloads, get_routing, query_index, \
+    invalidate_search_cache, create_search_index, drop_search_index, get_rebuild_versions, semantic_query_index, SearchResult
+from app.search.backend import get_child_columns, get_result_fields, get_source_fields
+from app.search.breaker import is_unavailability
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import get_history, set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from datetime import datetime, timedelta
 from time import time
@@ -38,125 +45,623 @@ from random import choices
 # ============================
 class SearchableMixin(object):
     """
-        Class to make the link between an SQLAlchemy model and the Elasticsearch module
+        Class to make the link between an SQLAlchemy model and the search backend
+
+        The "__searchable__" fields are searched, the "__search_stored__" ones are only stored into the documents
+        to display the search results and the "__search_owner__" one (if any) holds the id of the User who owns
+        the object : the searches of a User are restricted to the objects owned by this User and the documents
+        are routed by owner
+
+        The "__search_mapping__" and "__search_settings__" define the index of the model (see "app.search.mapping")
+        and the "__search_suggest__" field (if any) is suggested while typing a search (see "app.search.suggest")
+
+        The "__search_children__" fields of the documents hold the values of the children of the object (e.g. the
+        descriptions of the references of an article), each one being declared with the name of the relationship
+        and the name of the children attribute : they are searched as well, and only these fields are updated
+        once a child is added, modified or removed
+
+        The "__search_highlight__" fields are not returned with the search results : only fragments of them
+        around the searched words are (see "app.search.es.get_search_request")
     """
 
-    # =========================================
+    __search_stored__ = []
+    __search_children__ = {}
+    __search_highlight__ = []
+    __search_owner__ = None
+    __search_suggest__ = None
+    __search_mapping__ = {}
+    __search_settings__ = {}
+
+    # =======================================================================
     @classmethod
-    def search(cls, expression, page, per_page):
+    def search(cls, expression, page, per_page, user_id = None, cursor = None, semantic = False):
         """
             Class method to execute an Elasticsearch search of the input "expression"
             for the associated input "cls" (with input options values "page" and "per_page")
 
+            The semantic searches also return the objects whose meaning is close to the searched text (see
+            "app.search.semantic_query_index")
+
             :param cls: a class
             :type cls: class
 
             :param expression: the searched text 
             :type expression: str
 
-            :param page: the page number from the query results
+            :param page: the page number from the query results (ignored if "cursor" is given)
             :type page: int
 
             :param per_page: the number of results per page from the query results
             :type per_page: int
 
-            :return: ...
-            :rtype: tuple(, int)
+            :param user_id: the id of the User who searches
+            :type user_id: None | int
+
+            :param cursor: the cursor of the page, returned with the previous page
+            :type cursor: None | str
+
+            :param semantic: True for a semantic search (the cursor is then ignored)
+            :type semantic: bool
+
+            :return: the page results, the total number of results and the cursor of the next page
+            :rtype: tuple(list(app.search.SearchResult | cls), int, None | str)
+
+            :raise ValueError: if the cursor is invalid
+        """
+
+        if semantic:
+
+            documents, total, next_cursor = semantic_query_index(cls.__tablename__, expression, page, per_page, user_id)
+
+        else:
+
+            documents, total, next_cursor = query_index(cls.__tablename__, expression, page, per_page, user_id, cursor)
+
+        fields = set(get_result_fields(cls))
+
+        # the results are built from the documents if they hold every field (e.g. not indexed by a previous version)
+        if current_app.config["SEARCH_RESULTS_FROM_INDEX"] and all( fields <= set(document) for document in documents ):
+
+            return [ cls.get_search_result(document) for document in documents ], total, next_cursor
+
+        ids = [ document["id"] for document in documents ]
+
+        objects = { obj.id: obj for obj in cls.query.filter(cls.id.in_(ids)) } if ids else {}
+
+        return [ objects[id] for id in ids if id in objects ], total, next_cursor
+
+    # =========================================
+    @classmethod
+    def get_search_result(cls, document):
+        """
+            Class method to build a search result from a document of the index
+
+            :param cls: a class
+            :type cls: class
+
+            :param document: the document
+            :type document: dict
+
+            :return: the search result
+            :rtype: app.search.SearchResult
         """
 
-        ids, total = query_index(cls.__tablename__, expression, page, per_page)
+        fields = {}
+
+        for field, value in document.items():
+
+            # the dates are serialized by Elasticsearch
+            if isinstance(value, str) and isinstance(cls.__table__.c[field].type, db.DateTime):
 
-        if total == 0:
+                value = datetime.fromisoformat(value)
 
-            return cls.query.filter_by(id = 0), 0
+            fields[field] = value
 
-        when = []
+        return SearchResult(**fields)
 
-        for list_index, list_value in enumerate(ids):
+    # ==================================
+    @classmethod
+    def get_searchable_model(cls, index):
+        """
+            Class method to get the model associated to an index
 
-            when.append((list_value, list_index))
+            :param cls: a class
+            :type cls: class
+
+            :param index: the index name
+            :type index: str
+
+            :return: the model whose table name is the index name, None if there is no such model
+            :rtype: None | class
+        """
 
-        return cls.query.filter(cls.id.in_(ids)).order_by(db.case(when, value = cls.id)), total
+        for model in SearchableMixin.__subclasses__():
 
-    # ==============================
+            if model.__tablename__ == index:
+
+                return model
+
+        return None
+
+    # ============================================
     @classmethod
-    def before_commit(cls, session):
+    def after_flush(cls, session, flush_context):
         """
-            Class method to save the objects that are going to be :
+            Class method to save the objects that have been :
 
             - added ("new")
             - modified ("dirty")
             - removed ("deleted")
 
+            by the current flush (their ids are then known).
+
+            If the indexing outbox is enabled, the changes are written into the "search_outbox" table within
+            the current transaction, otherwise they are kept until the commit to be indexed
+
+            The modified objects are compared to their previous state (attributes history) : the ones whose document
+            has not changed are skipped, the other ones are partially updated with their changed fields only. The
+            objects whose children only have changed are partially updated with their children values and get a new
+            update date
+
             :param cls: a class
             :type cls: class
 
             :param session: a session
-            :type session: ...
+            :type session: sqlalchemy.orm.session.Session
+
+            :param flush_context: the flush context
+            :type flush_context: sqlalchemy.orm.unitofwork.UOWTransaction
 
             :return: Nothing
             :rtype: None
         """
 
-        session._changes = { "add": list(session.new),
-                             "update": list(session.dirty),
-                             "delete": list(session.deleted)
-                           }
+        changes = []
+
+        # the modified objects are only updated with their changed fields (and skipped if there is none)
+        for operation, objects in [("index", session.new), ("update", session.dirty), ("delete", session.deleted)]:
+
+            for obj in objects:
+
+                if isinstance(obj, SearchableMixin) and (operation != "update" or obj.get_changed_fields()):
+
+                    changes.append((operation, obj))
+
+        # the changes of the children only update the children values of the documents of their parents
+        updates = cls.get_children_updates(session, changes)
+
+        if not changes and not updates:
+
+            return None
+
+        # the objects whose children only have changed are changed as well : their update date selects them for
+        # the incremental synchronization and for the catch-up of the rebuilds (see "app.indexing")
+        now = datetime.utcnow()
+
+        for obj, payload in updates:
+
+            session.connection().execute(obj.__table__.update()
+                                                      .where(obj.__table__.c.id == obj.id)
+                                                      .values(update_date = now))
+
+            set_committed_value(obj, "update_date", now)
+            payload["update_date"] = now
+
+        # the cached search results are invalidated once the transaction is committed
+        session.info["search_changed"] = True
+
+        # the in-process dictionaries of the corrections of the owners of the changed objects (the previous owners
+        # included) are invalidated once the transaction is committed
+        owners = session.info.setdefault("search_owners", set())
+
+        for obj in [ obj for operation, obj in changes ] + [ obj for obj, payload in updates ]:
+
+            if obj.__search_owner__:
+
+                owners.update( (obj.__tablename__, owner)
+                               for owner in set(get_history(obj, obj.__search_owner__).sum())
+                                            | {getattr(obj, obj.__search_owner__)} )
+
+            else:
+
+                owners.add((obj.__tablename__, None))
+
+        # the in-process suggestions are updated once the transaction is committed
+        suggestions = session.info.setdefault("search_suggestions", [])
+
+        for operation, obj in changes:
+
+            if obj.__search_suggest__ and (operation != "update" or obj.__search_suggest__ in obj.get_changed_fields()):
+
+                owner = getattr(obj, obj.__search_owner__) if obj.__search_owner__ else None
+
+                suggestions.append(("delete" if operation == "delete" else "index",
+                                    obj.__tablename__,
+                                    obj.id,
+                                    getattr(obj, obj.__search_suggest__),
+                                    owner))
+
+        # the deletions are kept for the incremental synchronization of the indexes, and during their rebuilds
+        # (a deleted object may have been read by the rebuild before its deletion)
+        if current_app.search_backend.external:
+
+            now = datetime.utcnow()
+            rebuild_versions = get_rebuild_versions(session.connection())
+
+            tombstones = [ {"index": obj.__tablename__,
+                            "object_id": obj.id,
+                            "routing": get_routing(obj),
+                            "deletion_date": now} for operation, obj in changes
+                           if operation == "delete" and (current_app.config["SEARCH_SYNC_ENABLED"]
+                                                         or obj.__tablename__ in rebuild_versions) ]
+
+            if tombstones:
+
+                session.connection().execute(SearchTombstone.__table__.insert(), tombstones)
+
+        if current_app.config["SEARCH_OUTBOX_ENABLED"] and current_app.search_backend.external:
+
+            now = datetime.utcnow()
+
+            # the outbox does not record the changed fields : the modified objects are sent as a whole, only the
+            # "update" entries of the children changes are partial
+            rows = [ ("delete" if operation == "delete" else "index", obj) for operation, obj in changes ]
+            rows += [ ("update", obj) for obj, payload in updates ]
+
+            session.connection().execute(SearchOutbox.__table__.insert(),
+                                         [ {"index": obj.__tablename__,
+                                            "object_id": obj.id,
+                                            "operation": operation,
+                                            "routing": get_routing(obj),
+                                            "creation_date": now,
+                                            "next_attempt_date": now,
+                                            "attempts": 0} for operation, obj in rows ])
+
+        elif current_app.search_backend.external:
+
+            # only the last operation for a given object is kept, with the object state at that time
+            pending_actions = session.info.setdefault("search_actions", {})
+
+            for operation, obj in changes:
+
+                key = (obj.__tablename__, obj.id)
+
+                if operation == "update":
+
+                    cls.add_pending_update(pending_actions, obj, { field: getattr(obj, field)
+                                                                   for field in obj.get_changed_fields() })
+
+                    continue
+
+                action = {"operation": operation, "index": obj.__tablename__, "id": obj.id}
+
+                if operation == "index":
+
+                    action["payload"] = get_payload(obj)
+
+                else:
+
+                    action["routing"] = get_routing(obj)
+
+                pending_actions[key] = action
+
+            for obj, payload in updates:
+
+                cls.add_pending_update(pending_actions, obj, payload)
+
+    # ===========================================================
+    @classmethod
+    def add_pending_update(cls, pending_actions, obj, payload):
+        """
+            Class method to add the changed fields of an object to the pending indexing actions : they complete
+            the pending document (or partial update) of the object, if any, unless it is deleted
+
+            :param cls: a class
+            :type cls: class
+
+            :param pending_actions: the pending actions, by index name and object id
+            :type pending_actions: dict
+
+            :param obj: the object
+            :type obj: app.models.SearchableMixin
+
+            :param payload: the changed fields of the document
+            :type payload: dict
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        action = pending_actions.get((obj.__tablename__, obj.id))
+
+        if action is None:
+
+            pending_actions[(obj.__tablename__, obj.id)] = {"operation": "update",
+                                                            "index": obj.__tablename__,
+                                                            "id": obj.id,
+                                                            "payload": payload,
+                                                            "routing": get_routing(obj)}
+
+        elif action["operation"] != "delete":
+
+            action["payload"].update(payload)
+
+    # ===========================
+    def get_changed_fields(self):
+        """
+            Method to get the fields of the document of the object whose value has been changed by the current
+            flush (from the attributes history, a value set to the same value is not a change)
+
+            :return: the fields names
+            :rtype: list(str)
+        """
+
+        return [ field for field in get_source_fields(self) if get_history(self, field).has_changes() ]
+
+    # ===================================================
+    @classmethod
+    def get_index_actions(cls, objects, index = None):
+        """
+            Class method to get the indexing actions of several objects (their children values are loaded
+            through a single query per field)
+
+            :param cls: a class
+            :type cls: class
+
+            :param objects: the objects
+            :type objects: list(cls)
+
+            :param index: the index name, the index of the class if None
+            :type index: None | str
+
+            :return: the actions (see "app.search.bulk_index")
+            :rtype: list(dict)
+        """
+
+        return [ {"operation": "index", "index": index or cls.__tablename__, "id": obj.id, "payload": payload}
+                 for obj, payload in zip(objects, get_payloads(objects)) ]
+
+    # =============================================================
+    @classmethod
+    def get_children_updates(cls, session, changes):
+        """
+            Class method to get the searchable objects whose children (see "__search_children__") have been
+            added, modified or removed by the current flush, along with their new children values
+
+            :param cls: a class
+            :type cls: class
+
+            :param session: a session
+            :type session: sqlalchemy.orm.session.Session
+
+            :param changes: the changed searchable objects (which are sent as a whole), each one being a tuple
+                            with the operation and the object
+            :type changes: list(tuple(str, app.models.SearchableMixin))
+
+            :return: the objects, each one associated to its children fields
+            :rtype: list(tuple(app.models.SearchableMixin, dict))
+        """
+
+        # the children values are sent along with the whole documents
+        changed = set( (type(obj), obj.id) for operation, obj in changes if operation != "update" )
+        parents = {}
+
+        for model in SearchableMixin.__subclasses__():
+
+            for field in model.__search_children__:
+
+                parent_column, column = get_child_columns(model, field)
+                child_model = column.class_
+                parent_attribute = child_model.__mapper__.get_property_by_column(parent_column).key
+
+                for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+
+                    if not isinstance(obj, child_model):
+
+                        continue
+
+                    # a child moved to another parent changes both of them
+                    for id in get_history(obj, parent_attribute).sum():
+
+                        if id is not None and (model, id) not in changed:
+
+                            parents.setdefault(model, set()).add(id)
+
+        updates = []
+
+        for model, ids in parents.items():
+
+            payloads = get_children_payloads(model, sorted(ids))
+
+            for obj in session.query(model).filter(model.id.in_(ids)).order_by(model.id):
+
+                updates.append((obj, payloads[obj.id]))
+
+        return updates
 
     # =============================
     @classmethod
     def after_commit(cls, session):
         """
-            Class method to make changes on the Elasticsearch side,
-            i.e. to call the corresponding indexing function depending on the case
-            (add, modify or delete)
+            Class method to make changes on the Elasticsearch side, i.e. to send the pending indexing actions
+            (add, modify or delete) of the committed transaction through a single "_bulk" request, with the refresh
+            policy of the session (see "app.search.set_refresh_policy") or SEARCH_REFRESH_POLICY
+
+            When the indexing outbox is enabled, the changes have already been written into the outbox
+            and the background drainer (if any) is only woken up
+
+            If Elasticsearch is not available, the changes are queued into the outbox, to be sent once it is back
 
             :param cls: a class
             :type cls: class
 
             :param session: a session
-            :type session: ..
+            :type session: sqlalchemy.orm.session.Session
 
             :return: nothing
             :rtype: None
         """
 
-        for obj in session._changes["add"]:
+        pending_actions = session.info.pop("search_actions", None)
+
+        if pending_actions:
 
-            if isinstance(obj, SearchableMixin):
+            refresh = session.info.get("search_refresh_policy") or current_app.config["SEARCH_REFRESH_POLICY"]
 
-                add_to_index(obj.__tablename__, obj)
+            try:
 
-        for obj in session._changes["update"]:
+                failures = bulk_index(list(pending_actions.values()), refresh)
 
-            if isinstance(obj, SearchableMixin):
+                # the documents which are not searchable yet are overlaid on the results of their owner
+                if refresh == "false":
 
-                add_to_index(obj.__tablename__, obj)
+                    failed_actions = [ action for action, error in failures ]
 
-        for obj in session._changes["delete"]:
+                    record_recent_writes([ action for action in pending_actions.values()
+                                           if not any( action is failed_action for failed_action in failed_actions ) ])
 
-            if isinstance(obj, SearchableMixin):
+            except TransportError as error:
 
-                remove_from_index(obj.__tablename__, obj)
+                if not is_unavailability(error):
 
-        session._changes = None
+                    raise
 
-    # ===============
+                current_app.logger.warning("Indexing postponed, Elasticsearch is not available: {}".format(error))
+
+                SearchOutbox.enqueue(list(pending_actions.values()))
+
+                failures = []
+
+            for action, error in failures:
+
+                current_app.logger.error("Indexing of {} {} failed: {}".format(action["index"], action["id"], error))
+
+        if session.info.pop("search_changed", False):
+
+            invalidate_search_cache()
+
+        owners = session.info.pop("search_owners", None)
+
+        if owners:
+
+            current_app.search_spelling.invalidate(owners)
+
+        suggestions = session.info.pop("search_suggestions", None)
+
+        if suggestions:
+
+            current_app.search_suggester.update(suggestions)
+
+        drainer = getattr(current_app, "outbox_drainer", None)
+
+        if drainer:
+
+            drainer.wake_up()
+
+    # ===============================
     @classmethod
-    def reindex(cls):
+    def after_rollback(cls, session):
         """
-            Class method to refresh an index 
+            Class method to forget the changes that have not been committed
 
             :param cls: a class
             :type cls: class
 
-            :return: ...
-            :rtype: ...
+            :param session: a session
+            :type session: sqlalchemy.orm.session.Session
+
+            :return: nothing
+            :rtype: None
         """
 
-        for obj in cls.query:
+        session.info.pop("search_actions", None)
+        session.info.pop("search_changed", None)
+        session.info.pop("search_owners", None)
+        session.info.pop("search_suggestions", None)
+
+    # ===============================================================================================
+    @classmethod
+    def reindex(cls, chunk_size = None, min_id = None, max_id = None, since = None, callback = None, index = None):
+        """
+            Class method to refresh an index
+
+            The rows are streamed from the database (without keeping them into the session)
+            and sent to Elasticsearch by chunks, each chunk through a single "_bulk" request
+
+            :param cls: a class
+            :type cls: class
+
+            :param chunk_size: the number of documents sent per "_bulk" request
+            :type chunk_size: None | int
+
+            :param min_id: the first id to be indexed (no lower bound if None)
+            :type min_id: None | int
+
+            :param max_id: the last id to be indexed (no upper bound if None)
+            :type max_id: None | int
+
+            :param since: only the objects updated from this date are indexed (all of them if None)
+            :type since: None | datetime.datetime
+
+            :param callback: function called with the number of documents of each chunk once it is sent
+            :type callback: None | function
+
+            :param index: the index to be filled (e.g. a new version of the index), the index of the class if None
+            :type index: None | str
+
+            :return: the number of indexed documents and the number of failures
+            :rtype: tuple(int, int)
+        """
+
+        chunk_size = chunk_size or current_app.config["SEARCH_REINDEX_CHUNK_SIZE"]
+
+        query = cls.query.order_by(cls.id)
+
+        if min_id is not None:
+
+            query = query.filter(cls.id >= min_id)
+
+        if max_id is not None:
+
+            query = query.filter(cls.id <= max_id)
+
+        if since is not None:
+
+            query = query.filter(cls.update_date >= since)
+
+        indexed = 0
+        failed = 0
+        objects = []
+
+        for obj in query.yield_per(chunk_size):
+
+            objects.append(obj)
+
+            if len(objects) == chunk_size:
+
+                actions = cls.get_index_actions(objects, index)
+
+                failed += len(bulk_index(actions))
+                indexed += len(actions)
+
+                if callback:
+
+                    callback(len(actions))
+
+                objects = []
 
-            add_to_index(cls.__tablename__, obj)
+        if objects:
+
+            actions = cls.get_index_actions(objects, index)
+
+            failed += len(bulk_index(actions))
+            indexed += len(actions)
+
+            if callback:
+
+                callback(len(actions))
+
+        return indexed, failed
 
 # ==============================
 class User(UserMixin, db.Model):
@@ -170,6 +675,7 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), index = True, unique = True)
     password_hash = db.Column(db.String(128))
     articles = db.relationship("Article", backref = "author", lazy = "dynamic", cascade="all,delete")
+    article_count = db.Column(db.Integer, default = 0)
     is_guest = db.Column(db.Boolean, default = False)
     token = db.Column(db.String(32), index = True, unique = True)
     token_expiration = db.Column(db.DateTime)
@@ -210,6 +716,48 @@ class User(UserMixin, db.Model):
 
         return check_password_hash(self.password_hash, password)
 
+    # ============================
+    def get_article_count(self):
+        """
+            Method to get the number of articles of the current User
+
+            The counter is maintained through the "after_insert" and "after_delete" events of the
+            Article model, the articles are only counted into the database if it has not been set yet
+
+            :return: the number of articles
+            :rtype: int
+        """
+
+        if self.article_count is None:
+
+            return self.articles.count()
+
+        return self.article_count
+
+    # =============================
+    @staticmethod
+    def repair_article_counts():
+        """
+            Function to repair the articles counters of the Users that are not consistent with the
+            actual number of articles into the database
+
+            :return: the number of repaired Users
+            :rtype: int
+        """
+
+        actual_count = db.select([db.func.count(Article.id)]).where(Article.user_id == User.id).as_scalar()
+
+        inconsistent_users = db.session.query(User, actual_count).filter(db.or_(User.article_count.is_(None),
+                                                                                User.article_count != actual_count)).all()
+
+        for user, count in inconsistent_users:
+
+            user.article_count = count
+
+        db.session.commit()
+
+        return len(inconsistent_users)
+
     # ===================================================
     def get_reset_password_token(self, expires_in = 600):
         """
@@ -362,6 +910,28 @@ class Article(SearchableMixin, db.Model):
     """
 
     __searchable__ = ["title", "synthesis"]
+    __search_stored__ = ["update_date", "user_id"]
+    __search_owner__ = "user_id"
+    __search_suggest__ = "title"
+    __search_children__ = {"references": ("references", "description")}
+    __search_highlight__ = ["synthesis"]
+    # the id is sorted and ranged (by the consistency checks), the owner only filtered (no doc values), only
+    # the title needs an exact ("keyword") subfield and a suggestions one (whose positions and frequencies are
+    # useless), and its length does not matter for the scoring (no norms)
+    __search_mapping__ = {"id": {"type": "integer"},
+                          "title": {"type": "text",
+                                    "analyzer": "french_text",
+                                    "norms": False,
+                                    "fields": {"raw": {"type": "keyword", "ignore_above": 100},
+                                               "prefixes": {"type": "text",
+                                                            "analyzer": "prefixes",
+                                                            "search_analyzer": "prefixes_search",
+                                                            "norms": False,
+                                                            "index_options": "docs"}}},
+                          "synthesis": {"type": "text", "analyzer": "french_text"},
+                          "references": {"type": "text", "analyzer": "french_text"},
+                          "update_date": {"type": "date"},
+                          "user_id": {"type": "keyword", "doc_values": False}}
 
     id = db.Column(db.Integer, primary_key = True)
     title = db.Column(db.String(100), index = True, unique = True)
@@ -402,6 +972,20 @@ class Article(SearchableMixin, db.Model):
 
         return data
 
+    # =============================
+    def get_related_articles(self):
+        """
+            Method to get the articles related to the current Article (see "app.related"), the closest first
+
+            :return: the related articles
+            :rtype: list(app.models.Article)
+        """
+
+        return Article.query.join(RelatedArticle, RelatedArticle.related_id == Article.id) \
+                            .filter(RelatedArticle.article_id == self.id) \
+                            .order_by(RelatedArticle.score.desc(), Article.id) \
+                            .all()
+
     # =============================================
     def from_dict(self, data, new_article = False):
         """
@@ -450,6 +1034,182 @@ class Reference(db.Model):
         return "<Reference {}>".format(self.description)
 
 
+# ===========================
+class SearchOutbox(db.Model):
+    """
+        Class that represents a pending change of a searchable object, which has to be sent to Elasticsearch
+    """
+
+    __tablename__ = "search_outbox"
+
+    id = db.Column(db.Integer, primary_key = True)
+    index = db.Column(db.String(64))
+    object_id = db.Column(db.Integer)
+    operation = db.Column(db.String(16))
+    routing = db.Column(db.String(64))
+    creation_date = db.Column(db.DateTime, index = True, default = datetime.utcnow)
+    next_attempt_date = db.Column(db.DateTime, index = True, default = datetime.utcnow)
+    attempts = db.Column(db.Integer, default = 0)
+    last_error = db.Column(db.Text())
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the operation, index and object id values
+            :rtype: str
+        """
+
+        return "<SearchOutbox {} {} {}>".format(self.operation, self.index, self.object_id)
+
+    # ==========================
+    @staticmethod
+    def enqueue(actions):
+        """
+            Static method to queue indexing actions into the outbox, outside of any transaction of the session
+            (e.g. once it has been committed)
+
+            :param actions: the actions (see "app.search.bulk_index")
+            :type actions: list(dict)
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        now = datetime.utcnow()
+
+        with db.engine.begin() as connection:
+
+            connection.execute(SearchOutbox.__table__.insert(),
+                               [ {"index": action["index"],
+                                  "object_id": action["id"],
+                                  "operation": action["operation"],
+                                  "routing": action.get("routing"),
+                                  "creation_date": now,
+                                  "next_attempt_date": now,
+                                  "attempts": 0} for action in actions ])
+
+# ==============================
+class SearchTombstone(db.Model):
+    """
+        Class that represents a searchable object deletion, used by the incremental synchronization of the indexes
+    """
+
+    __tablename__ = "search_tombstone"
+
+    id = db.Column(db.Integer, primary_key = True)
+    index = db.Column(db.String(64))
+    object_id = db.Column(db.Integer)
+    routing = db.Column(db.String(64))
+    deletion_date = db.Column(db.DateTime, index = True, default = datetime.utcnow)
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the index and object id values
+            :rtype: str
+        """
+
+        return "<SearchTombstone {} {}>".format(self.index, self.object_id)
+
+# ==============================
+class SearchSyncState(db.Model):
+    """
+        Class that represents the state of the incremental synchronization of an index
+    """
+
+    __tablename__ = "search_sync_state"
+
+    index = db.Column(db.String(64), primary_key = True)
+    watermark = db.Column(db.DateTime)
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the index and watermark values
+            :rtype: str
+        """
+
+        return "<SearchSyncState {} {}>".format(self.index, self.watermark)
+
+# ============================
+class SearchRebuild(db.Model):
+    """
+        Class that represents the rebuild in progress of an index : the changes are also sent to the new version
+        of the index (see "app.indexing.rebuild_index")
+    """
+
+    __tablename__ = "search_rebuild"
+
+    index = db.Column(db.String(64), primary_key = True)
+    version = db.Column(db.String(64))
+    start_date = db.Column(db.DateTime, default = datetime.utcnow)
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the index and version values
+            :rtype: str
+        """
+
+        return "<SearchRebuild {} {}>".format(self.index, self.version)
+
+# ============================
+class RelatedArticle(db.Model):
+    """
+        Class that represents an article related to another one (see "app.related"), along with their similarity
+    """
+
+    __tablename__ = "related_article"
+
+    article_id = db.Column(db.Integer, db.ForeignKey("article.id"), primary_key = True)
+    related_id = db.Column(db.Integer, db.ForeignKey("article.id"), primary_key = True, index = True)
+    score = db.Column(db.Float)
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the article id and related article id values
+            :rtype: str
+        """
+
+        return "<RelatedArticle {} {}>".format(self.article_id, self.related_id)
+
+# ===========================
+class RelatedChange(db.Model):
+    """
+        Class that represents a pending change of an article, whose related articles (and the ones of the other
+        articles of its owner) have to be computed again (see "app.related.drain_related_changes")
+    """
+
+    __tablename__ = "related_change"
+
+    id = db.Column(db.Integer, primary_key = True)
+    user_id = db.Column(db.Integer, index = True)
+    article_id = db.Column(db.Integer)
+    affected = db.Column(db.Boolean, default = False)
+    creation_date = db.Column(db.DateTime, default = datetime.utcnow)
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the user id and article id values
+            :rtype: str
+        """
+
+        return "<RelatedChange {} {}>".format(self.user_id, self.article_id)
+
 # ==================================================================================================
 #
 # FUNCTIONS
@@ -471,6 +1231,202 @@ def load_user(user_id):
 
     return User.query.get(user_id)
 
+# ==========================================================
+def update_article_count(connection, article, increment):
+    """
+        Function to update the articles counter of the author of an article
+
+        :param connection: the connection used by the current flush
+        :type connection: sqlalchemy.engine.Connection
+
+        :param article: the inserted or deleted article
+        :type article: app.models.Article
+
+        :param increment: the value added to the counter
+        :type increment: int
+
+        :return: nothing
+        :rtype: None
+    """
+
+    if article.user_id is None:
+
+        return None
+
+    user_table = User.__table__
+
+    connection.execute(user_table.update()
+                                 .where(user_table.c.id == article.user_id)
+                                 .values(article_count = db.func.coalesce(user_table.c.article_count, 0) + increment))
+
+    # the author may already be loaded into the session: its counter is updated without any new query
+    session = object_session(article)
+    user = session.identity_map.get(identity_key(User, article.user_id)) if session else None
+
+    if user is not None and "article_count" in user.__dict__:
+
+        set_committed_value(user, "article_count", (user.article_count or 0) + increment)
+
+# =================================================
+def after_article_insert(mapper, connection, target):
+    """
+        Function called after the insertion of an Article to increment its author articles counter
+
+        :param mapper: the Article mapper
+        :type mapper: sqlalchemy.orm.Mapper
+
+        :param connection: the connection used by the current flush
+        :type connection: sqlalchemy.engine.Connection
+
+        :param target: the inserted Article
+        :type target: app.models.Article
+
+        :return: nothing
+        :rtype: None
+    """
+
+    update_article_count(connection, target, 1)
+
+# =================================================
+def after_article_delete(mapper, connection, target):
+    """
+        Function called after the deletion of an Article to decrement its author articles counter
+
+        :param mapper: the Article mapper
+        :type mapper: sqlalchemy.orm.Mapper
+
+        :param connection: the connection used by the current flush
+        :type connection: sqlalchemy.engine.Connection
+
+        :param target: the deleted Article
+        :type target: app.models.Article
+
+        :return: nothing
+        :rtype: None
+    """
+
+    update_article_count(connection, target, -1)
+
+# =================================================
+def before_article_delete(mapper, connection, target):
+    """
+        Function called before the deletion of an Article to remove the rows of its related articles, the
+        articles which were related to it being queued to have their related articles computed again (see
+        "app.related.drain_related_changes")
+
+        :param mapper: the Article mapper
+        :type mapper: sqlalchemy.orm.Mapper
+
+        :param connection: the connection used by the current flush
+        :type connection: sqlalchemy.engine.Connection
+
+        :param target: the deleted Article
+        :type target: app.models.Article
+
+        :return: nothing
+        :rtype: None
+    """
+
+    table = RelatedArticle.__table__
+    article_table = Article.__table__
+
+    affected_rows = connection.execute(db.select([table.c.article_id, article_table.c.user_id])
+                                         .select_from(table.join(article_table,
+                                                                 article_table.c.id == table.c.article_id))
+                                         .where(table.c.related_id == target.id)).fetchall()
+
+    connection.execute(table.delete().where(db.or_(table.c.article_id == target.id, table.c.related_id == target.id)))
+
+    if affected_rows:
+
+        now = datetime.utcnow()
+
+        connection.execute(RelatedChange.__table__.insert(),
+                           [ {"user_id": row.user_id,
+                              "article_id": row.article_id,
+                              "affected": True,
+                              "creation_date": now} for row in affected_rows ])
+
+# =============================================
+def after_related_flush(session, flush_context):
+    """
+        Function called after each flush to queue the articles whose title or synthesis has been added, modified or
+        removed, by owner, within the flushed transaction (their related articles are computed again in background
+        once committed, see "app.related.drain_related_changes")
+
+        :param session: a session
+        :type session: sqlalchemy.orm.session.Session
+
+        :param flush_context: the flush context
+        :type flush_context: sqlalchemy.orm.unitofwork.UOWTransaction
+
+        :return: nothing
+        :rtype: None
+    """
+
+    now = datetime.utcnow()
+    changes = []
+
+    for operation, objects in [("index", session.new), ("update", session.dirty), ("delete", session.deleted)]:
+
+        for obj in objects:
+
+            if not isinstance(obj, Article):
+
+                continue
+
+            if operation == "update" and not any( get_history(obj, field).has_changes()
+                                                  for field in ["title", "synthesis", "user_id"] ):
+
+                continue
+
+            # an article given to another User is removed from the articles of its previous owner
+            for user_id in set(get_history(obj, "user_id").sum()) | {obj.user_id}:
+
+                if user_id is not None:
+
+                    changes.append({"user_id": user_id, "article_id": obj.id, "affected": False, "creation_date": now})
+
+    if changes:
+
+        session.connection().execute(RelatedChange.__table__.insert(), changes)
+
+        session.info["related_changed"] = True
+
+# ===============================
+def after_related_commit(session):
+    """
+        Function called after each commit to wake the related articles drainer up (if any) once articles have been
+        changed
+
+        :param session: a session
+        :type session: sqlalchemy.orm.session.Session
+
+        :return: nothing
+        :rtype: None
+    """
+
+    drainer = getattr(current_app, "related_drainer", None)
+
+    if session.info.pop("related_changed", False) and drainer:
+
+        drainer.wake_up()
+
+# =================================
+def after_related_rollback(session):
+    """
+        Function called after each rollback to forget the changed articles that have not been committed (their
+        queued changes are rolled back along with them)
+
+        :param session: a session
+        :type session: sqlalchemy.orm.session.Session
+
+        :return: nothing
+        :rtype: None
+    """
+
+    session.info.pop("related_changed", None)
+
 
 # ==================================================================================================
 #
@@ -478,5 +1434,17 @@ def load_user(user_id):
 #
 # ==================================================================================================
 
-db.event.listen(db.session, "before_commit", SearchableMixin.before_commit)
+db.event.listen(db.session, "after_flush", SearchableMixin.after_flush)
 db.event.listen(db.session, "after_commit", SearchableMixin.after_commit)
+db.event.listen(db.session, "after_rollback", SearchableMixin.after_rollback)
+
+db.event.listen(Article.__table__, "after_create", create_search_index)
+db.event.listen(Article.__table__, "before_drop", drop_search_index)
+
+db.event.listen(Article, "after_insert", after_article_insert)
+db.event.listen(Article, "after_delete", after_article_delete)
+db.event.listen(Article, "before_delete", before_article_delete)
+
+db.event.listen(db.session, "after_flush", after_related_flush)
+db.event.listen(db.session, "after_commit", after_related_commit)
+db.event.listen(db.session, "after_rollback", after_related_rollback)
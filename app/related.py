@@ -0,0 +1,341 @@
+"""
+    Module to handle the related articles of each article (displayed along with the article)
+
+    The articles of a User are represented by the TF-IDF vectors of their title and synthesis (see
+    "app.search.vectors") : the related articles of an article are the ones with the closest vectors (cosine
+    similarity). They are stored into the "related_article" table
+
+    The changed articles are queued into the "related_change" table within the transaction that changes them : only
+    the neighbours involving them are computed again, in background (see "drain_related_changes"), so that the
+    requests do not compute the vectors of all the articles of their User.
+
+    The vectors are not stored : each update computes again the vectors of all the articles of the User (the inverse
+    document frequencies depend on all of them). Its cost is bounded by delaying the changes of a User, so that the
+    changes made within RELATED_ARTICLES_DRAIN_DELAY seconds are handled by a single update
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import numpy as np
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import Article, RelatedArticle, RelatedChange
+from app.search.vectors import get_tfidf_matrix
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# number of articles whose similarities are computed at once (i.e. the number of rows of the dense blocks of scores)
+BLOCK_SIZE = 256
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# =========================================
+def get_user_articles(connection, user_id):
+    """
+        Function to get the ids and the texts (title and synthesis) of the articles of a User
+
+        :param connection: a connection
+        :type connection: sqlalchemy.engine.Connection
+
+        :param user_id: the id of the User
+        :type user_id: int
+
+        :return: the ids and the texts, ordered by id
+        :rtype: tuple(list(int), list(str))
+    """
+
+    table = Article.__table__
+
+    rows = connection.execute(db.select([table.c.id, table.c.title, table.c.synthesis])
+                                .where(table.c.user_id == user_id)
+                                .order_by(table.c.id)).fetchall()
+
+    return [ row.id for row in rows ], [ "{} {}".format(row.title or "", row.synthesis or "") for row in rows ]
+
+# =============================================================
+def get_related_rows(matrix, ids, positions, count, min_score):
+    """
+        Function to get the related articles of several articles (the closest ones, from the whole matrix)
+
+        :param matrix: the TF-IDF vectors of the articles of a User
+        :type matrix: scipy.sparse.csr_matrix
+
+        :param ids: the ids of the articles (one per row of the matrix)
+        :type ids: list(int)
+
+        :param positions: the rows of the articles whose related articles are computed
+        :type positions: list(int)
+
+        :param count: the maximum number of related articles of an article
+        :type count: int
+
+        :param min_score: the minimum similarity of a related article
+        :type min_score: float
+
+        :return: the rows of the "related_article" table
+        :rtype: list(dict)
+    """
+
+    rows = []
+
+    for start in range(0, len(positions), BLOCK_SIZE):
+
+        block = positions[start:start + BLOCK_SIZE]
+        scores = (matrix[block] @ matrix.T).toarray()
+
+        # an article is not related to itself
+        scores[np.arange(len(block)), block] = 0.
+
+        if scores.shape[1] > count:
+
+            candidates = np.argpartition(-scores, count, axis = 1)[:, :count]
+
+        else:
+
+            candidates = np.tile(np.arange(scores.shape[1]), (len(block), 1))
+
+        for line, position in enumerate(block):
+
+            columns = candidates[line][np.argsort(-scores[line, candidates[line]], kind = "mergesort")]
+
+            for column in columns:
+
+                if scores[line, column] >= min_score:
+
+                    rows.append({"article_id": ids[position],
+                                 "related_id": ids[column],
+                                 "score": float(scores[line, column])})
+
+    return rows
+
+# ==============================================================================
+def update_related_articles(connection, user_id, changed_ids, affected_ids = ()):
+    """
+        Function to update the related articles of the articles of a User once some of them have been added,
+        modified or removed : the related articles of the changed articles are computed again, as well as the ones
+        of the articles which were related to a changed article or which are now closer to a changed article than
+        to their least related article
+
+        The scores of the other articles are kept, although the inverse document frequencies have changed (see
+        "rebuild_related_articles")
+
+        :param connection: a connection (within a transaction)
+        :type connection: sqlalchemy.engine.Connection
+
+        :param user_id: the id of the User
+        :type user_id: int
+
+        :param changed_ids: the ids of the added, modified or removed articles
+        :type changed_ids: set(int)
+
+        :param affected_ids: the ids of the articles which were related to removed articles
+        :type affected_ids: set(int)
+
+        :return: the number of articles whose related articles have been computed again
+        :rtype: int
+    """
+
+    count = current_app.config["RELATED_ARTICLES_COUNT"]
+    min_score = current_app.config["RELATED_ARTICLES_MIN_SCORE"]
+    table = RelatedArticle.__table__
+    article_table = Article.__table__
+
+    ids, texts = get_user_articles(connection, user_id)
+
+    positions = { article_id: position for position, article_id in enumerate(ids) }
+    changed = sorted( positions[article_id] for article_id in changed_ids if article_id in positions )
+    removed_ids = [ article_id for article_id in changed_ids if article_id not in positions ]
+
+    stored_rows = connection.execute(db.select([table.c.article_id, table.c.related_id, table.c.score])
+                                       .select_from(table.join(article_table,
+                                                               article_table.c.id == table.c.article_id))
+                                       .where(article_table.c.user_id == user_id)).fetchall()
+
+    recomputed = set(changed) | { positions[article_id] for article_id in affected_ids if article_id in positions }
+
+    # the articles with fewer related articles than the maximum accept any article above the minimum score
+    stored_counts = np.zeros(len(ids), dtype = np.int64)
+    thresholds = np.full(len(ids), np.inf)
+
+    for row in stored_rows:
+
+        position = positions.get(row.article_id)
+
+        if position is None:
+
+            continue
+
+        stored_counts[position] += 1
+        thresholds[position] = min(thresholds[position], row.score)
+
+        if row.related_id in changed_ids:
+
+            recomputed.add(position)
+
+    thresholds[stored_counts < count] = min_score
+
+    matrix = get_tfidf_matrix(texts)
+
+    if changed:
+
+        scores = (matrix @ matrix[changed].T).toarray()
+        scores[changed, np.arange(len(changed))] = 0.
+
+        recomputed.update(np.flatnonzero((scores > thresholds[:, None]).any(axis = 1)).tolist())
+
+    recomputed = sorted(recomputed)
+
+    connection.execute(table.delete().where(table.c.article_id.in_([ ids[position] for position in recomputed ]
+                                                                     + removed_ids)))
+
+    if removed_ids:
+
+        connection.execute(table.delete().where(table.c.related_id.in_(removed_ids)))
+
+    rows = get_related_rows(matrix, ids, recomputed, count, min_score)
+
+    if rows:
+
+        connection.execute(table.insert(), rows)
+
+    return len(recomputed)
+
+# ===========================================================
+def drain_related_changes(batch_size = None, delay = None):
+    """
+        Function to compute again the related articles involving the queued changes of articles, for a batch of
+        Users (one transaction per User) whose oldest change has been queued for at least the delay
+
+        The changes of a User whose related articles cannot be computed are kept, to be handled by the next batch
+
+        :param batch_size: the maximum number of Users handled
+        :type batch_size: None | int
+
+        :param delay: the delay (in seconds) before the changes of a User are handled (RELATED_ARTICLES_DRAIN_DELAY
+                      if None)
+        :type delay: None | float
+
+        :return: the number of changes that have been handled
+        :rtype: int
+    """
+
+    batch_size = batch_size or current_app.config["RELATED_ARTICLES_BATCH_SIZE"]
+    delay = current_app.config["RELATED_ARTICLES_DRAIN_DELAY"] if delay is None else delay
+    table = RelatedChange.__table__
+
+    # the later changes of a User are handled along with the oldest one
+    with db.engine.connect() as connection:
+
+        user_ids = [ row.user_id for row in connection.execute(db.select([table.c.user_id])
+                                                                 .group_by(table.c.user_id)
+                                                                 .having(db.func.min(table.c.creation_date)
+                                                                         <= datetime.utcnow() - timedelta(seconds = delay))
+                                                                 .order_by(db.func.min(table.c.id))
+                                                                 .limit(batch_size)) ]
+
+    handled = 0
+
+    for user_id in user_ids:
+
+        try:
+
+            with db.engine.begin() as connection:
+
+                changes = connection.execute(db.select([table.c.id, table.c.article_id, table.c.affected])
+                                               .where(table.c.user_id == user_id)).fetchall()
+
+                update_related_articles(connection,
+                                        user_id,
+                                        { change.article_id for change in changes if not change.affected },
+                                        { change.article_id for change in changes if change.affected })
+
+                connection.execute(table.delete().where(table.c.id.in_([ change.id for change in changes ])))
+
+        except SQLAlchemyError as error:
+
+            # the changes are kept : they are handled again by the next batch
+            current_app.logger.error("Update of the related articles of user {} failed: {}".format(user_id, error))
+
+            continue
+
+        handled += len(changes)
+
+    return handled
+
+# ===========================================
+def rebuild_related_articles(user_id = None):
+    """
+        Function to compute again the related articles of all the articles of a User (with the current inverse
+        document frequencies)
+
+        :param user_id: the id of the User, all the Users if None
+        :type user_id: None | int
+
+        :return: the number of articles
+        :rtype: int
+    """
+
+    count = current_app.config["RELATED_ARTICLES_COUNT"]
+    min_score = current_app.config["RELATED_ARTICLES_MIN_SCORE"]
+    table = RelatedArticle.__table__
+    article_table = Article.__table__
+
+    if user_id is None:
+
+        user_ids = [ row[0] for row in db.session.query(Article.user_id).filter(Article.user_id.isnot(None)).distinct() ]
+
+    else:
+
+        user_ids = [user_id]
+
+    total = 0
+
+    for user_id in user_ids:
+
+        with db.engine.begin() as connection:
+
+            ids, texts = get_user_articles(connection, user_id)
+
+            connection.execute(table.delete().where(table.c.article_id.in_(db.select([article_table.c.id])
+                                                                              .where(article_table.c.user_id == user_id))))
+
+            rows = get_related_rows(get_tfidf_matrix(texts), ids, list(range(len(ids))), count, min_score)
+
+            if rows:
+
+                connection.execute(table.insert(), rows)
+
+        total += len(ids)
+
+    return total
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
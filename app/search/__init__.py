@@ -0,0 +1,1023 @@
+"""
+    Package to handle searching among articles for the application
+
+    The functions of this module delegate to the search backend of the application ("current_app.search_backend") :
+
+    - Elasticsearch, if ELASTICSEARCH_URL is defined
+    - SQLite FTS5, if the database is a SQLite one
+    - generic SQL ("LIKE"), otherwise
+
+    The backend can also be chosen through SEARCH_BACKEND ("elasticsearch", "sqlite" or "sql")
+
+    While Elasticsearch is not available (see "app.search.breaker"), the searches are made through the generic SQL
+    backend ("current_app.search_fallback_backend") and the changes are queued into the indexing outbox
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from flask import current_app, has_app_context
+from elasticsearch.exceptions import TransportError
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import json
+from time import monotonic
+
+from app import db
+from app.search.backend import get_child_columns, get_model, get_source_fields
+from app.search.breaker import CircuitBreaker, is_unavailability
+from app.search.cache import SearchCache
+from app.search.es import ElasticsearchBackend
+from app.search.query import matches_query, normalize_query, parse_query
+from app.search.semantic import SemanticIndex
+from app.search.spelling import SpellingCorrector
+from app.search.sql import SQLBackend, SQLiteFTSBackend
+from app.search.suggest import TitleSuggester
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+backends = {backend.name: backend for backend in [ElasticsearchBackend, SQLiteFTSBackend, SQLBackend]}
+
+# first sort value of the cursors of the results of the fallback backend
+FALLBACK_CURSOR = "fallback"
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# =========================
+class SearchResult(object):
+    """
+        Class that represents a search result built from the document of the index (i.e. without loading
+        the object from the database)
+    """
+
+    # ===========================
+    def __init__(self, **fields):
+        """
+            Class constructor
+
+            :param fields: the fields of the document
+            :type fields: dict
+        """
+
+        self.__dict__.update(fields)
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the id value
+            :rtype: str
+        """
+
+        return "<SearchResult {}>".format(self.id)
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ========================
+def create_backend(app):
+    """
+        Function to create the search backend of the application
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the search backend
+        :rtype: app.search.backend.SearchBackend
+    """
+
+    name = app.config["SEARCH_BACKEND"]
+
+    if not name:
+
+        if app.elasticsearch:
+
+            name = "elasticsearch"
+
+        elif app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+
+            name = "sqlite"
+
+        else:
+
+            name = "sql"
+
+    return backends[name]()
+
+# =================================
+def create_fallback_backend(app):
+    """
+        Function to create the search backend used while the search backend of the application is not available
+        (the generic SQL one, which does not need any index)
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the fallback search backend
+        :rtype: app.search.sql.SQLBackend
+    """
+
+    return SQLBackend()
+
+# ===============================
+def create_search_breaker(app):
+    """
+        Function to create the circuit breaker of the requests sent to Elasticsearch
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the circuit breaker
+        :rtype: app.search.breaker.CircuitBreaker
+    """
+
+    return CircuitBreaker(app.config["SEARCH_BREAKER_THRESHOLD"], app.config["SEARCH_BREAKER_RESET_TIMEOUT"])
+
+# =============================
+def create_search_cache(app):
+    """
+        Function to create the cache of the search results of the application
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the cache
+        :rtype: app.search.cache.SearchCache
+    """
+
+    return SearchCache(app.config["SEARCH_CACHE_SIZE"], app.config["SEARCH_CACHE_TTL"],
+                       app.config["SEARCH_RECENT_WRITES_TTL"])
+
+# ================================
+def create_search_suggester(app):
+    """
+        Function to create the in-process suggestions of titles of the application
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the suggester
+        :rtype: app.search.suggest.TitleSuggester
+    """
+
+    return TitleSuggester(app.config["SEARCH_SUGGEST_TTL"], app.config["SEARCH_SUGGEST_CACHE_SIZE"])
+
+# ===============================
+def create_search_spelling(app):
+    """
+        Function to create the in-process corrections of the misspelled searches of the application
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the corrector
+        :rtype: app.search.spelling.SpellingCorrector
+    """
+
+    return SpellingCorrector(app.config["SEARCH_SPELLING_MAX_DISTANCE"],
+                             app.config["SEARCH_SPELLING_TTL"],
+                             app.config["SEARCH_SPELLING_SIZE"])
+
+# ===============================
+def create_search_semantic(app):
+    """
+        Function to create the in-process semantic models of the application
+
+        :param app: the application instance
+        :type app: flask.app.Flask
+
+        :return: the semantic models
+        :rtype: app.search.semantic.SemanticIndex
+    """
+
+    return SemanticIndex(app.config["SEARCH_SEMANTIC_PATH"], app.config["SEARCH_SEMANTIC_MIN_SIMILARITY"])
+
+# ======================
+def get_payload(model):
+    """
+        Function to get the document (model fields values) to be indexed for a model
+
+        :param model: SQLAlchemy model
+        :type model: app.models
+
+        :return: the document
+        :rtype: dict
+    """
+
+    return get_payloads([model])[0]
+
+# ========================
+def get_payloads(models):
+    """
+        Function to get the documents to be indexed for several models of the same class (their children values
+        are loaded through a single query per field, see "get_children_payloads")
+
+        :param models: SQLAlchemy models
+        :type models: list(app.models)
+
+        :return: the documents
+        :rtype: list(dict)
+    """
+
+    if not models:
+
+        return []
+
+    children = get_children_payloads(type(models[0]), [ model.id for model in models ])
+
+    payloads = []
+
+    for model in models:
+
+        payload = {}
+
+        # the id is also stored, as the tiebreaker of the results sort
+        for field in get_source_fields(model):
+
+            payload[field] = getattr(model, field)
+
+        payload.update(children[model.id])
+        payloads.append(payload)
+
+    return payloads
+
+# =========================================
+def get_children_payloads(model, ids):
+    """
+        Function to get the fields of the documents holding the values of the children of searchable objects
+        (see "__search_children__"), e.g. to update only these fields once a child has been added or removed
+
+        :param model: the searchable model
+        :type model: class
+
+        :param ids: the ids of the objects
+        :type ids: list(int)
+
+        :return: the fields of the document of each object, by id
+        :rtype: dict
+    """
+
+    payloads = { id: { field: [] for field in model.__search_children__ } for id in ids }
+
+    if not ids:
+
+        return payloads
+
+    for field in model.__search_children__:
+
+        parent_column, column = get_child_columns(model, field)
+
+        rows = db.session.query(parent_column, column) \
+                         .filter(parent_column.in_(ids)) \
+                         .order_by(*column.class_.__table__.primary_key.columns)
+
+        for id, value in rows:
+
+            payloads[id][field].append(value)
+
+    return payloads
+
+# ======================
+def get_routing(model):
+    """
+        Function to get the routing value of the document of a model, i.e. the id of its owner (see
+        "__search_owner__"), so that the documents of an owner are stored together
+
+        :param model: SQLAlchemy model
+        :type model: app.models
+
+        :return: the routing value, None if the model has no owner
+        :rtype: None | str
+    """
+
+    if model.__search_owner__ is None or getattr(model, model.__search_owner__) is None:
+
+        return None
+
+    return str(getattr(model, model.__search_owner__))
+
+# =============================
+def add_to_index(index, model):
+    """
+        Function to add entries (model fields values) to an index
+
+        :param index: the index name
+        :type index: str
+
+        :param model: SQLAlchemy model
+        :type model: app.models
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    current_app.search_backend.index(index, model.id, get_payload(model))
+
+# ==================================
+def remove_from_index(index, model):
+    """
+        Function to remove entries (model fields values) from an index
+
+        :param index: the index name
+        :type index: str
+
+        :param model: SQLAlchemy model
+        :type model: app.models
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    current_app.search_backend.delete(index, model.id, get_routing(model))
+
+# ======================================
+def bulk_index(actions, refresh = None):
+    """
+        Function to send several indexing actions at once (through a single "_bulk" request for Elasticsearch)
+
+        :param actions: the actions, each one being a dict with the "operation" ("index", "update" or "delete"),
+                        "index", "id" and, for the "index" and "update" operations, "payload" keys (the "update"
+                        and "delete" operations can also have a "routing" key)
+        :type actions: list(dict)
+
+        :param refresh: the refresh policy (see "app.search.backend.SearchBackend.bulk"), SEARCH_REFRESH_POLICY
+                        if None
+        :type refresh: None | str
+
+        :return: the failed actions associated to their error
+        :rtype: list(tuple(dict, str))
+    """
+
+    refresh = refresh or current_app.config["SEARCH_REFRESH_POLICY"]
+    copies = []
+
+    # while an index is rebuilt, its changes are also sent to its new version (the partial updates create
+    # the documents which have not been copied yet)
+    if current_app.search_backend.external:
+
+        versions = get_rebuild_versions()
+
+        copies = [ dict(action, index = versions[action["index"]], upsert = True)
+                   for action in actions if action["index"] in versions ]
+
+    # the new versions are not refreshed until they are used, so their copies cannot wait for a refresh
+    if copies and refresh != "false":
+
+        return current_app.search_backend.bulk(actions, refresh) + current_app.search_backend.bulk(copies)
+
+    return current_app.search_backend.bulk(actions + copies, refresh)
+
+# ================================
+def set_refresh_policy(policy):
+    """
+        Function to set the refresh policy of the changes committed through the current session (e.g. "wait_for"
+        for the interactive requests, whose author expects to find the changes at once), instead of
+        SEARCH_REFRESH_POLICY
+
+        :param policy: the refresh policy (see "app.search.backend.SearchBackend.bulk")
+        :type policy: str
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    db.session.info["search_refresh_policy"] = policy
+
+# ==================================
+def record_recent_writes(actions):
+    """
+        Function to keep the documents sent without waiting for a refresh of the index, by owner (see
+        "app.search.cache.SearchCache.add_recent_writes"), so that their owner finds them at once (see
+        "overlay_recent_writes")
+
+        :param actions: the sent actions (see "bulk_index")
+        :type actions: list(dict)
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    writes = {}
+
+    for action in actions:
+
+        if action["operation"] == "index":
+
+            model = get_model(action["index"])
+            owner = action["payload"].get(model.__search_owner__) if model and model.__search_owner__ else None
+
+        else:
+
+            owner = action.get("routing")
+
+        if owner is not None:
+
+            document = None if action["operation"] == "delete" else action["payload"]
+
+            writes.setdefault((action["index"], str(owner)), {})[action["id"]] = document
+
+    for (index, owner), documents in writes.items():
+
+        current_app.search_cache.add_recent_writes(index, owner, documents)
+
+# ==========================================================================
+def overlay_recent_writes(index, query, result, user_id, first_page):
+    """
+        Function to overlay the documents recently written by a User (see "record_recent_writes") on the results
+        of the search of this User, as the index may not have been refreshed since then : the deleted documents
+        are removed, the modified ones are replaced (or removed if they do not match the query anymore) and,
+        if the first page holds all the results, the new ones matching the query are added first (otherwise they
+        could also be found on the next pages, once the index is refreshed)
+
+        The documents are matched in-process (see "app.search.query.matches_query"), as an approximation, for the
+        few seconds they are kept (SEARCH_RECENT_WRITES_TTL)
+
+        :param index: the index name
+        :type index: str
+
+        :param query: the searched text
+        :type query: str
+
+        :param result: the documents of the page results, the total number of results and the cursor of the next
+                       page (see "query_index")
+        :type result: tuple(list(dict), int, None | str)
+
+        :param user_id: the id of the User who searches
+        :type user_id: None | int
+
+        :param first_page: True if the result is the first page
+        :type first_page: bool
+
+        :return: the result including the recent writes
+        :rtype: tuple(list(dict), int, None | str)
+    """
+
+    model = get_model(index)
+
+    if user_id is None or model is None:
+
+        return result
+
+    writes = current_app.search_cache.get_recent_writes(index, str(user_id))
+
+    if not writes:
+
+        return result
+
+    documents, total, cursor = result
+    alternatives = parse_query(query, model)
+    fields = set(get_source_fields(model))
+
+    overlaid_documents = []
+
+    for document in documents:
+
+        if document["id"] in writes:
+
+            if writes[document["id"]] is None:
+
+                total -= 1
+
+                continue
+
+            document = dict(document, **writes[document["id"]])
+
+            # a document without its highlighted fields cannot be matched
+            if fields <= set(document) and not matches_query(alternatives, document, model):
+
+                total -= 1
+
+                continue
+
+        overlaid_documents.append(document)
+
+    if first_page and len(documents) >= total:
+
+        found_ids = { document["id"] for document in documents }
+
+        new_documents = [ document for id, document in sorted(writes.items(), reverse = True)
+                          if id not in found_ids and document is not None and fields <= set(document)
+                          and matches_query(alternatives, document, model) ]
+
+        overlaid_documents = new_documents + overlaid_documents
+        total += len(new_documents)
+
+    return (overlaid_documents, max(total, len(overlaid_documents)), cursor)
+
+# ===========================
+def get_rebuild_versions(connection = None):
+    """
+        Function to get the new versions of the indexes being rebuilt (see "app.indexing.rebuild_index")
+
+        They are read from the database at most every SEARCH_REBUILD_CHECK_INTERVAL seconds (by each process)
+
+        :param connection: the connection of the current transaction (e.g. during a flush), a new one if None
+        :type connection: None | sqlalchemy.engine.Connection
+
+        :return: the versions, by index name
+        :rtype: dict
+    """
+
+    rebuilds = current_app.search_rebuilds
+
+    if monotonic() >= rebuilds["expiration"]:
+
+        from app.models import SearchRebuild
+
+        query = db.select([SearchRebuild.index, SearchRebuild.version])
+
+        if connection is not None:
+
+            rebuilds["versions"] = dict(connection.execute(query).fetchall())
+
+        else:
+
+            # the session may not be usable (e.g. once a transaction has been committed)
+            with db.engine.connect() as connection:
+
+                rebuilds["versions"] = dict(connection.execute(query).fetchall())
+
+        rebuilds["expiration"] = monotonic() + current_app.config["SEARCH_REBUILD_CHECK_INTERVAL"]
+
+    return rebuilds["versions"]
+
+# ==========================================================================
+def query_index(index, query, page, per_page, user_id = None, cursor = None):
+    """
+        Function to query an index
+
+        The pages can be reached either by their number or, for the next pages, through the opaque cursor
+        returned with the previous page (the cost of a page reached through a cursor does not depend on its depth)
+
+        The results are cached (see "current_app.search_cache") : the same query for the same page and User is
+        served from the cache until a searchable object is committed or the entry expires
+
+        If the search backend is not available, the index is queried through the fallback backend (these
+        degraded results are not cached)
+
+        :param index: the index name
+        :type index: str
+
+        :param query: the searched text (see "app.search.query" for its syntax)
+        :type query: str
+
+        :param page: page number of the ElasticSearch result query (ignored if "cursor" is given)
+        :type page: int
+
+        :param per_page: number of results per page of the ElasticSearch result query
+        :type per_page: int
+
+        :param user_id: the id of the User who searches (only the objects of this User are searched)
+        :type user_id: None | int
+
+        :param cursor: the cursor returned with the previous page
+        :type cursor: None | str
+
+        :return: the documents of the page results, the total number of results and the cursor of the next page
+        :rtype: tuple(list(dict), int, None | str)
+
+        :raise ValueError: if the cursor is invalid
+
+        Examples:
+
+        Looking for words 'one two three four five' in the 'posts' index.
+        First  displaying results for page 1 with 3 items per page.
+        Second displaying results for page 2 with 3 items per page (through the cursor of page 1).
+
+        >>> query_index('posts', 'one two three four five', 1, 3)
+        ([{'id': 15, 'title': 'one', ...}, {'id': 13, ...}, {'id': 12, ...}], 7, 'WzEuMiwgMTJd')
+
+        >>> query_index('posts', 'one two three four five', 2, 3, cursor = 'WzEuMiwgMTJd')
+        ([{'id': 4, 'title': 'two', ...}, {'id': 11, ...}, {'id': 8, ...}], 7, 'WzAuOSwgOF0=')
+    """
+
+    after, fallback_after = get_cursor_values(cursor)
+
+    cache = current_app.search_cache
+    key = (index, normalize_query(query), cursor or page, per_page, user_id)
+
+    result = cache.get(key)
+
+    if result is None:
+
+        generation = cache.generation
+
+        try:
+
+            documents, total, last = current_app.search_backend.query(index, query, page, per_page, after, user_id)
+
+        except TransportError as error:
+
+            if not is_unavailability(error):
+
+                raise
+
+            current_app.logger.warning("Search of {} through the fallback backend: {}".format(index, error))
+
+            documents, total, last = current_app.search_fallback_backend.query(index, query, page, per_page,
+                                                                               fallback_after, user_id)
+
+            return (documents, total, encode_cursor([FALLBACK_CURSOR] + last) if last else None)
+
+        result = (documents, total, encode_cursor(last) if last else None)
+
+        cache.set(key, result, generation)
+
+    return overlay_recent_writes(index, query, result, user_id, cursor is None and page == 1)
+
+# ======================================================
+def multi_query_index(index, queries, user_id = None):
+    """
+        Function to query an index with several queries at once (through a single "_msearch" request for
+        Elasticsearch) : each query is handled as by "query_index", but the ones which are not cached are sent
+        together
+
+        :param index: the index name
+        :type index: str
+
+        :param queries: the queries, each one being a tuple with the searched text, the page number, the number of
+                        results per page and the cursor returned with the previous page (see "query_index")
+        :type queries: list(tuple(str, int, int, None | str))
+
+        :param user_id: the id of the User who searches (only the objects of this User are searched)
+        :type user_id: None | int
+
+        :return: the results of each query (see "query_index")
+        :rtype: list(tuple(list(dict), int, None | str))
+
+        :raise ValueError: if a cursor is invalid
+    """
+
+    cursors = [ get_cursor_values(cursor) for query, page, per_page, cursor in queries ]
+
+    cache = current_app.search_cache
+    keys = [ (index, normalize_query(query), cursor or page, per_page, user_id)
+             for query, page, per_page, cursor in queries ]
+
+    results = [ cache.get(key) for key in keys ]
+    missing = [ position for position, result in enumerate(results) if result is None ]
+
+    if not missing:
+
+        return get_overlaid_results(index, queries, results, user_id)
+
+    generation = cache.generation
+
+    try:
+
+        searches = current_app.search_backend.multi_query(index,
+                                                          [ queries[position][:3] + (cursors[position][0],)
+                                                            for position in missing ],
+                                                          user_id)
+
+    except TransportError as error:
+
+        if not is_unavailability(error):
+
+            raise
+
+        current_app.logger.warning("Search of {} through the fallback backend: {}".format(index, error))
+
+        searches = current_app.search_fallback_backend.multi_query(index,
+                                                                   [ queries[position][:3] + (cursors[position][1],)
+                                                                     for position in missing ],
+                                                                   user_id)
+
+        for position, (documents, total, last) in zip(missing, searches):
+
+            results[position] = (documents, total, encode_cursor([FALLBACK_CURSOR] + last) if last else None)
+
+        return results
+
+    for position, (documents, total, last) in zip(missing, searches):
+
+        results[position] = (documents, total, encode_cursor(last) if last else None)
+
+        cache.set(keys[position], results[position], generation)
+
+    return get_overlaid_results(index, queries, results, user_id)
+
+# ===============================================================
+def get_overlaid_results(index, queries, results, user_id):
+    """
+        Function to overlay the documents recently written by a User on the results of several queries (see
+        "overlay_recent_writes")
+
+        :param index: the index name
+        :type index: str
+
+        :param queries: the queries (see "multi_query_index")
+        :type queries: list(tuple(str, int, int, None | str))
+
+        :param results: the results of each query
+        :type results: list(tuple(list(dict), int, None | str))
+
+        :param user_id: the id of the User who searches
+        :type user_id: None | int
+
+        :return: the results including the recent writes
+        :rtype: list(tuple(list(dict), int, None | str))
+    """
+
+    return [ overlay_recent_writes(index, query, result, user_id, cursor is None and page == 1)
+             for (query, page, per_page, cursor), result in zip(queries, results) ]
+
+# ==========================================================================
+def semantic_query_index(index, query, page, per_page, user_id = None):
+    """
+        Function to query an index both by keywords and semantically (see "app.search.semantic") : the first
+        SEARCH_SEMANTIC_CANDIDATES results of each search are ranked together by their blended score (the semantic
+        similarity weighing SEARCH_SEMANTIC_WEIGHT, the keyword score relative to the best one weighing the rest)
+
+        The pages are only reached by their number, and the documents only found semantically only hold their id
+
+        :param index: the index name
+        :type index: str
+
+        :param query: the searched text (see "app.search.query" for its syntax)
+        :type query: str
+
+        :param page: page number of the results
+        :type page: int
+
+        :param per_page: number of results per page
+        :type per_page: int
+
+        :param user_id: the id of the User who searches (only the objects of this User are searched)
+        :type user_id: None | int
+
+        :return: the documents of the page results, the total number of results and no cursor (see "query_index",
+                 to which the search falls back if the semantic model of the index has not been built)
+        :rtype: tuple(list(dict), int, None | str)
+    """
+
+    candidates = current_app.config["SEARCH_SEMANTIC_CANDIDATES"]
+    weight = current_app.config["SEARCH_SEMANTIC_WEIGHT"]
+
+    similarities = current_app.search_semantic.search(index, query, candidates, user_id)
+
+    if similarities is None:
+
+        return query_index(index, query, page, per_page, user_id)
+
+    documents = { document["id"]: document for document in query_index(index, query, 1, candidates, user_id)[0] }
+    keyword_scores = get_keyword_scores(list(documents.values()))
+
+    # the model may hold objects which have been removed or given to another User since it has been built : the
+    # objects only found semantically are checked against the database, so that the pages and the total are right
+    model = get_model(index)
+    semantic_ids = [ object_id for object_id, similarity in similarities if object_id not in documents ]
+
+    if semantic_ids:
+
+        existing_ids = db.session.query(model.id).filter(model.id.in_(semantic_ids))
+
+        if user_id is not None and model.__search_owner__:
+
+            existing_ids = existing_ids.filter(getattr(model, model.__search_owner__) == user_id)
+
+        existing_ids = { row[0] for row in existing_ids }
+
+        similarities = [ (object_id, similarity) for object_id, similarity in similarities
+                         if object_id in documents or object_id in existing_ids ]
+
+    similarities = dict(similarities)
+    similarities.update(current_app.search_semantic.get_similarities(index,
+                                                                     query,
+                                                                     [ object_id for object_id in documents
+                                                                       if object_id not in similarities ]))
+
+    ranking = sorted( (-((1. - weight) * keyword_scores.get(object_id, 0.) + weight * similarity), object_id)
+                      for object_id, similarity in similarities.items() )
+
+    return ([ documents.get(object_id, {"id": object_id})
+              for score, object_id in ranking[(page - 1) * per_page:page * per_page] ],
+            len(ranking),
+            None)
+
+# ==================================
+def get_keyword_scores(documents):
+    """
+        Function to get the keyword scores of the results of a search, relative to the best one : the scores of
+        the search backend if it returns them (see "app.search.es.get_search_results"), their ranks otherwise
+
+        :param documents: the documents of the results, the best first
+        :type documents: list(dict)
+
+        :return: the score (between 0 and 1) of each document, by id
+        :rtype: dict
+    """
+
+    scores = [ document.get("score") for document in documents ]
+
+    if documents and None not in scores and max(scores) > 0:
+
+        return { document["id"]: score / max(scores) for document, score in zip(documents, scores) }
+
+    return { document["id"]: 1. - position / len(documents) for position, document in enumerate(documents) }
+
+# ===========================
+def encode_cursor(values):
+    """
+        Function to build the opaque cursor of a page from the sort values of the last result of the previous page
+
+        :param values: the sort values
+        :type values: list
+
+        :return: the cursor
+        :rtype: str
+    """
+
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+# ===========================
+def decode_cursor(cursor):
+    """
+        Function to get the sort values from the opaque cursor of a page
+
+        :param cursor: the cursor
+        :type cursor: str
+
+        :return: the sort values
+        :rtype: list
+
+        :raise ValueError: if the cursor is invalid
+    """
+
+    try:
+
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+
+    except ValueError:
+
+        raise ValueError("Invalid search cursor: {}".format(cursor))
+
+    if not isinstance(values, list) or not values:
+
+        raise ValueError("Invalid search cursor: {}".format(cursor))
+
+    return values
+
+# ===============================
+def get_cursor_values(cursor):
+    """
+        Function to get the sort values of a cursor, for the search backend and for the fallback backend (the
+        cursors of a backend are meaningless for the other one, whose page is then reached by its number)
+
+        :param cursor: the cursor
+        :type cursor: None | str
+
+        :return: the sort values for the search backend and for the fallback backend
+        :rtype: tuple(None | list, None | list)
+
+        :raise ValueError: if the cursor is invalid
+    """
+
+    if not cursor:
+
+        return (None, None)
+
+    values = decode_cursor(cursor)
+
+    if values[0] == FALLBACK_CURSOR:
+
+        return (None, values[1:] or None)
+
+    return (values, None)
+
+# =================================================
+def suggest(index, prefix, size, user_id = None):
+    """
+        Function to suggest the titles starting with a prefix (from the start of any of their words)
+
+        :param index: the index name
+        :type index: str
+
+        :param prefix: the typed text
+        :type prefix: str
+
+        :param size: the maximum number of suggestions
+        :type size: int
+
+        :param user_id: the id of the User whose titles are suggested
+        :type user_id: None | int
+
+        :return: the suggestions, each one being a dict with the "id" and "title" keys
+        :rtype: list(dict)
+    """
+
+    if not prefix.strip():
+
+        return []
+
+    try:
+
+        return current_app.search_backend.suggest(index, prefix, size, user_id)
+
+    except TransportError as error:
+
+        if not is_unavailability(error):
+
+            raise
+
+        return current_app.search_fallback_backend.suggest(index, prefix, size, user_id)
+
+# ===============================================
+def correct_query(index, query, user_id = None):
+    """
+        Function to correct the misspelled words of a search query ("did you mean"), from the words of the
+        objects of the User who searches (see "app.search.spelling")
+
+        :param index: the index name
+        :type index: str
+
+        :param query: the searched text
+        :type query: str
+
+        :param user_id: the id of the User who searches
+        :type user_id: None | int
+
+        :return: the corrected query, None if there is no correction
+        :rtype: None | str
+    """
+
+    model = get_model(index)
+
+    if model is None:
+
+        return None
+
+    return current_app.search_spelling.correct(model, query, user_id)
+
+# =============================
+def invalidate_search_cache():
+    """
+        Function to invalidate the cached search results (e.g. once searchable objects have been committed)
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    current_app.search_cache.invalidate()
+
+# ===================================================
+def create_search_index(target, connection, **kwargs):
+    """
+        Function called once the table of a searchable model has been created into the database
+
+        :param target: the table
+        :type target: sqlalchemy.Table
+
+        :param connection: the connection used to create the table
+        :type connection: sqlalchemy.engine.Connection
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    if has_app_context():
+
+        current_app.search_backend.create_index(target, connection)
+
+# =================================================
+def drop_search_index(target, connection, **kwargs):
+    """
+        Function called before the table of a searchable model is dropped from the database
+
+        :param target: the table
+        :type target: sqlalchemy.Table
+
+        :param connection: the connection used to drop the table
+        :type connection: sqlalchemy.engine.Connection
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    if has_app_context():
+
+        current_app.search_backend.drop_index(target, connection)
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,444 @@
+"""
+    Module to define the interface of the search backends
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import re
+
+from flask import current_app
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# parameters of the hash of the id and the update date of each object, summed by the consistency checks : two
+# squarings modulo a prime, so that the differences of several objects (e.g. swapped update dates) do not cancel
+# each other out, while every product fits into a signed 64 bits integer (for the database and for the index)
+CHECKSUM_MODULUS = 2147483647
+CHECKSUM_MULTIPLIERS = (1103515245, 69069)
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==========================
+class SearchBackend(object):
+    """
+        Class that represents a search backend, i.e. the place where the searchable models are indexed and queried
+
+        The "external" backends (e.g. Elasticsearch) hold their own copy of the documents, which has to be sent
+        by the application, whereas the other ones are maintained by the database itself
+    """
+
+    name = None
+    external = False
+
+    # ===================================
+    def index(self, index, id, payload):
+        """
+            Method to add (or replace) a document into an index
+
+            :param index: the index name
+            :type index: str
+
+            :param id: the document id
+            :type id: int
+
+            :param payload: the document
+            :type payload: dict
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        return None
+
+    # ==========================================
+    def delete(self, index, id, routing = None):
+        """
+            Method to remove a document from an index
+
+            :param index: the index name
+            :type index: str
+
+            :param id: the document id
+            :type id: int
+
+            :param routing: the routing value of the document (i.e. the id of its owner)
+            :type routing: None | str
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        return None
+
+    # =========================================
+    def bulk(self, actions, refresh = "false"):
+        """
+            Method to execute several indexing actions at once
+
+            :param actions: the actions, each one being a dict with the "operation" ("index", "update" or "delete"),
+                            "index", "id" and, for the "index" and "update" operations, "payload" keys (the "update"
+                            and "delete" operations can also have a "routing" key)
+            :type actions: list(dict)
+
+            :param refresh: the refresh policy of the index : "false" (the documents become searchable at the next
+                            periodic refresh), "wait_for" (the method returns once they are searchable) or "true"
+                            (the index is refreshed at once, which is costly)
+            :type refresh: str
+
+            :return: the failed actions associated to their error
+            :rtype: list(tuple(dict, str))
+        """
+
+        return []
+
+    # ==============================================================================
+    def query(self, index, query, page, per_page, after = None, user_id = None):
+        """
+            Method to query an index
+
+            The results are sorted by relevance, then by id (as a tiebreaker), so that the sort values of the last
+            result of a page ("search_after") give the position of the next page
+
+            :param index: the index name
+            :type index: str
+
+            :param query: the searched text
+            :type query: str
+
+            :param page: page number of the query results (ignored if "after" is given)
+            :type page: int
+
+            :param per_page: number of results per page
+            :type per_page: int
+
+            :param after: the sort values of the last result of the previous page
+            :type after: None | list
+
+            :param user_id: the id of the User whose objects are searched (all the objects if None)
+            :type user_id: None | int
+
+            :return: the documents of the page results (with at least their "id"), the total number of results
+                     and the sort values of the last result of the page (None if there is no result)
+            :rtype: tuple(list(dict), int, None | list)
+        """
+
+        raise NotImplementedError
+
+    # ===================================================
+    def multi_query(self, index, queries, user_id = None):
+        """
+            Method to query an index with several queries at once (they are run one after the other by default)
+
+            :param index: the index name
+            :type index: str
+
+            :param queries: the queries, each one being a tuple with the searched text, the page number,
+                            the number of results per page and the sort values of the last result of the previous
+                            page (see the "query" method)
+            :type queries: list(tuple(str, int, int, None | list))
+
+            :param user_id: the id of the User whose objects are searched (all the objects if None)
+            :type user_id: None | int
+
+            :return: the results of each query (see the "query" method)
+            :rtype: list(tuple(list(dict), int, None | list))
+        """
+
+        return [ self.query(index, query, page, per_page, after, user_id) for query, page, per_page, after in queries ]
+
+    # ===========================================================
+    def suggest(self, index, prefix, size, user_id = None):
+        """
+            Method to suggest the values of the "__search_suggest__" field of a model starting with a prefix
+            (from the start of any of their words) : the suggestions are computed in-process
+            ("current_app.search_suggester")
+
+            :param index: the index name
+            :type index: str
+
+            :param prefix: the typed text
+            :type prefix: str
+
+            :param size: the maximum number of suggestions
+            :type size: int
+
+            :param user_id: the id of the User whose objects are suggested (all the objects if None)
+            :type user_id: None | int
+
+            :return: the suggestions, each one being a dict with the "id" and "title" keys
+            :rtype: list(dict)
+        """
+
+        model = get_model(index)
+
+        if model is None or not model.__search_suggest__:
+
+            return []
+
+        return current_app.search_suggester.suggest(model, prefix, size, user_id)
+
+    # ==========================================
+    def create_index(self, table, connection):
+        """
+            Method called once the table of a searchable model has been created into the database
+
+            :param table: the table
+            :type table: sqlalchemy.Table
+
+            :param connection: the connection used to create the table
+            :type connection: sqlalchemy.engine.Connection
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        return None
+
+    # ========================================
+    def drop_index(self, table, connection):
+        """
+            Method called before the table of a searchable model is dropped from the database
+
+            :param table: the table
+            :type table: sqlalchemy.Table
+
+            :param connection: the connection used to drop the table
+            :type connection: sqlalchemy.engine.Connection
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        return None
+
+    # ===========================================
+    def init_index(self, model, recreate = False):
+        """
+            Method to create explicitly the index of a model (with its settings and its mappings)
+
+            :param model: the searchable model
+            :type model: class
+
+            :param recreate: True to delete the existing index first
+            :type recreate: bool
+
+            :return: True if the index has been created
+            :rtype: bool
+        """
+
+        return False
+
+    # ============================================================
+    def get_checksums(self, index, min_id, max_id, bucket_size):
+        """
+            Method to get the checksums of the documents of an index, by buckets of ids : the ids of a bucket are
+            between a multiple of the bucket size (its key) and the next one
+
+            :param index: the index name
+            :type index: str
+
+            :param min_id: the first id of the checked documents
+            :type min_id: int
+
+            :param max_id: the last id of the checked documents
+            :type max_id: int
+
+            :param bucket_size: the number of ids of a bucket
+            :type bucket_size: int
+
+            :return: the number of documents and the sum of the hashes of their ids and update dates (see
+                     "get_checksum_hash"), by bucket key (only for the buckets holding documents)
+            :rtype: dict
+        """
+
+        raise NotImplementedError
+
+    # ===========================================================
+    def get_update_dates(self, index, min_id, max_id, size):
+        """
+            Method to get the update dates of the documents of an index between two ids
+
+            :param index: the index name
+            :type index: str
+
+            :param min_id: the first id of the documents
+            :type min_id: int
+
+            :param max_id: the last id of the documents
+            :type max_id: int
+
+            :param size: the number of documents between the two ids
+            :type size: int
+
+            :return: the id, the update date (as a timestamp in seconds) and the routing value of the documents
+            :rtype: list(tuple(int, int, None | str))
+        """
+
+        raise NotImplementedError
+
+    # =======================
+    def rebuild(self, model):
+        """
+            Method to rebuild the index of a model maintained by the database
+
+            :param model: the searchable model
+            :type model: class
+
+            :return: the number of indexed documents
+            :rtype: int
+        """
+
+        raise NotImplementedError
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ===================
+def get_model(index):
+    """
+        Function to get the searchable model associated to an index
+
+        :param index: the index name
+        :type index: str
+
+        :return: the model, None if there is no such model
+        :rtype: None | class
+    """
+
+    from app.models import SearchableMixin
+
+    model = SearchableMixin.get_searchable_model(index)
+
+    # a versioned index (e.g. "article_v2") belongs to the model of its alias
+    version = re.match(r"^(.+)_v\d+$", index)
+
+    if model is None and version:
+
+        model = SearchableMixin.get_searchable_model(version.group(1))
+
+    return model
+
+# ===========================
+def get_source_fields(model):
+    """
+        Function to get the fields of the documents of a searchable model : its id, its searchable fields and
+        the fields only stored to display the search results (e.g. the update date)
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the fields names
+        :rtype: list(str)
+    """
+
+    return ["id"] + model.__searchable__ + model.__search_stored__
+
+# ===========================
+def get_result_fields(model):
+    """
+        Function to get the fields of the documents of a searchable model returned with the search results : its
+        source fields, except the highlighted ones (see "__search_highlight__")
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the fields names
+        :rtype: list(str)
+    """
+
+    return [ field for field in get_source_fields(model) if field not in model.__search_highlight__ ]
+
+# ===========================
+def get_search_fields(model):
+    """
+        Function to get the searched fields of the documents of a searchable model : its searchable fields and
+        the fields holding the values of its children (see "__search_children__")
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the fields names
+        :rtype: list(str)
+    """
+
+    return model.__searchable__ + list(model.__search_children__)
+
+# =====================================
+def get_child_columns(model, field):
+    """
+        Function to get the columns of the children values of a field of the documents of a searchable model
+        (see "__search_children__")
+
+        :param model: the searchable model
+        :type model: class
+
+        :param field: the field name
+        :type field: str
+
+        :return: the column of the children holding the id of their parent and the column of their values
+        :rtype: tuple(sqlalchemy.Column, sqlalchemy.orm.attributes.InstrumentedAttribute)
+    """
+
+    relationship, attribute = model.__search_children__[field]
+    relationship = getattr(model, relationship).property
+
+    return relationship.local_remote_pairs[0][1], getattr(relationship.mapper.class_, attribute)
+
+# ===============================================
+def get_checksum_hash(object_id, timestamp):
+    """
+        Function to get the hash of the id and the update date of an object, summed by the consistency checks (the
+        database and the search backends compute the same one)
+
+        :param object_id: the object id
+        :type object_id: int
+
+        :param timestamp: the timestamp (in seconds) of the update date (0 if there is none)
+        :type timestamp: int
+
+        :return: the hash (lower than CHECKSUM_MODULUS)
+        :rtype: int
+    """
+
+    value = (object_id * CHECKSUM_MULTIPLIERS[0] + timestamp) % CHECKSUM_MODULUS
+    value = (value * value % CHECKSUM_MODULUS * CHECKSUM_MULTIPLIERS[1] + object_id) % CHECKSUM_MODULUS
+
+    return value * value % CHECKSUM_MODULUS
+
+# ====================
+def get_terms(query):
+    """
+        Function to split a searched text into lowercase terms (the punctuation is ignored)
+
+        :param query: the searched text
+        :type query: str
+
+        :return: the terms
+        :rtype: list(str)
+    """
+
+    return re.findall(r"[^\W_]+", query.lower())
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
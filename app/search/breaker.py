@@ -0,0 +1,195 @@
+"""
+    Module to handle the circuit breaker which protects the application from an unavailable Elasticsearch
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from elasticsearch.exceptions import ConnectionError, TransportError
+
+from threading import Lock
+from time import monotonic
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ===================================
+class CircuitOpenError(ConnectionError):
+    """
+        Class that represents the error raised instead of sending a request while the circuit breaker is open
+        (it is handled as an Elasticsearch connection error)
+    """
+
+    pass
+
+# ===========================
+class CircuitBreaker(object):
+    """
+        Class that represents a circuit breaker :
+
+        - "closed": the requests are sent, the consecutive failures are counted
+        - "open": after "failure_threshold" consecutive failures, the requests are not sent anymore during
+          "reset_timeout" seconds
+        - "half_open": then a single request is sent to check the availability, its success closes the breaker
+          and its failure opens it again
+    """
+
+    # ================================================
+    def __init__(self, failure_threshold, reset_timeout):
+        """
+            Class constructor
+
+            :param failure_threshold: the number of consecutive failures which opens the breaker
+            :type failure_threshold: int
+
+            :param reset_timeout: the time (in seconds) before a request is sent again once the breaker is open
+            :type reset_timeout: float
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opening_time = None
+        self.trial_pending = False
+        self.openings = 0
+        self.rejected_requests = 0
+
+    # ==============
+    def allow(self):
+        """
+            Method to know if a request can be sent
+
+            :return: True if the request can be sent
+            :rtype: bool
+        """
+
+        with self.lock:
+
+            if self.state == "open" and monotonic() - self.opening_time >= self.reset_timeout:
+
+                self.state = "half_open"
+                self.trial_pending = False
+
+            if self.state == "closed" or (self.state == "half_open" and not self.trial_pending):
+
+                self.trial_pending = self.state == "half_open"
+
+                return True
+
+            self.rejected_requests += 1
+
+            return False
+
+    # =======================
+    def record_success(self):
+        """
+            Method to record the success of a request
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        with self.lock:
+
+            self.state = "closed"
+            self.failures = 0
+            self.trial_pending = False
+
+    # =======================
+    def record_failure(self):
+        """
+            Method to record the failure of a request
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        with self.lock:
+
+            self.failures += 1
+            self.trial_pending = False
+
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+
+                self.state = "open"
+                self.opening_time = monotonic()
+                self.openings += 1
+
+    # =====================
+    def release_trial(self):
+        """
+            Method to release the trial request of the half open breaker once it is over, whatever its outcome (a
+            request which has neither succeeded nor failed, e.g. interrupted by an unexpected error, would otherwise
+            keep the breaker from sending any other trial request)
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        with self.lock:
+
+            self.trial_pending = False
+
+    # ====================
+    def get_metrics(self):
+        """
+            Method to get the metrics of the breaker
+
+            :return: the state, the number of consecutive failures, of openings and of rejected requests
+            :rtype: dict
+        """
+
+        with self.lock:
+
+            return {"breaker_state": self.state,
+                    "breaker_failures": self.failures,
+                    "breaker_openings": self.openings,
+                    "breaker_rejected_requests": self.rejected_requests}
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ===========================
+def is_unavailability(error):
+    """
+        Function to know if an Elasticsearch error means that it is unavailable (i.e. unreachable, too slow to
+        answer or overloaded), rather than that the request is wrong
+
+        :param error: the error
+        :type error: Exception
+
+        :return: True if the error is an unavailability
+        :rtype: bool
+    """
+
+    if isinstance(error, ConnectionError):
+
+        return True
+
+    return isinstance(error, TransportError) and isinstance(error.status_code, int) and \
+           (error.status_code == 429 or error.status_code >= 500)
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
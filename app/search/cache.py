@@ -0,0 +1,249 @@
+"""
+    Module to handle the cache of the search results
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ========================
+class SearchCache(object):
+    """
+        Class that represents a LRU cache of search results, whose entries expire after a given time
+
+        The cache is invalidated by incrementing its generation (e.g. once searchable objects have been committed) :
+        the entries of the previous generations are then ignored. A result computed while the generation changed
+        is not stored, so that a result older than the invalidation is never served
+
+        The cache also keeps the documents recently written by each owner, which may not be searchable yet
+        (i.e. until the index is refreshed), so that they can be overlaid on the results of their owner
+    """
+
+    # ===========================================================
+    def __init__(self, max_size, ttl, recent_writes_ttl = 0.):
+        """
+            Class constructor
+
+            :param max_size: the maximum number of entries (the cache is disabled if 0)
+            :type max_size: int
+
+            :param ttl: the lifetime of the entries (in seconds)
+            :type ttl: float
+
+            :param recent_writes_ttl: the time (in seconds) during which the written documents are kept (they are
+                                      not kept if 0)
+            :type recent_writes_ttl: float
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.recent_writes_ttl = recent_writes_ttl
+        self.recent_writes = {}
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ==================
+    def get(self, key):
+        """
+            Method to get a cached value
+
+            :param key: the key of the value
+            :type key: tuple
+
+            :return: the value, None if it is not cached (or expired)
+            :rtype: None | object
+        """
+
+        with self.lock:
+
+            entry = self.entries.get(key)
+
+            if entry is None or entry[1] != self.generation or entry[2] < monotonic():
+
+                if entry is not None:
+
+                    del self.entries[key]
+
+                self.misses += 1
+
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[0]
+
+    # ======================================
+    def set(self, key, value, generation):
+        """
+            Method to cache a value
+
+            :param key: the key of the value
+            :type key: tuple
+
+            :param value: the value
+            :type value: object
+
+            :param generation: the cache generation when the value computation started
+            :type generation: int
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        if not self.max_size:
+
+            return None
+
+        with self.lock:
+
+            if generation != self.generation:
+
+                return None
+
+            self.entries[key] = (value, generation, monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+
+                self.entries.popitem(last = False)
+
+    # ===================
+    def invalidate(self):
+        """
+            Method to invalidate all the cached values
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        with self.lock:
+
+            self.generation += 1
+            self.entries.clear()
+
+    # ================================================
+    def add_recent_writes(self, index, owner, writes):
+        """
+            Method to keep the documents written by an owner
+
+            :param index: the index name
+            :type index: str
+
+            :param owner: the routing value of the documents (i.e. the id of their owner)
+            :type owner: str
+
+            :param writes: the documents (None for a deleted one, the changed fields only for an updated one),
+                           by id
+            :type writes: dict
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        if not self.recent_writes_ttl:
+
+            return None
+
+        expiration = monotonic() + self.recent_writes_ttl
+
+        with self.lock:
+
+            documents = self.recent_writes.setdefault((index, owner), {})
+
+            for id, document in writes.items():
+
+                previous_document = documents.get(id, (None,))[0]
+
+                # the fields of an update complete the previously written document
+                if document is not None and previous_document is not None:
+
+                    document = dict(previous_document, **document)
+
+                documents[id] = (document, expiration)
+
+    # ========================================
+    def get_recent_writes(self, index, owner):
+        """
+            Method to get the documents recently written by an owner (see "add_recent_writes")
+
+            :param index: the index name
+            :type index: str
+
+            :param owner: the routing value of the documents (i.e. the id of their owner)
+            :type owner: str
+
+            :return: the documents (None for a deleted one), by id
+            :rtype: dict
+        """
+
+        with self.lock:
+
+            documents = self.recent_writes.get((index, owner))
+
+            if not documents:
+
+                return {}
+
+            now = monotonic()
+
+            for id in [ id for id, (document, expiration) in documents.items() if expiration < now ]:
+
+                del documents[id]
+
+            if not documents:
+
+                del self.recent_writes[(index, owner)]
+
+            return { id: document for id, (document, expiration) in documents.items() }
+
+    # ====================
+    def get_metrics(self):
+        """
+            Method to get the metrics of the cache (of the current process, see "app.api.search.metrics")
+
+            :return: the number of hits, misses and entries and the current generation
+            :rtype: dict
+        """
+
+        with self.lock:
+
+            return {"cache_hits": self.hits,
+                    "cache_misses": self.misses,
+                    "cache_size": len(self.entries),
+                    "cache_generation": self.generation}
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
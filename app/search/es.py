@@ -0,0 +1,800 @@
+"""
+    Module to handle searching through the "Elasticsearch" module
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from flask import current_app
+
+from elasticsearch.exceptions import TransportError
+
+from app.search.backend import CHECKSUM_MODULUS, CHECKSUM_MULTIPLIERS, SearchBackend, get_model, get_result_fields, \
+                               get_search_fields
+from app.search.breaker import CircuitOpenError, is_unavailability
+from app.search.mapping import get_index_body
+from app.search.query import Clause, parse_query
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# hash of the id and the update date (timestamp in seconds) of a document, summed by the consistency checks (see
+# "app.search.backend.get_checksum_hash")
+CHECKSUM_SCRIPT = ("long id = doc['id'].value; "
+                   "long timestamp = doc['update_date'].size() == 0 ? 0L : doc['update_date'].value.toEpochSecond(); "
+                   "long value = (id * {1}L + timestamp) % {0}L; "
+                   "value = (value * value % {0}L * {2}L + id) % {0}L; "
+                   "return value * value % {0}L;").format(CHECKSUM_MODULUS, *CHECKSUM_MULTIPLIERS)
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==========================================
+class ElasticsearchBackend(SearchBackend):
+    """
+        Class that represents the Elasticsearch search backend (the client is "current_app.elasticsearch")
+    """
+
+    name = "elasticsearch"
+
+    # ===============
+    @property
+    def external(self):
+        """
+            Property that indicates if the documents have to be sent to Elasticsearch (i.e. if it is configured)
+
+            :return: True if Elasticsearch is configured
+            :rtype: bool
+        """
+
+        return current_app.elasticsearch is not None
+
+    # ============================================
+    def request(self, function, timeout, **kwargs):
+        """
+            Method to send a request to Elasticsearch through the circuit breaker of the application
+            ("current_app.search_breaker") : the request is not sent while the breaker is open, and its
+            unavailability errors (see "app.search.breaker.is_unavailability") are recorded by the breaker
+
+            :param function: the client method (e.g. "current_app.elasticsearch.search")
+            :type function: callable
+
+            :param timeout: the configuration key of the request timeout (e.g. "ELASTICSEARCH_SEARCH_TIMEOUT")
+            :type timeout: str
+
+            :param kwargs: the request arguments
+            :type kwargs: dict
+
+            :return: the response
+            :rtype: dict
+
+            :raise app.search.breaker.CircuitOpenError: if the breaker is open
+            :raise elasticsearch.exceptions.TransportError: if the request fails
+        """
+
+        breaker = current_app.search_breaker
+
+        if not breaker.allow():
+
+            raise CircuitOpenError("N/A", "Elasticsearch circuit breaker is open", None)
+
+        try:
+
+            response = function(request_timeout = current_app.config[timeout], **kwargs)
+
+        except TransportError as error:
+
+            if is_unavailability(error):
+
+                breaker.record_failure()
+
+            else:
+
+                breaker.record_success()
+
+            raise
+
+        finally:
+
+            breaker.release_trial()
+
+        breaker.record_success()
+
+        return response
+
+    # ===========================================
+    def init_index(self, model, recreate = False):
+        """
+            Overriding of the "init_index" method of the parent class : the index is created with the settings
+            and the mappings of the model (see "app.search.mapping"), unless it already exists
+
+            The index name is an alias of a versioned index (e.g. "article" for "article_v1"), so that the index
+            can be rebuilt without any downtime (see "create_version" and "swap_version")
+        """
+
+        if not current_app.elasticsearch:
+
+            return False
+
+        index = model.__tablename__
+
+        if recreate:
+
+            for version in self.get_versions(index):
+
+                current_app.elasticsearch.indices.delete(index = version)
+
+        elif current_app.elasticsearch.indices.exists(index = index):
+
+            return False
+
+        body = get_index_body(model)
+        body["aliases"] = {index: {}}
+
+        current_app.elasticsearch.indices.create(index = self.get_next_version(index), body = body)
+
+        return True
+
+    # ============================
+    def get_versions(self, index):
+        """
+            Method to get the indexes currently behind the name of an index : the versioned indexes of its alias,
+            or the index itself if it has been created without any alias (by a previous version)
+
+            :param index: the index name
+            :type index: str
+
+            :return: the names of the indexes
+            :rtype: list(str)
+        """
+
+        indices = current_app.elasticsearch.indices
+
+        if indices.exists_alias(name = index):
+
+            return sorted(indices.get_alias(name = index))
+
+        if indices.exists(index = index):
+
+            return [index]
+
+        return []
+
+    # ================================
+    def get_next_version(self, index):
+        """
+            Method to get the name of the next version of an index (e.g. "article_v3" if "article_v2" exists)
+
+            :param index: the index name
+            :type index: str
+
+            :return: the name of the versioned index
+            :rtype: str
+        """
+
+        numbers = [ int(name[len(index) + 2:]) for name in current_app.elasticsearch.indices.get(index = index + "_v*")
+                    if name[len(index) + 2:].isdigit() ]
+
+        return "{}_v{}".format(index, max(numbers, default = 0) + 1)
+
+    # ===============================
+    def create_version(self, model):
+        """
+            Method to create a new version of the index of a model, to be filled before replacing the current one
+            (see "swap_version") : it is neither refreshed nor replicated while it is filled
+
+            :param model: the searchable model
+            :type model: class
+
+            :return: the name of the versioned index
+            :rtype: str
+        """
+
+        version = self.get_next_version(model.__tablename__)
+
+        body = get_index_body(model)
+        body["settings"].update({"refresh_interval": "-1", "number_of_replicas": 0})
+
+        current_app.elasticsearch.indices.create(index = version, body = body)
+
+        return version
+
+    # =======================================
+    def swap_version(self, model, version):
+        """
+            Method to replace the current index of a model by a new version : the new version gets the refresh
+            and replication settings of the model, then the alias is moved and the previous indexes are deleted
+            through a single (atomic) request
+
+            :param model: the searchable model
+            :type model: class
+
+            :param version: the name of the new versioned index
+            :type version: str
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        index = model.__tablename__
+        indices = current_app.elasticsearch.indices
+        settings = get_index_body(model)["settings"]
+
+        indices.put_settings(index = version,
+                             body = {"index": {"refresh_interval": settings.get("refresh_interval"),
+                                               "number_of_replicas": settings.get("number_of_replicas", 1)}})
+        indices.refresh(index = version)
+
+        actions = [ {"remove_index": {"index": previous_version}} for previous_version in self.get_versions(index) ]
+        actions.append({"add": {"index": version, "alias": index}})
+
+        indices.update_aliases(body = {"actions": actions})
+
+    # ===============================
+    def drop_version(self, version):
+        """
+            Method to delete a version of an index which will not be used (e.g. its filling has failed)
+
+            :param version: the name of the versioned index
+            :type version: str
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        current_app.elasticsearch.indices.delete(index = version, ignore_unavailable = True)
+
+    # ===========================================================
+    def suggest(self, index, prefix, size, user_id = None):
+        """
+            Overriding of the "suggest" method of the parent class : the prefixes of the words are indexed into
+            the "prefixes" subfield (edge n-grams), so that the suggestions are a simple "match" query
+            (they are computed in-process if Elasticsearch is not configured)
+        """
+
+        model = get_model(index)
+
+        if not current_app.elasticsearch or model is None or not model.__search_suggest__:
+
+            return super(ElasticsearchBackend, self).suggest(index, prefix, size, user_id)
+
+        filters = []
+        routing = None
+
+        if user_id is not None and model.__search_owner__:
+
+            filters.append({'term': {model.__search_owner__: user_id}})
+            routing = str(user_id)
+
+        field = model.__search_suggest__
+
+        body = {'query': {'bool': {'must': {'match': {field + '.prefixes': {'query': prefix, 'operator': 'and'}}},
+                                   'filter': filters}},
+                '_source': [field],
+                'size': size}
+
+        search = self.request(current_app.elasticsearch.search, "ELASTICSEARCH_SEARCH_TIMEOUT",
+                              index = index, body = body, routing = routing)
+
+        return [ {'id': int(hit['_id']), 'title': hit['_source'][field]} for hit in search['hits']['hits'] ]
+
+    # ==========================================
+    def create_index(self, table, connection):
+        """
+            Overriding of the "create_index" method of the parent class : the index is created along with the table
+        """
+
+        model = get_model(table.name)
+
+        if model:
+
+            self.init_index(model)
+
+    # ===================================
+    def index(self, index, id, payload):
+        """
+            Overriding of the "index" method of the parent class
+        """
+
+        if not current_app.elasticsearch:
+
+            return None
+
+        self.request(current_app.elasticsearch.index, "ELASTICSEARCH_TIMEOUT",
+                     index = index,
+                     id = id,
+                     body = payload,
+                     routing = get_document_routing(index, payload))
+
+    # ==========================================
+    def delete(self, index, id, routing = None):
+        """
+            Overriding of the "delete" method of the parent class
+        """
+
+        if not current_app.elasticsearch:
+
+            return None
+
+        self.request(current_app.elasticsearch.delete, "ELASTICSEARCH_TIMEOUT", index = index, id = id, routing = routing)
+
+    # =========================================
+    def bulk(self, actions, refresh = "false"):
+        """
+            Overriding of the "bulk" method of the parent class : the actions are sent through a single
+            "_bulk" request (the documents are routed by owner), the "update" ones only replace the fields
+            of their payload
+        """
+
+        if not current_app.elasticsearch or not actions:
+
+            return []
+
+        body = []
+
+        for action in actions:
+
+            metadata = {"_index": action["index"], "_id": action["id"]}
+
+            if action["operation"] == "index":
+
+                routing = get_document_routing(action["index"], action["payload"])
+
+            else:
+
+                routing = action.get("routing")
+
+            if routing is not None:
+
+                metadata["_routing"] = routing
+
+            body.append({action["operation"]: metadata})
+
+            if action["operation"] == "index":
+
+                body.append(action["payload"])
+
+            elif action["operation"] == "update":
+
+                body.append({"doc": action["payload"], "doc_as_upsert": True} if action.get("upsert")
+                            else {"doc": action["payload"]})
+
+        response = self.request(current_app.elasticsearch.bulk, "ELASTICSEARCH_TIMEOUT", body = body, refresh = refresh)
+
+        failures = []
+
+        if response["errors"]:
+
+            for action, item in zip(actions, response["items"]):
+
+                result = item[action["operation"]]
+
+                if "error" in result:
+
+                    failures.append((action, str(result["error"])))
+
+        return failures
+
+    # ==============================================================================
+    def query(self, index, query, page, per_page, after = None, user_id = None):
+        """
+            Overriding of the "query" method of the parent class : the results are sorted by score, then by id,
+            and the next pages are reached through "search_after" (whose cost does not depend on the depth)
+
+            The documents are read from "_source", so that the results can be displayed without any database query
+
+            The query is parsed (see "app.search.query") and compiled into a "bool" query (see "get_es_query")
+
+            The objects of a User are selected through a (non-scoring and cached) filter and, as they are routed
+            by owner, only the shard holding them is queried
+        """
+
+        if not current_app.elasticsearch:
+
+            return ([], 0, None)
+
+        request = get_search_request(index, query, page, per_page, after, user_id)
+
+        if request is None:
+
+            return ([], 0, None)
+
+        body, routing = request
+
+        search = self.request(current_app.elasticsearch.search, "ELASTICSEARCH_SEARCH_TIMEOUT",
+                              index = index, body = body, routing = routing)
+
+        return get_search_results(search)
+
+    # ===================================================
+    def multi_query(self, index, queries, user_id = None):
+        """
+            Overriding of the "multi_query" method of the parent class : the queries are sent through a single
+            "_msearch" request (each one is built as by the "query" method)
+        """
+
+        results = [ ([], 0, None) for query in queries ]
+
+        if not current_app.elasticsearch:
+
+            return results
+
+        positions = []
+        body = []
+
+        for position, (query, page, per_page, after) in enumerate(queries):
+
+            request = get_search_request(index, query, page, per_page, after, user_id)
+
+            if request is not None:
+
+                header = {'index': index}
+
+                if request[1] is not None:
+
+                    header['routing'] = request[1]
+
+                positions.append(position)
+                body.extend([header, request[0]])
+
+        if not body:
+
+            return results
+
+        response = self.request(current_app.elasticsearch.msearch, "ELASTICSEARCH_SEARCH_TIMEOUT", body = body)
+
+        for position, search in zip(positions, response['responses']):
+
+            if 'error' in search:
+
+                raise TransportError(search.get('status', 500), str(search['error']), search['error'])
+
+            results[position] = get_search_results(search)
+
+        return results
+
+    # ============================================================
+    def get_checksums(self, index, min_id, max_id, bucket_size):
+        """
+            Overriding of the "get_checksums" method of the parent class : the buckets are computed by a "histogram"
+            aggregation on the ids (from the doc values, without reading any document), whose sums of hashes are
+            exact as long as a bucket holds less than 2^22 documents (the sums are computed as doubles)
+        """
+
+        body = {'size': 0,
+                'query': {'range': {'id': {'gte': min_id, 'lte': max_id}}},
+                'aggs': {'buckets': {'histogram': {'field': 'id', 'interval': bucket_size, 'min_doc_count': 1},
+                                     'aggs': {'hashes': {'sum': {'script': {'source': CHECKSUM_SCRIPT}}}}}}}
+
+        search = self.request(current_app.elasticsearch.search, "ELASTICSEARCH_TIMEOUT", index = index, body = body)
+
+        return { int(bucket['key']): (bucket['doc_count'], int(bucket['hashes']['value']))
+                 for bucket in search['aggregations']['buckets']['buckets'] }
+
+    # ===========================================================
+    def get_update_dates(self, index, min_id, max_id, size):
+        """
+            Overriding of the "get_update_dates" method of the parent class : the dates are read from the doc values
+            (as timestamps), without reading the documents
+        """
+
+        body = {'size': size,
+                'query': {'range': {'id': {'gte': min_id, 'lte': max_id}}},
+                '_source': False,
+                'docvalue_fields': [{'field': 'update_date', 'format': 'epoch_second'}]}
+
+        search = self.request(current_app.elasticsearch.search, "ELASTICSEARCH_TIMEOUT", index = index, body = body)
+
+        return [ (int(hit['_id']), int(float(hit.get('fields', {}).get('update_date', [0])[0])), hit.get('_routing'))
+                 for hit in search['hits']['hits'] ]
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ==========================================================================
+def get_search_request(index, query, page, per_page, after, user_id):
+    """
+        Function to build the body (and the routing) of the search request of a page of results (see
+        "ElasticsearchBackend.query")
+
+        :param index: the index name
+        :type index: str
+
+        :param query: the searched text
+        :type query: str
+
+        :param page: page number of the query results (ignored if "after" is given)
+        :type page: int
+
+        :param per_page: number of results per page
+        :type per_page: int
+
+        :param after: the sort values of the last result of the previous page
+        :type after: None | list
+
+        :param user_id: the id of the User whose objects are searched (all the objects if None)
+        :type user_id: None | int
+
+        :return: the body and the routing of the request, None if there is nothing to search
+        :rtype: None | tuple(dict, None | str)
+    """
+
+    model = get_model(index)
+
+    if model is None:
+
+        return None
+
+    alternatives = parse_query(query, model)
+
+    if not alternatives:
+
+        return None
+
+    filters = []
+    routing = None
+
+    if user_id is not None and model.__search_owner__:
+
+        filters.append({'term': {model.__search_owner__: user_id}})
+        routing = str(user_id)
+
+    body = {'query': {'bool': {'must': get_es_query(alternatives, model), 'filter': filters}},
+            'sort': [{'_score': 'desc'}, {'id': 'asc'}],
+            '_source': get_result_fields(model),
+            'size': per_page,
+            'track_total_hits': True
+           }
+
+    # the highlighted fields (e.g. the synthesis of an article) are replaced by a few fragments around the searched
+    # words (or by their beginning if they do not hold any), escaped to be displayed as HTML
+    if model.__search_highlight__:
+
+        fragment_size = current_app.config["SEARCH_HIGHLIGHT_FRAGMENT_SIZE"]
+
+        body['highlight'] = {'fields': { field: {} for field in model.__search_highlight__ },
+                             'encoder': 'html',
+                             'pre_tags': ['<mark>'],
+                             'post_tags': ['</mark>'],
+                             'fragment_size': fragment_size,
+                             'number_of_fragments': current_app.config["SEARCH_HIGHLIGHT_FRAGMENTS"],
+                             'no_match_size': fragment_size}
+
+    if after:
+
+        body['search_after'] = after
+
+    else:
+
+        body['from'] = (page - 1) * per_page
+
+    return (body, routing)
+
+# ==============================
+def get_search_results(search):
+    """
+        Function to get the results of a search response
+
+        :param search: the search response
+        :type search: dict
+
+        :return: the documents of the page results (with their "score" and their "highlights" fragments, if any),
+                 the total number of results and the sort values of the last result of the page (None if there is
+                 no result)
+        :rtype: tuple(list(dict), int, None | list)
+    """
+
+    hits = search['hits']['hits']
+
+    documents = [ dict(hit['_source'], id = int(hit['_id'])) for hit in hits ]
+
+    for document, hit in zip(documents, hits):
+
+        # the first sort value is the score (used to blend the results with the semantic ones)
+        document['score'] = hit['sort'][0]
+
+        if 'highlight' in hit:
+
+            document['highlights'] = [ fragment for fragments in hit['highlight'].values() for fragment in fragments ]
+
+    return (documents, search['hits']['total']['value'], hits[-1]['sort'] if hits else None)
+
+# ================================================
+def get_es_clause(clause, model, fuzzy = False):
+    """
+        Function to compile a clause of a search query into an Elasticsearch query
+
+        The words of a fuzzy clause also match the words within SEARCH_FUZZINESS edits (e.g. typos) which share
+        their first SEARCH_FUZZY_PREFIX_LENGTH characters (so that few terms are expanded), the exact matches
+        being scored higher
+
+        :param clause: the clause
+        :type clause: app.search.query.Clause
+
+        :param model: the searchable model
+        :type model: class
+
+        :param fuzzy: True if the words of a "text" clause can be misspelled
+        :type fuzzy: bool
+
+        :return: the query
+        :rtype: dict
+    """
+
+    if clause.kind == "range":
+
+        start, end = clause.value
+        date_range = {}
+
+        if start:
+
+            date_range['gte'] = start.isoformat()
+
+        if end:
+
+            date_range['lt'] = end.isoformat()
+
+        return {'range': {clause.field: date_range}}
+
+    if clause.field:
+
+        if clause.kind == "phrase":
+
+            return {'match_phrase': {clause.field: clause.value}}
+
+        query = {'match': {clause.field: {'query': clause.value, 'operator': 'and'}}}
+
+        if fuzzy and is_fuzzy():
+
+            return get_fuzzy_query(query, {'match': {clause.field: dict(query['match'][clause.field],
+                                                                        **get_fuzzy_parameters())}})
+
+        return query
+
+    if clause.kind == "phrase":
+
+        return {'multi_match': {'query': clause.value, 'type': 'phrase', 'fields': get_search_fields(model)}}
+
+    query = {'multi_match': {'query': clause.value,
+                             'type': 'cross_fields',
+                             'operator': 'and',
+                             'fields': get_search_fields(model)}}
+
+    # the "cross_fields" queries cannot be fuzzy : the misspelled words are searched field by field
+    if fuzzy and is_fuzzy():
+
+        return get_fuzzy_query(query, {'multi_match': dict(query['multi_match'],
+                                                           type = 'best_fields',
+                                                           **get_fuzzy_parameters())})
+
+    return query
+
+# ===============
+def is_fuzzy():
+    """
+        Function to know if the searched words can be misspelled (see SEARCH_FUZZINESS)
+
+        :return: True if the searches are fuzzy
+        :rtype: bool
+    """
+
+    return str(current_app.config["SEARCH_FUZZINESS"]) != "0"
+
+# ===========================
+def get_fuzzy_parameters():
+    """
+        Function to get the parameters of the fuzzy queries
+
+        :return: the parameters
+        :rtype: dict
+    """
+
+    return {'fuzziness': current_app.config["SEARCH_FUZZINESS"],
+            'prefix_length': current_app.config["SEARCH_FUZZY_PREFIX_LENGTH"],
+            'max_expansions': current_app.config["SEARCH_FUZZY_MAX_EXPANSIONS"]}
+
+# =======================================
+def get_fuzzy_query(query, fuzzy_query):
+    """
+        Function to combine an exact query and its fuzzy version : the documents matching the fuzzy query are
+        found, and the ones matching the exact query are scored higher
+
+        :param query: the exact query
+        :type query: dict
+
+        :param fuzzy_query: the fuzzy query
+        :type fuzzy_query: dict
+
+        :return: the query
+        :rtype: dict
+    """
+
+    return {'bool': {'should': [query, fuzzy_query], 'minimum_should_match': 1}}
+
+# ======================================
+def get_es_query(alternatives, model):
+    """
+        Function to compile a parsed search query into an Elasticsearch query : the words are scored through
+        a single "multi_match" query, the clauses restricted to a field only query this field and the date ranges
+        and the excluded clauses are (non-scoring and cached) filters
+
+        The words (except the excluded ones) are fuzzy, see "get_es_clause"
+
+        :param alternatives: the alternatives of clauses (see "app.search.query.parse_query")
+        :type alternatives: list(list(app.search.query.Clause))
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the query
+        :rtype: dict
+    """
+
+    queries = []
+
+    for clauses in alternatives:
+
+        words = [ clause.value for clause in clauses
+                  if clause.kind == "text" and clause.field is None and not clause.negated ]
+
+        must = [ get_es_clause(clause, model, fuzzy = True) for clause in clauses
+                 if clause.kind != "range" and not clause.negated and (clause.kind == "phrase" or clause.field) ]
+
+        if words:
+
+            must.insert(0, get_es_clause(Clause("text", " ".join(words)), model, fuzzy = True))
+
+        queries.append({'bool': {'must': must,
+                                 'filter': [ get_es_clause(clause, model) for clause in clauses
+                                             if clause.kind == "range" and not clause.negated ],
+                                 'must_not': [ get_es_clause(clause, model) for clause in clauses
+                                               if clause.negated ]}})
+
+    if len(queries) == 1:
+
+        return queries[0]
+
+    return {'bool': {'should': queries, 'minimum_should_match': 1}}
+
+# ========================================
+def get_document_routing(index, payload):
+    """
+        Function to get the routing value of a document, i.e. the id of its owner (see "__search_owner__")
+
+        :param index: the index name
+        :type index: str
+
+        :param payload: the document
+        :type payload: dict
+
+        :return: the routing value, None if the documents of the index have no owner
+        :rtype: None | str
+    """
+
+    model = get_model(index)
+
+    if model is None or model.__search_owner__ is None or payload.get(model.__search_owner__) is None:
+
+        return None
+
+    return str(payload[model.__search_owner__])
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,87 @@
+"""
+    Module to define the settings and the mappings of the search indexes
+
+    The mapping of the fields of a searchable model is declared next to its "__searchable__" fields
+    ("__search_mapping__"), the analysis settings shared by all the indexes are defined here
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from copy import deepcopy
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# analysis of the french texts : elision ("l'article" -> "article"), case and accents folding, stop words
+# and light stemming, and analysis of the suggestions : the prefixes of the words are indexed (edge n-grams)
+ANALYSIS_SETTINGS = {"filter": {"french_elision": {"type": "elision",
+                                                   "articles_case": True,
+                                                   "articles": ["l", "m", "t", "qu", "n", "s", "j", "d", "c",
+                                                                "jusqu", "quoiqu", "lorsqu", "puisqu"]},
+                                "french_stop": {"type": "stop", "stopwords": "_french_"},
+                                "french_stemmer": {"type": "stemmer", "language": "light_french"},
+                                "prefixes": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20}},
+                     "analyzer": {"french_text": {"type": "custom",
+                                                  "tokenizer": "standard",
+                                                  "filter": ["french_elision",
+                                                             "lowercase",
+                                                             "asciifolding",
+                                                             "french_stop",
+                                                             "french_stemmer"]},
+                                  "prefixes": {"type": "custom",
+                                               "tokenizer": "standard",
+                                               "filter": ["lowercase", "asciifolding", "prefixes"]},
+                                  "prefixes_search": {"type": "custom",
+                                                      "tokenizer": "standard",
+                                                      "filter": ["lowercase", "asciifolding"]}}}
+
+INDEX_SETTINGS = {"analysis": ANALYSIS_SETTINGS}
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# =========================
+def get_index_body(model):
+    """
+        Function to get the settings and the mappings of the index of a searchable model
+
+        The mapping is not dynamic : the fields which are not declared into "__search_mapping__" are only
+        stored into "_source" (e.g. no "keyword" subfield is added to every text field)
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the body of the index creation request
+        :rtype: dict
+    """
+
+    settings = deepcopy(INDEX_SETTINGS)
+    settings.update(model.__search_settings__)
+
+    return {"settings": settings,
+            "mappings": {"dynamic": False, "properties": deepcopy(model.__search_mapping__)}}
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
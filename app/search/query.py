@@ -0,0 +1,377 @@
+"""
+    Module to parse the search query language
+
+    A query is made of clauses :
+
+    - a word (e.g. "python"), searched into all the searchable fields
+    - a quoted phrase (e.g. "langage de programmation")
+    - a word or a phrase restricted to a searchable field (e.g. title:python or title:"langage python")
+    - a date range on a date field (e.g. update_date:2020, update_date:>=2020-05-01 or
+      update_date:2020-01..2020-06)
+
+    A clause preceded by "-" is excluded (e.g. -rust). The clauses are all required (the "AND" operator is implicit)
+    and the alternatives are separated by the "OR" operator (e.g. python flask OR django)
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import re
+
+from datetime import datetime
+
+from app import db
+from app.search.backend import get_search_fields, get_source_fields, get_terms
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# a clause : an optional "-", an optional "field:" and a quoted phrase or a word
+CLAUSE_PATTERN = re.compile(r'(-)?(?:([A-Za-z_]+):)?(?:"([^"]*)"?|(\S+))')
+
+# a date : a year, a month or a day
+DATE_PATTERN = re.compile(r"^(\d{4})(?:-(\d{1,2}))?(?:-(\d{1,2}))?$")
+
+OPERATORS = ["AND", "OR"]
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ===================
+class Clause(object):
+    """
+        Class that represents a clause of a search query
+    """
+
+    # ============================================================
+    def __init__(self, kind, value, field = None, negated = False):
+        """
+            Class constructor
+
+            :param kind: the kind of clause ("text", "phrase" or "range")
+            :type kind: str
+
+            :param value: the searched text, or the start (included) and the end (excluded) of the date range
+            :type value: str | tuple(None | datetime.datetime, None | datetime.datetime)
+
+            :param field: the searched field (all the searchable fields if None)
+            :type field: None | str
+
+            :param negated: True if the clause is excluded
+            :type negated: bool
+        """
+
+        self.kind = kind
+        self.value = value
+        self.field = field
+        self.negated = negated
+
+    # =================
+    def __repr__(self):
+        """
+            Method that enables to represent the class instance
+
+            :return: the kind, field and value values
+            :rtype: str
+        """
+
+        return "<Clause {}{} {}:{}>".format("-" if self.negated else "", self.kind, self.field, self.value)
+
+    # =======================
+    def __eq__(self, other):
+        """
+            Method to compare two clauses
+
+            :param other: the other clause
+            :type other: app.search.query.Clause
+
+            :return: True if the clauses are the same
+            :rtype: bool
+        """
+
+        return isinstance(other, Clause) and vars(self) == vars(other)
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ===========================
+def normalize_query(query):
+    """
+        Function to normalize a search query (case and spaces), without changing its meaning
+
+        :param query: the searched text
+        :type query: str
+
+        :return: the normalized query
+        :rtype: str
+    """
+
+    return " ".join( word if word in OPERATORS else word.lower() for word in query.split() )
+
+# =========================
+def get_date_fields(model):
+    """
+        Function to get the date fields of the documents of a searchable model
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the fields names
+        :rtype: list(str)
+    """
+
+    return [ field for field in get_source_fields(model) if isinstance(model.__table__.c[field].type, db.DateTime) ]
+
+# ==================================
+def parse_date(value, end = False):
+    """
+        Function to get the start (or the end) of a year, a month or a day
+
+        :param value: the date (e.g. "2020", "2020-05" or "2020-05-17")
+        :type value: str
+
+        :param end: True to get the end of the period (i.e. the start of the next one)
+        :type end: bool
+
+        :return: the date, None if the value is not a date
+        :rtype: None | datetime.datetime
+    """
+
+    match = DATE_PATTERN.match(value)
+
+    if match is None:
+
+        return None
+
+    year, month, day = match.groups()
+
+    try:
+
+        start = datetime(int(year), int(month or 1), int(day or 1))
+
+        if not end:
+
+            return start
+
+        if day:
+
+            return datetime.fromordinal(start.toordinal() + 1)
+
+        if month:
+
+            return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+        return datetime(start.year + 1, 1, 1)
+
+    except ValueError:
+
+        return None
+
+# =======================
+def parse_range(value):
+    """
+        Function to parse a date range (e.g. "2020", ">=2020-05-01", "<2021" or "2020-01..2020-06")
+
+        :param value: the date range
+        :type value: str
+
+        :return: the start (included) and the end (excluded) of the range, None if the value is not a date range
+        :rtype: None | tuple(None | datetime.datetime, None | datetime.datetime)
+    """
+
+    if ".." in value:
+
+        first, last = value.split("..", 1)
+
+        start = parse_date(first) if first else None
+        end = parse_date(last, end = True) if last else None
+
+        if (first and start is None) or (last and end is None) or (start is None and end is None):
+
+            return None
+
+        return (start, end)
+
+    for prefix, is_start, at_end in [(">=", True, False), ("<=", False, True), (">", True, True), ("<", False, False)]:
+
+        if value.startswith(prefix):
+
+            date = parse_date(value[len(prefix):], end = at_end)
+
+            if date is None:
+
+                return None
+
+            return (date, None) if is_start else (None, date)
+
+    start = parse_date(value)
+
+    if start is None:
+
+        return None
+
+    return (start, parse_date(value, end = True))
+
+# =============================
+def parse_query(query, model):
+    """
+        Function to parse a search query into alternatives (i.e. separated by the "OR" operator) of clauses
+
+        The unknown fields and the invalid date ranges are searched as text, the clauses without any word
+        (e.g. punctuation) are ignored
+
+        :param query: the searched text
+        :type query: str
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the alternatives, each one being a list of clauses
+        :rtype: list(list(app.search.query.Clause))
+    """
+
+    date_fields = get_date_fields(model)
+    search_fields = get_search_fields(model)
+
+    alternatives = [[]]
+
+    for match in CLAUSE_PATTERN.finditer(query):
+
+        negated, field, phrase, word = match.groups()
+        negated = negated is not None
+
+        if phrase is None and field is None and not negated and word in OPERATORS:
+
+            if word == "OR":
+
+                alternatives.append([])
+
+            continue
+
+        clause = None
+
+        if field in search_fields:
+
+            clause = Clause("phrase" if phrase is not None else "text", phrase if phrase is not None else word,
+                            field, negated)
+
+        elif field in date_fields and phrase is None:
+
+            date_range = parse_range(word)
+
+            if date_range:
+
+                clause = Clause("range", date_range, field, negated)
+
+        elif field is None:
+
+            clause = Clause("phrase" if phrase is not None else "text", phrase if phrase is not None else word,
+                            negated = negated)
+
+        # the clause is searched as text
+        if clause is None:
+
+            clause = Clause("text", match.group(0).lstrip("-"), negated = negated)
+
+        if clause.kind != "range" and not get_terms(clause.value):
+
+            continue
+
+        alternatives[-1].append(clause)
+
+    return [ alternative for alternative in alternatives if alternative ]
+
+# ================================================
+def matches_query(alternatives, document, model):
+    """
+        Function to check in-process if a document matches a parsed search query (see "parse_query")
+
+        The words are matched as prefixes of the words of the fields (without any language analysis), so the
+        result is an approximation of the one of a search backend
+
+        :param alternatives: the alternatives of clauses
+        :type alternatives: list(list(app.search.query.Clause))
+
+        :param document: the document (see "app.search.get_payload")
+        :type document: dict
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: True if the document matches one of the alternatives
+        :rtype: bool
+    """
+
+    return any( all( matches_clause(clause, document, model) != clause.negated for clause in alternative )
+                for alternative in alternatives )
+
+# ============================================
+def matches_clause(clause, document, model):
+    """
+        Function to check in-process if a document matches a clause (regardless of its negation)
+
+        :param clause: the clause
+        :type clause: app.search.query.Clause
+
+        :param document: the document
+        :type document: dict
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: True if the document matches the clause
+        :rtype: bool
+    """
+
+    if clause.kind == "range":
+
+        value = document.get(clause.field)
+
+        if isinstance(value, str):
+
+            value = datetime.fromisoformat(value)
+
+        start, end = clause.value
+
+        return value is not None and (start is None or value >= start) and (end is None or value < end)
+
+    values = []
+
+    for field in [clause.field] if clause.field else get_search_fields(model):
+
+        value = document.get(field)
+        values.extend( str(item) for item in (value if isinstance(value, list) else [value]) if item is not None )
+
+    terms = [ get_terms(value) for value in values ]
+
+    if clause.kind == "phrase":
+
+        phrase = get_terms(clause.value)
+
+        return any( value_terms[position:position + len(phrase)] == phrase
+                    for value_terms in terms for position in range(len(value_terms)) )
+
+    return all( any( term.startswith(word) for value_terms in terms for term in value_terms )
+                for word in get_terms(clause.value) )
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
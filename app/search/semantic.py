@@ -0,0 +1,450 @@
+"""
+    Module to handle the semantic search (latent semantic analysis)
+
+    The TF-IDF matrix of the searched fields of the objects (see "app.search.vectors") is reduced offline to its
+    main "concepts" through a truncated singular value decomposition ("flask search semantic") : each object, as
+    well as each searched text, is then represented by a dense vector of a few dozen dimensions, in which the texts
+    using words of similar contexts are close even if they share no word
+
+    The models are stored into SEARCH_SEMANTIC_PATH, one directory per index :
+
+    - "documents.npy" : the normalized vectors of the objects (memory-mapped by the searches)
+    - "terms.npy" : the vectors of the terms (used to project the searched texts)
+    - "model.npz" : the vocabulary, the inverse document frequencies, the ids and the owners of the objects
+
+    The objects added since the last build are not part of the model (they are only found by the keyword search)
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import os
+
+from collections import Counter
+from threading import Lock
+from time import perf_counter
+
+import numpy as np
+from scipy.sparse import diags
+
+from app import db
+from app.search.backend import get_terms
+from app.search.query import OPERATORS
+from app.search.spelling import WORD_PATTERN
+from app.search.vectors import get_frequencies_matrix, get_inverse_frequencies, normalize_rows
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# owner of the objects without any owner
+NO_OWNER = -1
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==========================
+class SemanticIndex(object):
+    """
+        Class that represents the in-process semantic models of the indexes : they are loaded at their first use,
+        then again once they have been rebuilt (i.e. once their files have changed)
+    """
+
+    # ========================================
+    def __init__(self, path, min_similarity):
+        """
+            Class constructor
+
+            :param path: the directory of the models
+            :type path: str
+
+            :param min_similarity: the minimum similarity of the objects found by a search
+            :type min_similarity: float
+        """
+
+        self.path = path
+        self.min_similarity = min_similarity
+        self.lock = Lock()
+        self.models = {}
+
+    # =====================
+    def load(self, index):
+        """
+            Method to get the semantic model of an index
+
+            :param index: the index name
+            :type index: str
+
+            :return: the model (see "build_semantic_model"), None if it has not been built
+            :rtype: None | dict
+        """
+
+        directory = os.path.join(self.path, index)
+
+        try:
+
+            version = os.stat(os.path.join(directory, "model.npz")).st_mtime_ns
+
+        except OSError:
+
+            return None
+
+        with self.lock:
+
+            model = self.models.get(index)
+
+            if model and model["version"] == version:
+
+                return model
+
+        with np.load(os.path.join(directory, "model.npz"), allow_pickle = False) as data:
+
+            model = {"version": version,
+                     "vocabulary": { term: column for column, term in enumerate(data["terms"].tolist()) },
+                     "inverse_frequencies": data["inverse_frequencies"],
+                     "ids": data["ids"],
+                     "owners": data["owners"]}
+
+        model["documents"] = np.load(os.path.join(directory, "documents.npy"), mmap_mode = "r")
+        model["terms"] = np.load(os.path.join(directory, "terms.npy"), mmap_mode = "r")
+
+        # the files of a model being rebuilt are not consistent yet
+        if model["documents"].shape[0] != len(model["ids"]) or model["terms"].shape[0] != len(model["vocabulary"]):
+
+            return None
+
+        with self.lock:
+
+            self.models[index] = model
+
+        return model
+
+    # ===================================================
+    def search(self, index, query, size, user_id = None):
+        """
+            Method to get the objects closest to a searched text (cosine similarity of their vectors)
+
+            :param index: the index name
+            :type index: str
+
+            :param query: the searched text (the operators and the fields names of the query are ignored)
+            :type query: str
+
+            :param size: the maximum number of objects
+            :type size: int
+
+            :param user_id: the id of the User who searches (only the objects of this User are searched)
+            :type user_id: None | int
+
+            :return: the ids of the objects along with their similarity (at least the minimum one), the closest first
+                     (None if the model of the index has not been built)
+            :rtype: None | list(tuple(int, float))
+        """
+
+        model = self.load(index)
+
+        if model is None:
+
+            return None
+
+        similarities = get_similarities(model, query)
+
+        if user_id is None:
+
+            positions = np.arange(len(similarities))
+
+        else:
+
+            positions = np.flatnonzero(model["owners"] == user_id)
+
+        positions = positions[similarities[positions] >= self.min_similarity]
+
+        if len(positions) > size:
+
+            positions = positions[np.argpartition(-similarities[positions], size)[:size]]
+
+        positions = positions[np.argsort(-similarities[positions], kind = "mergesort")]
+
+        return [ (int(model["ids"][position]), float(similarities[position])) for position in positions ]
+
+    # ===================================================
+    def get_similarities(self, index, query, object_ids):
+        """
+            Method to get the similarity of several objects to a searched text
+
+            :param index: the index name
+            :type index: str
+
+            :param query: the searched text
+            :type query: str
+
+            :param object_ids: the ids of the objects
+            :type object_ids: list(int)
+
+            :return: the similarity of each object (0 for the objects which are not part of the model)
+            :rtype: dict
+        """
+
+        model = self.load(index)
+
+        if model is None or not object_ids or not len(model["ids"]):
+
+            return { object_id: 0. for object_id in object_ids }
+
+        similarities = get_similarities(model, query)
+        positions = np.minimum(np.searchsorted(model["ids"], object_ids), len(model["ids"]) - 1)
+
+        return { object_id: float(similarities[position]) if model["ids"][position] == object_id else 0.
+                 for object_id, position in zip(object_ids, positions.tolist()) }
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ==================================
+def get_similarities(model, query):
+    """
+        Function to get the similarity of each object of a semantic model to a searched text
+
+        :param model: the semantic model
+        :type model: dict
+
+        :param query: the searched text
+        :type query: str
+
+        :return: the similarities, one per object (in the order of the model)
+        :rtype: numpy.ndarray
+    """
+
+    words = [ match.group(0) for match in WORD_PATTERN.finditer(query)
+              if match.group(0) not in OPERATORS and query[match.end():match.end() + 1] != ":" ]
+
+    counts = Counter( term for term in get_terms(" ".join(words)) if term in model["vocabulary"] )
+
+    if not counts or not model["documents"].shape[1]:
+
+        return np.zeros(len(model["ids"]), dtype = np.float32)
+
+    columns = np.array([ model["vocabulary"][term] for term in counts ])
+    weights = (1. + np.log(np.array(list(counts.values()), dtype = np.float64))) * model["inverse_frequencies"][columns]
+
+    vector = weights @ model["terms"][columns]
+    norm = np.linalg.norm(vector)
+
+    if not norm:
+
+        return np.zeros(len(model["ids"]), dtype = np.float32)
+
+    return model["documents"] @ (vector / norm).astype(np.float32)
+
+# ==============================================================================
+def get_truncated_svd(matrix, rank, oversampling = 10, iterations = 4, seed = 0):
+    """
+        Function to get the truncated singular value decomposition of a matrix, through a randomized range finder
+        (Halko, Martinsson and Tropp) : only products of the sparse matrix by thin dense matrices are computed, and
+        the full decomposition (NumPy) is made on a small dense matrix
+
+        :param matrix: the matrix
+        :type matrix: scipy.sparse.csr_matrix
+
+        :param rank: the number of singular values
+        :type rank: int
+
+        :param oversampling: the number of additional random vectors (the more the more accurate)
+        :type oversampling: int
+
+        :param iterations: the number of power iterations (the more the more accurate)
+        :type iterations: int
+
+        :param seed: the seed of the random vectors
+        :type seed: int
+
+        :return: the left singular vectors, the singular values and the right singular vectors
+        :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+
+    rank = min(rank, *matrix.shape)
+    size = min(rank + oversampling, *matrix.shape)
+
+    if not rank:
+
+        return np.zeros((matrix.shape[0], 0)), np.zeros(0), np.zeros((0, matrix.shape[1]))
+
+    basis = np.linalg.qr(matrix @ np.random.RandomState(seed).normal(size = (matrix.shape[1], size)))[0]
+
+    for iteration in range(iterations):
+
+        basis = np.linalg.qr(matrix.T @ basis)[0]
+        basis = np.linalg.qr(matrix @ basis)[0]
+
+    left_vectors, values, right_vectors = np.linalg.svd((matrix.T @ basis).T, full_matrices = False)
+
+    return (basis @ left_vectors)[:, :rank], values[:rank], right_vectors[:rank]
+
+# ================================================
+def build_semantic_model(model, path, dimensions):
+    """
+        Function to build the semantic model of the searched fields (see "__searchable__") of the objects of
+        a searchable model, and to store it into its directory (see the module documentation)
+
+        :param model: the searchable model
+        :type model: class
+
+        :param path: the directory of the models
+        :type path: str
+
+        :param dimensions: the number of dimensions of the vectors
+        :type dimensions: int
+
+        :return: the number of objects, the number of dimensions and the duration (in seconds) of each step
+        :rtype: tuple(int, int, dict)
+    """
+
+    durations = {}
+    start = perf_counter()
+
+    owner = getattr(model, model.__search_owner__) if model.__search_owner__ else db.literal(None)
+
+    query = db.session.query(model.id, owner, *[ getattr(model, field) for field in model.__searchable__ ]) \
+                      .order_by(model.id)
+
+    ids = []
+    owners = []
+    texts = []
+
+    for row in query.yield_per(1000):
+
+        ids.append(row[0])
+        owners.append(NO_OWNER if row[1] is None else row[1])
+        texts.append(" ".join( value for value in row[2:] if value ))
+
+    vocabulary = {}
+    frequencies = get_frequencies_matrix(texts, vocabulary)
+    inverse_frequencies = get_inverse_frequencies(frequencies)
+    matrix = normalize_rows(frequencies @ diags(inverse_frequencies))
+
+    durations["tfidf"] = perf_counter() - start
+    start = perf_counter()
+
+    left_vectors, values, right_vectors = get_truncated_svd(matrix, dimensions)
+
+    # the objects are represented by their projection on the concepts (i.e. "U.S", which is also the projection
+    # "A.V" of their TF-IDF vectors, as the searched texts are), normalized for the cosine similarities
+    documents = left_vectors * values
+    norms = np.linalg.norm(documents, axis = 1)
+    norms[norms == 0] = 1.
+
+    durations["svd"] = perf_counter() - start
+    start = perf_counter()
+
+    directory = os.path.join(path, model.__tablename__)
+    os.makedirs(directory, exist_ok = True)
+
+    # the model file is written last : it marks the new model as complete
+    save_array(os.path.join(directory, "documents.npy"), (documents / norms[:, None]).astype(np.float32))
+    save_array(os.path.join(directory, "terms.npy"), right_vectors.T.astype(np.float32))
+    save_array(os.path.join(directory, "model.npz"),
+               {"terms": np.array(sorted(vocabulary, key = vocabulary.get), dtype = np.str_),
+                "inverse_frequencies": inverse_frequencies,
+                "ids": np.array(ids, dtype = np.int64),
+                "owners": np.array(owners, dtype = np.int64)})
+
+    durations["storage"] = perf_counter() - start
+
+    return len(ids), len(values), durations
+
+# ===========================
+def save_array(path, array):
+    """
+        Function to replace a NumPy file (the searches still read the previous one until it is replaced)
+
+        :param path: the path of the file
+        :type path: str
+
+        :param array: the array (".npy" file) or the arrays by name (".npz" file)
+        :type array: numpy.ndarray | dict
+
+        :return: nothing
+        :rtype: None
+    """
+
+    temporary_path = path + ".tmp"
+
+    with open(temporary_path, "wb") as file:
+
+        if isinstance(array, dict):
+
+            np.savez(file, **array)
+
+        else:
+
+            np.save(file, array)
+
+    os.replace(temporary_path, path)
+
+# ==================================================================================
+def benchmark_semantic_search(semantic_index, index, queries, size, user_id = None):
+    """
+        Function to measure the latency of the semantic searches, on queries made of 1 to 3 random terms of
+        the model
+
+        :param semantic_index: the semantic models
+        :type semantic_index: app.search.semantic.SemanticIndex
+
+        :param index: the index name
+        :type index: str
+
+        :param queries: the number of queries
+        :type queries: int
+
+        :param size: the number of results of each query
+        :type size: int
+
+        :param user_id: the id of the User who searches (all the objects are searched if None)
+        :type user_id: None | int
+
+        :return: the duration (in seconds) of each query, None if the model of the index has not been built
+        :rtype: None | list(float)
+    """
+
+    model = semantic_index.load(index)
+
+    if model is None or not model["vocabulary"]:
+
+        return None
+
+    terms = sorted(model["vocabulary"])
+    random = np.random.RandomState(0)
+    durations = []
+
+    for query in range(queries):
+
+        text = " ".join( terms[position] for position in random.randint(len(terms), size = random.randint(1, 4)) )
+
+        start = perf_counter()
+
+        semantic_index.search(index, text, size, user_id)
+
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,374 @@
+"""
+    Module to handle the in-process corrections of the misspelled searches ("did you mean")
+
+    The words of the searchable objects are kept into dictionaries, SymSpell-style : each word is also stored under
+    its deletes (the words obtained by removing up to "max_distance" characters from its prefix), so that the
+    candidate corrections of a misspelled word are found through its own deletes, without comparing it to every
+    word of the dictionary
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import re
+
+from collections import Counter, OrderedDict
+from threading import Lock
+from time import monotonic
+
+from app import db
+from app.search.backend import get_child_columns, get_terms
+from app.search.query import OPERATORS
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# only the first characters of the words are stored under their deletes (the deletes of longer words are useless
+# to find the candidates, which are then compared to the whole word)
+PREFIX_LENGTH = 7
+
+# a word of a query
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==============================
+class SpellingCorrector(object):
+    """
+        Class that represents the in-process corrections of the searches : the dictionaries are built per index
+        and per owner (the words of the objects of the other Users are never suggested), at their first use,
+        then again once they expire or once searchable objects of their owner have been committed (see
+        "invalidate"). Only the most recently used dictionaries are kept
+    """
+
+    # ==========================================
+    def __init__(self, max_distance, ttl, size):
+        """
+            Class constructor
+
+            :param max_distance: the maximum number of edits (insertion, deletion, substitution or transposition
+                                 of a character) of a corrected word
+            :type max_distance: int
+
+            :param ttl: the lifetime of the dictionaries (in seconds)
+            :type ttl: float
+
+            :param size: the maximum number of dictionaries
+            :type size: int
+        """
+
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.size = size
+        self.lock = Lock()
+        self.dictionaries = OrderedDict()
+        self.invalidations = 0
+
+    # =============================
+    def load(self, model, user_id):
+        """
+            Method to get the dictionary of the words of the objects of a User, built from the database if needed
+
+            :param model: the searchable model
+            :type model: class
+
+            :param user_id: the id of the User whose words are loaded (all the words if None)
+            :type user_id: None | int
+
+            :return: the number of occurrences of each word, and the words stored under each delete
+            :rtype: tuple(collections.Counter, dict)
+        """
+
+        key = (model.__tablename__, user_id)
+
+        with self.lock:
+
+            dictionary = self.dictionaries.get(key)
+
+            if dictionary and dictionary[0] > monotonic():
+
+                self.dictionaries.move_to_end(key)
+
+                return dictionary[1:]
+
+            invalidations = self.invalidations
+
+        counts = Counter()
+
+        for values in get_texts(model, user_id):
+
+            for value in values:
+
+                if value:
+
+                    counts.update(get_terms(value))
+
+        deletes = {}
+
+        for word in counts:
+
+            for delete in get_deletes(word[:PREFIX_LENGTH], self.max_distance):
+
+                deletes.setdefault(delete, []).append(word)
+
+        with self.lock:
+
+            # a dictionary read while objects were committed may already be outdated : it is not kept
+            if invalidations == self.invalidations and self.size > 0:
+
+                self.dictionaries[key] = (monotonic() + self.ttl, counts, deletes)
+                self.dictionaries.move_to_end(key)
+
+                while len(self.dictionaries) > self.size:
+
+                    self.dictionaries.popitem(last = False)
+
+        return counts, deletes
+
+    # ==========================
+    def invalidate(self, owners):
+        """
+            Method to forget the dictionaries of the owners of committed objects (as well as the ones of all the
+            words of their indexes)
+
+            :param owners: the index names and the ids of the owners
+            :type owners: set(tuple(str, None | int))
+
+            :return: nothing
+            :rtype: None
+        """
+
+        with self.lock:
+
+            self.invalidations += 1
+
+            for index, owner in owners:
+
+                self.dictionaries.pop((index, owner), None)
+                self.dictionaries.pop((index, None), None)
+
+    # ===============================================
+    def correct(self, model, query, user_id = None):
+        """
+            Method to correct the misspelled words of a query : each word missing from the dictionary is replaced
+            by the closest word (the most frequent one, in case of tie) within the maximum number of edits (1 for
+            the words of up to 4 characters, none for the words of up to 2 characters)
+
+            The syntax of the query (see "app.search.query") is kept : the operators, the fields names and the
+            dates are not corrected
+
+            :param model: the searchable model
+            :type model: class
+
+            :param query: the searched text
+            :type query: str
+
+            :param user_id: the id of the User who searches (only the words of the objects of this User are used)
+            :type user_id: None | int
+
+            :return: the corrected query, None if no word has been corrected
+            :rtype: None | str
+        """
+
+        if user_id is None or not model.__search_owner__:
+
+            user_id = None
+
+        counts, deletes = self.load(model, user_id)
+
+        parts = []
+        position = 0
+        corrected = False
+
+        for match in WORD_PATTERN.finditer(query):
+
+            word = match.group(0)
+            correction = None
+
+            if word not in OPERATORS and query[match.end():match.end() + 1] != ":" \
+               and not any( character.isdigit() for character in word ):
+
+                correction = get_correction(word.lower(), counts, deletes, self.max_distance)
+
+            parts.extend([query[position:match.start()], correction or word])
+            position = match.end()
+            corrected = corrected or correction is not None
+
+        parts.append(query[position:])
+
+        return "".join(parts) if corrected else None
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ============================
+def get_texts(model, user_id):
+    """
+        Function to get the texts of the searched fields of the objects of a User (see
+        "app.search.backend.get_search_fields")
+
+        :param model: the searchable model
+        :type model: class
+
+        :param user_id: the id of the User whose objects are read (all the objects if None)
+        :type user_id: None | int
+
+        :return: the rows of texts
+        :rtype: generator
+    """
+
+    query = db.session.query(*[ getattr(model, field) for field in model.__searchable__ ])
+
+    if user_id is not None:
+
+        query = query.filter(getattr(model, model.__search_owner__) == user_id)
+
+    yield from query
+
+    for field in model.__search_children__:
+
+        parent_column, column = get_child_columns(model, field)
+
+        query = db.session.query(column).filter(parent_column == model.id)
+
+        if user_id is not None:
+
+            query = query.filter(getattr(model, model.__search_owner__) == user_id)
+
+        yield from query
+
+# ==================================
+def get_deletes(word, max_distance):
+    """
+        Function to get the words obtained by removing up to a number of characters from a word (including
+        the word itself)
+
+        :param word: the word
+        :type word: str
+
+        :param max_distance: the maximum number of removed characters
+        :type max_distance: int
+
+        :return: the deletes
+        :rtype: set(str)
+    """
+
+    deletes = {word}
+    level = {word}
+
+    for distance in range(max_distance):
+
+        level = { variant[:position] + variant[position + 1:] for variant in level for position in range(len(variant)) }
+        deletes |= level
+
+    return deletes
+
+# ======================================================
+def get_correction(word, counts, deletes, max_distance):
+    """
+        Function to get the correction of a word from a dictionary (see "SpellingCorrector.load")
+
+        :param word: the word (in lowercase)
+        :type word: str
+
+        :param counts: the number of occurrences of each word of the dictionary
+        :type counts: collections.Counter
+
+        :param deletes: the words of the dictionary stored under each delete
+        :type deletes: dict
+
+        :param max_distance: the maximum number of edits
+        :type max_distance: int
+
+        :return: the correction, None if the word is known or if there is no close enough word
+        :rtype: None | str
+    """
+
+    if word in counts or len(word) <= 2:
+
+        return None
+
+    if len(word) <= 4:
+
+        max_distance = min(max_distance, 1)
+
+    candidates = set()
+
+    for delete in get_deletes(word[:PREFIX_LENGTH], max_distance):
+
+        candidates.update(deletes.get(delete, []))
+
+    corrections = []
+
+    for candidate in candidates:
+
+        distance = get_distance(word, candidate)
+
+        if distance <= max_distance:
+
+            corrections.append((distance, -counts[candidate], candidate))
+
+    return min(corrections)[2] if corrections else None
+
+# ==============================
+def get_distance(first, second):
+    """
+        Function to get the edit distance between two words : the number of insertions, deletions, substitutions
+        and transpositions (of adjacent characters) to change the first word into the second one
+
+        :param first: the first word
+        :type first: str
+
+        :param second: the second word
+        :type second: str
+
+        :return: the distance
+        :rtype: int
+    """
+
+    before_previous_row = None
+    row = list(range(len(second) + 1))
+
+    for position in range(1, len(first) + 1):
+
+        previous_row, row = row, [position] + [0] * len(second)
+
+        for other_position in range(1, len(second) + 1):
+
+            cost = first[position - 1] != second[other_position - 1]
+
+            row[other_position] = min(previous_row[other_position] + 1,
+                                      row[other_position - 1] + 1,
+                                      previous_row[other_position - 1] + cost)
+
+            if position > 1 and other_position > 1 and first[position - 1] == second[other_position - 2] \
+               and first[position - 2] == second[other_position - 1]:
+
+                row[other_position] = min(row[other_position], before_previous_row[other_position - 2] + 1)
+
+        before_previous_row = previous_row
+
+    return row[-1]
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
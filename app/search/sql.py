@@ -0,0 +1,375 @@
+"""
+    Module to handle searching through the database itself (SQLite FTS5 or generic SQL)
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from app import db
+from app.search.backend import SearchBackend, get_child_columns, get_model, get_source_fields, get_terms
+from app.search.query import parse_query
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ================================
+class SQLBackend(SearchBackend):
+    """
+        Class that represents a generic SQL search backend : the searchable fields are filtered with "LIKE"
+        (without any ranking, the most recent objects come first)
+    """
+
+    name = "sql"
+
+    # ==============================================================================
+    def query(self, index, query, page, per_page, after = None, user_id = None):
+        """
+            Overriding of the "query" method of the parent class (the id is the only sort value) : the query is
+            parsed (see "app.search.query") and compiled into a filter and the documents are read from the
+            searchable table itself
+        """
+
+        model = get_model(index)
+        alternatives = parse_query(query, model) if model else []
+
+        if not alternatives:
+
+            return ([], 0, None)
+
+        fields = get_source_fields(model)
+
+        results = db.session.query(*[ getattr(model, field) for field in fields ]) \
+                            .filter(get_sql_query_condition(alternatives, model))
+
+        if user_id is not None and model.__search_owner__:
+
+            results = results.filter(getattr(model, model.__search_owner__) == user_id)
+
+        total = results.count()
+
+        results = results.order_by(model.id.desc())
+
+        if after:
+
+            results = results.filter(model.id < after[0])
+
+        else:
+
+            results = results.offset((page - 1) * per_page)
+
+        documents = [ dict(zip(fields, row)) for row in results.limit(per_page) ]
+
+        return (documents, total, [documents[-1]["id"]] if documents else None)
+
+    # =======================
+    def rebuild(self, model):
+        """
+            Overriding of the "rebuild" method of the parent class (there is nothing to rebuild)
+        """
+
+        return model.query.count()
+
+# ======================================
+class SQLiteFTSBackend(SQLBackend):
+    """
+        Class that represents the SQLite FTS5 search backend : each searchable table has an associated FTS5
+        table (e.g. "article_fts") maintained by triggers, the results are ranked with BM25
+    """
+
+    name = "sqlite"
+
+    # ==========================================
+    def create_index(self, table, connection):
+        """
+            Overriding of the "create_index" method of the parent class : the FTS5 table and its triggers
+            are created
+        """
+
+        if connection.dialect.name != "sqlite":
+
+            return None
+
+        for statement in get_fts_ddl(get_model(table.name)):
+
+            connection.execute(statement)
+
+    # ========================================
+    def drop_index(self, table, connection):
+        """
+            Overriding of the "drop_index" method of the parent class (the triggers are dropped with the table)
+        """
+
+        if connection.dialect.name != "sqlite":
+
+            return None
+
+        connection.execute("DROP TABLE IF EXISTS {}_fts".format(table.name))
+
+    # =======================
+    def rebuild(self, model):
+        """
+            Overriding of the "rebuild" method of the parent class : the FTS5 table and its triggers are created
+            if needed, then its content is rebuilt from the searchable table
+        """
+
+        with db.engine.begin() as connection:
+
+            for statement in get_fts_ddl(model):
+
+                connection.execute(statement)
+
+            connection.execute("INSERT INTO {0}_fts({0}_fts) VALUES('rebuild')".format(model.__tablename__))
+
+        return model.query.count()
+
+    # ==============================================================================
+    def query(self, index, query, page, per_page, after = None, user_id = None):
+        """
+            Overriding of the "query" method of the parent class : the query is parsed (see "app.search.query")
+            and compiled into an FTS5 expression, the results are ranked with BM25 (the sort values are the rank
+            and the id) and the documents are read from the searchable table within the same query
+
+            The queries which cannot be expressed with FTS5 (i.e. an alternative without any searched word,
+            date ranges within several alternatives or a clause restricted to the children values, which are not
+            into the FTS5 table) are executed by the parent class
+        """
+
+        model = get_model(index)
+        alternatives = parse_query(query, model) if model else []
+
+        if not alternatives:
+
+            return ([], 0, None)
+
+        expression = get_fts_expression(alternatives)
+        ranges = [ clause for clauses in alternatives for clause in clauses if clause.kind == "range" ]
+
+        children = [ clause for clauses in alternatives for clause in clauses
+                     if clause.field in model.__search_children__ ]
+
+        if expression is None or (ranges and len(alternatives) > 1) or children:
+
+            return super(SQLiteFTSBackend, self).query(index, query, page, per_page, after, user_id)
+
+        fields = get_source_fields(model)
+        fts_table = db.table("{}_fts".format(index), db.column("rowid", db.Integer), db.column("rank", db.Float))
+
+        results = db.session.query(*[ getattr(model, field) for field in fields ], fts_table.c.rank) \
+                            .select_from(fts_table) \
+                            .join(model, model.id == fts_table.c.rowid) \
+                            .filter(db.literal_column(fts_table.name).op("MATCH")(expression))
+
+        for clause in ranges:
+
+            condition = get_sql_condition(clause, model)
+
+            results = results.filter(db.not_(condition) if clause.negated else condition)
+
+        if user_id is not None and model.__search_owner__:
+
+            results = results.filter(getattr(model, model.__search_owner__) == user_id)
+
+        total = results.count()
+
+        if after:
+
+            # the rank is compared outside of the FTS5 query
+            results = results.from_self() \
+                             .filter(db.or_(fts_table.c.rank > after[0],
+                                            db.and_(fts_table.c.rank == after[0], model.id > after[1]))) \
+                             .order_by(fts_table.c.rank, model.id)
+
+        else:
+
+            results = results.order_by(fts_table.c.rank, model.id).offset((page - 1) * per_page)
+
+        rows = results.limit(per_page).all()
+
+        documents = [ dict(zip(fields, row)) for row in rows ]
+
+        return (documents, total, [rows[-1].rank, rows[-1].id] if rows else None)
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ===================================
+def get_sql_condition(clause, model):
+    """
+        Function to compile a clause of a search query into an SQL condition (the exclusion is not applied)
+
+        :param clause: the clause
+        :type clause: app.search.query.Clause
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the condition
+        :rtype: sqlalchemy.sql.elements.ClauseElement
+    """
+
+    if clause.kind == "range":
+
+        column = getattr(model, clause.field)
+        start, end = clause.value
+
+        conditions = []
+
+        if start:
+
+            conditions.append(column >= start)
+
+        if end:
+
+            conditions.append(column < end)
+
+        return db.and_(*conditions)
+
+    fields = [clause.field] if clause.field else model.__searchable__ + list(model.__search_children__)
+
+    # the NULL values are replaced so that the exclusions keep them
+    columns = [ db.func.coalesce(getattr(model, field), "") for field in fields if field in model.__searchable__ ]
+
+    # the children values are matched through an "EXISTS" subquery
+    children = [ get_child_columns(model, field) for field in fields if field in model.__search_children__ ]
+
+    if clause.kind == "phrase":
+
+        patterns = ["%{}%".format(" ".join(get_terms(clause.value)))]
+
+    else:
+
+        patterns = [ "%{}%".format(term) for term in get_terms(clause.value) ]
+
+    return db.and_(*[ db.or_(*[ column.ilike(pattern) for column in columns ],
+                             *[ db.exists().where(parent_column == model.id).where(column.ilike(pattern))
+                                for parent_column, column in children ])
+                      for pattern in patterns ])
+
+# ====================================================
+def get_sql_query_condition(alternatives, model):
+    """
+        Function to compile a parsed search query into an SQL condition
+
+        :param alternatives: the alternatives of clauses (see "app.search.query.parse_query")
+        :type alternatives: list(list(app.search.query.Clause))
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the condition
+        :rtype: sqlalchemy.sql.elements.ClauseElement
+    """
+
+    conditions = []
+
+    for clauses in alternatives:
+
+        conditions.append(db.and_(*[ db.not_(get_sql_condition(clause, model)) if clause.negated
+                                     else get_sql_condition(clause, model) for clause in clauses ]))
+
+    return db.or_(*conditions)
+
+# ============================
+def get_fts_clause(clause):
+    """
+        Function to compile a text or phrase clause of a search query into an FTS5 expression (the exclusion is
+        not applied)
+
+        :param clause: the clause
+        :type clause: app.search.query.Clause
+
+        :return: the expression
+        :rtype: str
+    """
+
+    column_filter = "{} : ".format(clause.field) if clause.field else ""
+
+    if clause.kind == "phrase":
+
+        return '{}"{}"'.format(column_filter, " ".join(get_terms(clause.value)))
+
+    return " AND ".join( '{}"{}"'.format(column_filter, term) for term in get_terms(clause.value) )
+
+# ==================================
+def get_fts_expression(alternatives):
+    """
+        Function to compile the text and phrase clauses of a parsed search query into an FTS5 expression
+
+        :param alternatives: the alternatives of clauses (see "app.search.query.parse_query")
+        :type alternatives: list(list(app.search.query.Clause))
+
+        :return: the expression, None if an alternative has no searched word (FTS5 cannot only exclude words)
+        :rtype: None | str
+    """
+
+    expressions = []
+
+    for clauses in alternatives:
+
+        included = [ get_fts_clause(clause) for clause in clauses if clause.kind != "range" and not clause.negated ]
+        excluded = [ get_fts_clause(clause) for clause in clauses if clause.kind != "range" and clause.negated ]
+
+        if not included:
+
+            return None
+
+        expressions.append("({})".format(" AND ".join(included)) + "".join( " NOT ({})".format(expression)
+                                                                            for expression in excluded ))
+
+    return " OR ".join( "({})".format(expression) for expression in expressions )
+
+# ======================
+def get_fts_ddl(model):
+    """
+        Function to get the statements which create the FTS5 table of a searchable model and its triggers
+
+        :param model: the searchable model
+        :type model: class
+
+        :return: the statements
+        :rtype: list(str)
+    """
+
+    table = model.__tablename__
+    fields = ", ".join(model.__searchable__)
+    new_values = ", ".join( "new.{}".format(field) for field in model.__searchable__ )
+    old_values = ", ".join( "old.{}".format(field) for field in model.__searchable__ )
+
+    delete_statement = "INSERT INTO {0}_fts({0}_fts, rowid, {1}) VALUES('delete', old.id, {2});".format(table,
+                                                                                                    fields,
+                                                                                                    old_values)
+    insert_statement = "INSERT INTO {0}_fts(rowid, {1}) VALUES(new.id, {2});".format(table, fields, new_values)
+
+    return ["CREATE VIRTUAL TABLE IF NOT EXISTS {0}_fts USING fts5({1}, content='{0}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')".format(table, fields),
+            "CREATE TRIGGER IF NOT EXISTS {0}_fts_insert AFTER INSERT ON {0} BEGIN {1} END".format(table,
+                                                                                                 insert_statement),
+            "CREATE TRIGGER IF NOT EXISTS {0}_fts_delete AFTER DELETE ON {0} BEGIN {1} END".format(table,
+                                                                                                 delete_statement),
+            "CREATE TRIGGER IF NOT EXISTS {0}_fts_update AFTER UPDATE OF {1} ON {0} BEGIN {2} {3} END".format(table,
+                                                                                                            fields,
+                                                                                                            delete_statement,
+                                                                                                            insert_statement)]
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,472 @@
+"""
+    Module to handle the in-process suggestions of titles (used when the search backend has no suggestion index)
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from unicodedata import category, normalize
+
+from app import db
+from app.search.backend import get_terms
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# =======================
+class PrefixTrie(object):
+    """
+        Class that represents a prefix tree : each key is split into characters and the values are stored
+        on the node of its last character
+    """
+
+    # =================
+    def __init__(self):
+        """
+            Class constructor
+        """
+
+        self.root = {}
+
+    # ============================
+    def insert(self, key, value):
+        """
+            Method to add a value associated to a key
+
+            :param key: the key
+            :type key: str
+
+            :param value: the value
+            :type value: object
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        node = self.root
+
+        for character in key:
+
+            node = node.setdefault(character, {})
+
+        node.setdefault(None, set()).add(value)
+
+    # ============================
+    def remove(self, key, value):
+        """
+            Method to remove a value associated to a key (the empty nodes are removed as well)
+
+            :param key: the key
+            :type key: str
+
+            :param value: the value
+            :type value: object
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        path = [self.root]
+
+        for character in key:
+
+            if character not in path[-1]:
+
+                return None
+
+            path.append(path[-1][character])
+
+        path[-1].get(None, set()).discard(value)
+
+        if not path[-1].get(None, True):
+
+            del path[-1][None]
+
+        for position in range(len(key), 0, -1):
+
+            if path[position]:
+
+                break
+
+            del path[position - 1][key[position - 1]]
+
+    # =================================
+    def search(self, prefix, limit):
+        """
+            Method to get the values whose key starts with a prefix (the shortest keys first)
+
+            :param prefix: the prefix
+            :type prefix: str
+
+            :param limit: the maximum number of values
+            :type limit: int
+
+            :return: the values
+            :rtype: list
+        """
+
+        node = self.root
+
+        for character in prefix:
+
+            node = node.get(character)
+
+            if node is None:
+
+                return []
+
+        values = []
+        level = [node]
+
+        # breadth-first traversal, so that the shortest completions come first
+        while level and len(values) < limit:
+
+            next_level = []
+
+            for node in level:
+
+                for character, child in sorted(node.items(), key = lambda item: item[0] or ""):
+
+                    if character is None:
+
+                        values.extend( value for value in sorted(child) if value not in values )
+
+                    else:
+
+                        next_level.append(child)
+
+            level = next_level
+
+        return values[:limit]
+
+# ============================
+class TitleSuggester(object):
+    """
+        Class that represents the in-process suggestions of titles : each word suffix of the titles (e.g.
+        "framework flask" and "flask" for "Framework Flask") is stored into a prefix tree per index and per owner,
+        so that the titles are suggested from the start of any of their words
+
+        The titles of an owner are loaded at their first use, maintained through "update", then loaded again once
+        they expire (i.e. with the changes committed by the other processes). Only the most recently used prefix
+        trees are kept
+    """
+
+    # ===========================
+    def __init__(self, ttl, size):
+        """
+            Class constructor
+
+            :param ttl: the lifetime of the prefix trees (in seconds)
+            :type ttl: float
+
+            :param size: the maximum number of prefix trees
+            :type size: int
+        """
+
+        self.ttl = ttl
+        self.size = size
+        self.lock = Lock()
+        self.tries = OrderedDict()
+        self.pending = []
+
+    # ==============================
+    def load(self, model, user_id):
+        """
+            Method to get the titles of the objects of a User, loaded from the database if needed
+
+            The changes committed while the titles are read are recorded, then applied to the loaded titles
+
+            :param model: the searchable model (with a "__search_suggest__" field)
+            :type model: class
+
+            :param user_id: the id of the User whose titles are loaded (all the titles if None)
+            :type user_id: None | int
+
+            :return: the prefix tree ("trie") and the title of each object ("entries")
+            :rtype: dict
+        """
+
+        key = (model.__tablename__, user_id)
+
+        with self.lock:
+
+            titles = self.tries.get(key)
+
+            if titles and titles["expiration"] > monotonic():
+
+                self.tries.move_to_end(key)
+
+                return titles
+
+            pending = (key, [])
+            self.pending.append(pending)
+
+        try:
+
+            owner = getattr(model, model.__search_owner__) if model.__search_owner__ else db.literal(None)
+
+            query = db.session.query(model.id, getattr(model, model.__search_suggest__))
+
+            if user_id is not None:
+
+                query = query.filter(owner == user_id)
+
+            titles = {"expiration": monotonic() + self.ttl, "trie": PrefixTrie(), "entries": {}}
+
+            for id, title in query:
+
+                add_title(titles, id, title)
+
+        finally:
+
+            with self.lock:
+
+                self.pending = [ item for item in self.pending if item is not pending ]
+
+        with self.lock:
+
+            for operation, id, title, owner_id in pending[1]:
+
+                apply_change(titles, user_id, operation, id, title, owner_id)
+
+            if self.size > 0:
+
+                self.tries[key] = titles
+                self.tries.move_to_end(key)
+
+                while len(self.tries) > self.size:
+
+                    self.tries.popitem(last = False)
+
+        return titles
+
+    # ============================
+    def update(self, changes):
+        """
+            Method to apply the committed changes of the searchable objects to the loaded titles (and to the ones
+            being loaded)
+
+            :param changes: the changes, each one being a tuple with the operation ("index" or "delete"),
+                            the index name, the object id, its title and the id of its owner
+            :type changes: list(tuple(str, str, int, None | str, None | int))
+
+            :return: Nothing
+            :rtype: None
+        """
+
+        with self.lock:
+
+            for operation, index, id, title, user_id in changes:
+
+                # an object given to another User is removed from the titles of its previous owner
+                for (key_index, key_user_id), titles in self.tries.items():
+
+                    if key_index == index:
+
+                        apply_change(titles, key_user_id, operation, id, title, user_id)
+
+                for (key_index, key_user_id), pending_changes in self.pending:
+
+                    if key_index == index:
+
+                        pending_changes.append((operation, id, title, user_id))
+
+    # =====================================================
+    def suggest(self, model, prefix, size, user_id = None):
+        """
+            Method to suggest the titles starting with a prefix (from the start of any of their words)
+
+            :param model: the searchable model
+            :type model: class
+
+            :param prefix: the typed text
+            :type prefix: str
+
+            :param size: the maximum number of suggestions
+            :type size: int
+
+            :param user_id: the id of the User whose titles are suggested
+            :type user_id: None | int
+
+            :return: the suggestions, each one being a dict with the "id" and "title" keys
+            :rtype: list(dict)
+        """
+
+        if user_id is None or not model.__search_owner__:
+
+            user_id = None
+
+        key = get_key(prefix)
+
+        if not key:
+
+            return []
+
+        titles = self.load(model, user_id)
+
+        with self.lock:
+
+            values = titles["trie"].search(key, size)
+
+        return [ {"id": id, "title": title} for title, id in sorted(values, key = lambda value: len(value[0]))[:size] ]
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# =================
+def get_key(text):
+    """
+        Function to get the key of a text into the prefix trees : its words in lowercase and without accents
+
+        :param text: the text
+        :type text: str
+
+        :return: the key
+        :rtype: str
+    """
+
+    text = "".join( character for character in normalize("NFKD", text) if category(character) != "Mn" )
+
+    key = " ".join(get_terms(text))
+
+    # the last word can be incomplete
+    if text[-1:].isspace() and key:
+
+        key += " "
+
+    return key
+
+# ========================
+def get_suffixes(title):
+    """
+        Function to get the keys of a title : the suffixes of its key starting with each of its words
+
+        :param title: the title
+        :type title: str
+
+        :return: the keys
+        :rtype: list(str)
+    """
+
+    words = get_key(title).split()
+
+    return [ " ".join(words[position:]) for position in range(len(words)) ]
+
+# ==================================
+def add_title(titles, id, title):
+    """
+        Function to add (or replace) the title of an object into loaded titles (see "TitleSuggester.load")
+
+        :param titles: the loaded titles
+        :type titles: dict
+
+        :param id: the object id
+        :type id: int
+
+        :param title: the title
+        :type title: None | str
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    remove_title(titles, id)
+
+    if not title:
+
+        return None
+
+    value = (title, id)
+
+    for key in get_suffixes(title):
+
+        titles["trie"].insert(key, value)
+
+    titles["entries"][id] = value
+
+# ===============================
+def remove_title(titles, id):
+    """
+        Function to remove the title of an object from loaded titles (see "TitleSuggester.load")
+
+        :param titles: the loaded titles
+        :type titles: dict
+
+        :param id: the object id
+        :type id: int
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    value = titles["entries"].pop(id, None)
+
+    if value is None:
+
+        return None
+
+    for key in get_suffixes(value[0]):
+
+        titles["trie"].remove(key, value)
+
+# ========================================================================
+def apply_change(titles, titles_user_id, operation, id, title, user_id):
+    """
+        Function to apply a committed change of a searchable object to loaded titles
+
+        :param titles: the loaded titles
+        :type titles: dict
+
+        :param titles_user_id: the id of the User whose titles are loaded (all the titles if None)
+        :type titles_user_id: None | int
+
+        :param operation: the operation ("index" or "delete")
+        :type operation: str
+
+        :param id: the object id
+        :type id: int
+
+        :param title: the title
+        :type title: None | str
+
+        :param user_id: the id of the owner of the object
+        :type user_id: None | int
+
+        :return: Nothing
+        :rtype: None
+    """
+
+    if operation == "index" and titles_user_id in (None, user_id):
+
+        add_title(titles, id, title)
+
+    else:
+
+        remove_title(titles, id)
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
@@ -0,0 +1,135 @@
+"""
+    Module to handle the TF-IDF vectors of texts (sublinear term frequencies, smoothed inverse document frequencies,
+    normalized vectors), used by the related articles (see "app.related") and by the semantic search (see
+    "app.search.semantic")
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+from collections import Counter
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+from app.search.backend import get_terms
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ====================================================================
+def get_frequencies_matrix(texts, vocabulary, extend_vocabulary = True):
+    """
+        Function to get the sublinear term frequencies (1 + log of the number of occurrences) of several texts
+
+        :param texts: the texts
+        :type texts: list(str)
+
+        :param vocabulary: the column of each term, completed with the new terms (ignored otherwise)
+        :type vocabulary: dict
+
+        :param extend_vocabulary: True if the new terms are added to the vocabulary
+        :type extend_vocabulary: bool
+
+        :return: the frequencies, one row per text and one column per term of the vocabulary
+        :rtype: scipy.sparse.csr_matrix
+    """
+
+    rows = []
+    columns = []
+    counts = []
+
+    for row, text in enumerate(texts):
+
+        for term, occurrences in Counter(get_terms(text)).items():
+
+            if extend_vocabulary:
+
+                vocabulary.setdefault(term, len(vocabulary))
+
+            elif term not in vocabulary:
+
+                continue
+
+            rows.append(row)
+            columns.append(vocabulary[term])
+            counts.append(occurrences)
+
+    return csr_matrix((1. + np.log(np.array(counts, dtype = np.float64)),
+                       (np.array(rows, dtype = np.int32), np.array(columns, dtype = np.int32))),
+                      shape = (len(texts), len(vocabulary)))
+
+# =======================================
+def get_inverse_frequencies(frequencies):
+    """
+        Function to get the smoothed inverse document frequencies of the terms of a frequencies matrix
+
+        :param frequencies: the frequencies (see "get_frequencies_matrix")
+        :type frequencies: scipy.sparse.csr_matrix
+
+        :return: the inverse document frequencies, one per column
+        :rtype: numpy.ndarray
+    """
+
+    document_frequencies = np.bincount(frequencies.indices, minlength = frequencies.shape[1])
+
+    return np.log((1. + frequencies.shape[0]) / (1. + document_frequencies)) + 1.
+
+# ==========================
+def normalize_rows(matrix):
+    """
+        Function to normalize the rows of a sparse matrix (the empty rows are kept)
+
+        :param matrix: the matrix
+        :type matrix: scipy.sparse.spmatrix
+
+        :return: the rows of unit length
+        :rtype: scipy.sparse.csr_matrix
+    """
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis = 1)).ravel())
+    norms[norms == 0] = 1.
+
+    return (diags(1. / norms) @ matrix).tocsr()
+
+# ==========================
+def get_tfidf_matrix(texts):
+    """
+        Function to get the TF-IDF vectors of several texts
+
+        :param texts: the texts
+        :type texts: list(str)
+
+        :return: the normalized vectors, one row per text
+        :rtype: scipy.sparse.csr_matrix
+    """
+
+    frequencies = get_frequencies_matrix(texts, {})
+
+    return normalize_rows(frequencies @ diags(get_inverse_frequencies(frequencies)))
+
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
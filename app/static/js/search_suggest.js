@@ -0,0 +1,101 @@
+$(function ()
+{
+    /* Variables */
+    /* --------- */
+
+    let search_field = $("#q");
+    let suggestions_list = $("#search-suggestions");
+    let delay = 200;            /* délai (en ms) sans frappe avant de demander les suggestions */
+    let timer = null;
+    let pending_request = null;
+    let suggestions_cache = {};  /* suggestions déjà reçues, par texte saisi */
+    let current_suggestions = [];
+
+    /* Fonctions */
+    /* --------- */
+
+    /* Function that displays the suggestions */
+    let display_suggestions = function(suggestions)
+    {
+        current_suggestions = suggestions;
+        suggestions_list.empty();
+
+        $.each(suggestions, function(index, suggestion)
+        {
+            suggestions_list.append($("<option>").attr("value", suggestion.title));
+        });
+    };
+
+    /* Function that handles the request to get the suggestions of the typed text */
+    let suggest_request = function()
+    {
+        let text = search_field.val();
+
+        if (text.trim() === "")
+        {
+            display_suggestions([]);
+            return;
+        }
+
+        if (text in suggestions_cache)
+        {
+            display_suggestions(suggestions_cache[text]);
+            return;
+        }
+
+        /* only the answer of the last typed text is useful */
+        if (pending_request)
+        {
+            pending_request.abort();
+        }
+
+        pending_request = $.ajax(
+        {
+            url: search_field.attr("data-suggest-url"),
+            type: "GET",
+            data: {q: text},
+            dataType: 'json',
+            success: function(data)
+            {
+                suggestions_cache[text] = data.suggestions;
+                display_suggestions(data.suggestions);
+            },
+            complete: function()
+            {
+                pending_request = null;
+            }
+        });
+    };
+
+    /* Function that handles the typing : the suggestions are requested once the typing pauses, and a selected
+       suggestion opens its article */
+    let typing_handler = function(event)
+    {
+        let text = search_field.val();
+        let input_type = event.originalEvent ? event.originalEvent.inputType : undefined;
+
+        /* a suggestion selected into the list is not typed */
+        if (input_type === undefined || input_type === "insertReplacementText")
+        {
+            for (let suggestion of current_suggestions)
+            {
+                if (suggestion.title === text)
+                {
+                    window.location = suggestion.url;
+                    return;
+                }
+            }
+        }
+
+        clearTimeout(timer);
+        timer = setTimeout(suggest_request, delay);
+    };
+
+    /* Links */
+    /* ----- */
+
+    if (search_field.attr("data-suggest-url"))
+    {
+        search_field.on("input", typing_handler);
+    }
+});
@@ -13,13 +13,14 @@ sys.path.append("../..")
 
 from unittest import TestCase, main
 
-from flask import url_for
+from flask import session, url_for
 from flask_login import current_user
 
 from app import create_app, db
 from app.models import User, Article, Reference
 
 from app.auth.forms import LoginForm
+from app.draft import DRAFT_DESCRIPTION_LENGTH, DRAFT_MAX_REFERENCES, DRAFT_SESSION_KEY
 
 from config import Config
 
@@ -163,6 +164,141 @@ class TestUserModel(TestCase):
             assert b"Bienvenue sur le site du Synthetiseur" in logout_response.get_data()
             assert not b"Salut Bob !" in logout_response.get_data()
 
+    # ============================================
+    def test_create_article_with_draft(self):
+        """
+            Method to test the creation of an article with references added to its draft
+        """
+
+        with self.client as current_client:
+
+            self.login()
+
+            # the references of a new article are kept into the draft, not into the database
+            response = current_client.post("/add_reference/1/-1", data = {"references": "www.bidon.fr"})
+            self.assertEqual(response.status_code, 200)
+            assert b"www.bidon.fr" in response.get_json()["html_form"].encode("utf-8")
+
+            current_client.post("/add_reference/1/-1", data = {"references": "Python"})
+            current_client.post("/add_reference/1/-1", data = {"references": "aze"})
+
+            response = current_client.get("/delete_reference/3/-1")
+            assert not b"aze" in response.get_json()["html_form"].encode("utf-8")
+
+            self.assertEqual(Article.query.count(), 0)
+            self.assertEqual(Reference.query.count(), 0)
+
+            # read-only pages do not need any draft handling
+            response = current_client.get("/user_articles_list")
+            self.assertEqual(response.status_code, 200)
+
+            # the draft references are attached to the article once it is created
+            response = current_client.post("/create_article",
+                                           data = {"title": "Test 1", "synthesis": "Synthèse 1"},
+                                           follow_redirects = True)
+
+            self.assertEqual(response.status_code, 200)
+
+            article = Article.query.filter_by(title = "Test 1").first()
+
+            self.assertEqual(Article.query.count(), 1)
+            self.assertEqual([ reference.description for reference in article.references ], ["www.bidon.fr", "Python"])
+
+            # the draft is cleared once the article is created
+            response = current_client.get("/create_article")
+            assert not b"www.bidon.fr" in response.get_data()
+
+    # =============================
+    def test_draft_limits(self):
+        """
+            Method to test that the draft kept into the session cookie is bounded, and that it is cleared on logout
+        """
+
+        with self.client as current_client:
+
+            self.login()
+
+            for number in range(DRAFT_MAX_REFERENCES + 1):
+
+                current_client.post("/add_reference/1/-1", data = {"references": "{} {}".format(number, "x" * 200)})
+
+            references = session[DRAFT_SESSION_KEY]["references"]
+
+            self.assertEqual(len(references), DRAFT_MAX_REFERENCES)
+            self.assertEqual(len(references[0]["description"]), DRAFT_DESCRIPTION_LENGTH)
+
+            self.logout()
+
+            self.assertNotIn(DRAFT_SESSION_KEY, session)
+
+    # ===================
+    def test_search(self):
+        """
+            Method to test the view function to search for articles
+        """
+
+        test_user = User.query.filter_by(username = self.test_user["username"]).first()
+
+        db.session.add_all([Article(title = "Python", synthesis = "Un langage", author = test_user),
+                            Article(title = "Flask", synthesis = "Un framework Python", author = test_user),
+                            Article(title = "Rust", synthesis = "Un autre langage", author = test_user)])
+        db.session.commit()
+
+        with self.client as current_client:
+
+            self.login()
+
+            response = current_client.get("/search?q=python")
+
+            self.assertEqual(response.status_code, 200)
+            assert b"Flask" in response.get_data()
+            assert not b"Rust" in response.get_data()
+
+            # a misspelled search is corrected
+            response = current_client.get("/search?q=langgae")
+
+            assert "Vouliez-vous dire".encode("utf-8") in response.get_data()
+            assert b"search?q=langage" in response.get_data()
+
+            # a search with enough results is not corrected
+            self.app.config["SEARCH_SPELLING_MAX_RESULTS"] = 1
+
+            response = current_client.get("/search?q=python OR langgae")
+
+            assert not "Vouliez-vous dire".encode("utf-8") in response.get_data()
+
+    # ===========================
+    def test_search_suggest(self):
+        """
+            Method to test the view function to suggest the titles of the articles while typing a search
+        """
+
+        test_user = User.query.filter_by(username = self.test_user["username"]).first()
+        other_user = User(username = "Alice", email = "other dummy data")
+
+        db.session.add_all([Article(title = "Le framework Flask", synthesis = "", author = test_user),
+                            Article(title = "Fluent Python", synthesis = "", author = test_user),
+                            Article(title = "Flask Web Development", synthesis = "", author = other_user)])
+        db.session.commit()
+
+        with self.client as current_client:
+
+            self.login()
+
+            response = current_client.get("/search/suggest?q=fl")
+
+            self.assertEqual([ suggestion["title"] for suggestion in response.get_json()["suggestions"] ],
+                             ["Fluent Python", "Le framework Flask"])
+
+            # the suggestions follow the committed changes
+            db.session.add(Article(title = "Flask-Login", synthesis = "", author = test_user))
+            db.session.commit()
+
+            response = current_client.get("/search/suggest?q=FLASK")
+
+            self.assertEqual([ suggestion["title"] for suggestion in response.get_json()["suggestions"] ],
+                             ["Flask-Login", "Le framework Flask"])
+            self.assertEqual(response.get_json()["suggestions"][0]["url"], "/article/4")
 
     # # ============================
     # def tets_create_article(self):
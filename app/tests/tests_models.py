@@ -14,7 +14,8 @@ sys.path.append("../..")
 from unittest import TestCase, main
 
 from app import create_app, db
-from app.models import User, Article, Reference
+from app.models import User, Article, Reference, RelatedArticle, RelatedChange
+from app.related import drain_related_changes, rebuild_related_articles
 
 from config import Config
 
@@ -145,6 +146,51 @@ class TestUserModel(TestCase):
 
         self.assertEqual(test_user_1_articles_references, ["www.bidon.fr", "Python", "aze", "tut", "tot"])
 
+    # ==============================
+    def test_article_count(self):
+        """
+            Test of the articles counter :
+
+            - update on Article insertion and deletion
+            - "get_article_count" method
+            - "repair_article_counts" method
+        """
+
+        test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(test_user)
+        db.session.commit()
+
+        self.assertEqual(test_user.get_article_count(), 0)
+
+        test_article_1 = Article(title = "Test 1", synthesis = "Synthèse 1", author = test_user)
+        test_article_2 = Article(title = "Test 2", synthesis = "Synthèse 2", author = test_user)
+        db.session.add_all([test_article_1, test_article_2])
+        db.session.commit()
+
+        self.assertEqual(test_user.get_article_count(), 2)
+
+        db.session.delete(test_article_1)
+        db.session.commit()
+
+        self.assertEqual(test_user.get_article_count(), 1)
+
+        # a missing or wrong counter is repaired by the "flask articles recount" command
+        test_user.article_count = None
+        db.session.commit()
+
+        self.assertEqual(test_user.get_article_count(), 1)
+
+        test_user.article_count = 12
+        db.session.commit()
+
+        test_user_id = test_user.id
+
+        result = self.app.test_cli_runner().invoke(args = ["articles", "recount"])
+
+        self.assertIn("1 user(s) repaired", result.output)
+        self.assertEqual(User.query.get(test_user_id).get_article_count(), 1)
+        self.assertEqual(User.repair_article_counts(), 0)
+
     # ==============================
     def test_password_hashing(self):
         """
@@ -402,6 +448,75 @@ class TestArticleModel(TestCase):
         self.assertEqual(test_article.title, data["title"])
         self.assertEqual(test_article.synthesis, data["synthesis"])
 
+    # ===============================
+    def test_related_articles(self):
+        """
+            Test of the related articles, updated once the committed changes of the articles are drained
+        """
+
+        test_user_1 = User(username = "Bob", email = "dummy data")
+        test_user_2 = User(username = "Alice", email = "other dummy data")
+        db.session.add_all([test_user_1, test_user_2])
+        db.session.commit()
+
+        article_1 = Article(title = "Python", synthesis = "Le langage Python est interprété", user_id = test_user_1.id)
+        article_2 = Article(title = "Langage Python", synthesis = "Les générateurs du langage", user_id = test_user_1.id)
+        article_3 = Article(title = "Cuisine", synthesis = "La recette de la tarte aux pommes", user_id = test_user_1.id)
+        article_4 = Article(title = "Pâtisserie", synthesis = "Une tarte aux pommes", user_id = test_user_1.id)
+        article_5 = Article(title = "Python 3", synthesis = "Le langage Python", user_id = test_user_2.id)
+        db.session.add_all([article_1, article_2, article_3, article_4, article_5])
+        db.session.commit()
+
+        # the changes are queued within the transaction, then handled in background once delayed (so that the later
+        # changes of a User are handled at once)
+        self.assertEqual(RelatedChange.query.count(), 5)
+        self.assertEqual(article_1.get_related_articles(), [])
+        self.assertEqual(drain_related_changes(), 0)
+        self.assertEqual(drain_related_changes(delay = 0), 5)
+        self.assertEqual(RelatedChange.query.count(), 0)
+
+        # the articles of the other Users are never related
+        self.assertEqual(article_1.get_related_articles(), [article_2])
+        self.assertEqual(article_3.get_related_articles(), [article_4])
+        self.assertEqual(article_5.get_related_articles(), [])
+
+        # a modified article is related to the other articles once committed, even to the unchanged ones
+        article_3.synthesis = "La recette du langage Python"
+        db.session.commit()
+        drain_related_changes(delay = 0)
+
+        self.assertIn(article_3, article_1.get_related_articles())
+        self.assertIn(article_1, article_3.get_related_articles())
+
+        # a removed article is not related anymore
+        db.session.delete(article_2)
+        db.session.commit()
+        drain_related_changes(delay = 0)
+
+        self.assertNotIn(article_2, article_1.get_related_articles())
+        self.assertEqual(RelatedArticle.query.filter(db.or_(RelatedArticle.article_id == article_2.id,
+                                                            RelatedArticle.related_id == article_2.id)).count(), 0)
+
+        # the changes that have not been committed are ignored
+        article_4.title = "Python 2"
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertEqual(RelatedChange.query.count(), 0)
+
+        self.assertNotIn(article_4, article_1.get_related_articles())
+
+        # the whole computation gives the same related articles
+        related_ids = [ (related_article.article_id, related_article.related_id)
+                        for related_article in RelatedArticle.query.order_by(RelatedArticle.article_id,
+                                                                             RelatedArticle.related_id) ]
+
+        self.assertEqual(rebuild_related_articles(), 4)
+        self.assertEqual([ (related_article.article_id, related_article.related_id)
+                           for related_article in RelatedArticle.query.order_by(RelatedArticle.article_id,
+                                                                                RelatedArticle.related_id) ],
+                         related_ids)
+
 # =================================
 class TestReferenceModel(TestCase):
     """
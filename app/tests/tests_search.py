@@ -0,0 +1,2182 @@
+"""
+    Module to test the search indexes handling
+"""
+
+# ==================================================================================================
+#
+# IMPORTS
+#
+# ==================================================================================================
+
+import os
+import sys
+sys.path.append("../..")
+
+from unittest import TestCase, main
+
+from elasticsearch.exceptions import ConnectionError
+
+from app import create_app, db
+from app.models import User, Article, Reference, SearchOutbox, SearchRebuild, SearchTombstone
+from app.indexing import drain_outbox, get_search_metrics, get_id_ranges, rebuild_index, reindex, sync_index, \
+                         verify_index
+from app.search import correct_query, create_search_semantic, query_index, invalidate_search_cache, suggest, \
+                       SearchResult
+from app.search.backend import get_checksum_hash, get_source_fields
+from app.search.breaker import CircuitBreaker
+from app.search.es import ElasticsearchBackend, get_es_query
+from app.search.query import Clause, normalize_query, parse_query, parse_range
+from app.search.semantic import benchmark_semantic_search, build_semantic_model, get_truncated_svd
+from app.search.spelling import get_distance
+from app.search.sql import SQLBackend, SQLiteFTSBackend
+from app.search.suggest import PrefixTrie, get_key, get_suffixes
+from app.search.cache import SearchCache
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from calendar import timegm
+from datetime import datetime
+from fnmatch import fnmatch
+from html import escape
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from config import Config
+
+
+# ==================================================================================================
+#
+# INITIALIZATIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# CLASSES
+#
+# ==================================================================================================
+
+# =======================
+class TestConfig(Config):
+    """
+        Class to configure the tests
+    """
+
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    ELASTICSEARCH_URL = None
+    SEARCH_BACKEND = "elasticsearch"
+
+# =============================
+class SQLiteTestConfig(TestConfig):
+    """
+        Class to configure the tests of the SQLite FTS5 search backend
+    """
+
+    SEARCH_BACKEND = "sqlite"
+
+# ===============================
+class SQLTestConfig(TestConfig):
+    """
+        Class to configure the tests of the generic SQL search backend
+    """
+
+    SEARCH_BACKEND = "sql"
+
+# ==============================
+class FakeIndices(object):
+    """
+        Class to replace the indices client of Elasticsearch during the tests : the created indexes and the
+        aliases are kept into dicts
+    """
+
+    # =========================
+    def __init__(self, client):
+        """
+            Class constructor
+        """
+
+        self.client = client
+        self.indexes = {}
+        self.aliases = {}
+        self.settings = {}
+
+    # =======================
+    def resolve(self, index):
+        """
+            Method to get the index behind a name (an alias or an index)
+        """
+
+        return self.aliases.get(index, index)
+
+    # ===============================
+    def exists(self, index, **kwargs):
+        """
+            Method to check if an index exists
+        """
+
+        return index in self.indexes or index in self.aliases
+
+    # =====================================
+    def create(self, index, body, **kwargs):
+        """
+            Method to create an index
+        """
+
+        self.indexes[index] = body
+
+        for alias in body.get("aliases", {}):
+
+            self.aliases[alias] = index
+
+    # ===============================
+    def delete(self, index, **kwargs):
+        """
+            Method to delete an index
+        """
+
+        self.indexes.pop(index, None)
+
+        for key in [ key for key in self.client.stored_documents if key[0] == index ]:
+
+            self.client.stored_documents.pop(key)
+
+        self.aliases = { alias: name for alias, name in self.aliases.items() if name != index }
+
+    # ============================
+    def get(self, index, **kwargs):
+        """
+            Method to get the indexes matching a pattern
+        """
+
+        return { name: body for name, body in self.indexes.items() if fnmatch(name, index) }
+
+    # ====================================
+    def exists_alias(self, name, **kwargs):
+        """
+            Method to check if an alias exists
+        """
+
+        return name in self.aliases
+
+    # =================================
+    def get_alias(self, name, **kwargs):
+        """
+            Method to get the indexes of an alias
+        """
+
+        return {self.aliases[name]: {"aliases": {name: {}}}}
+
+    # =====================================
+    def update_aliases(self, body, **kwargs):
+        """
+            Method to execute several aliases actions
+        """
+
+        for action in body["actions"]:
+
+            operation, parameters = list(action.items())[0]
+
+            if operation == "add":
+
+                self.aliases[parameters["alias"]] = parameters["index"]
+
+            elif operation == "remove_index":
+
+                self.delete(parameters["index"])
+
+    # =========================================
+    def put_settings(self, index, body, **kwargs):
+        """
+            Method to update the settings of an index
+        """
+
+        self.settings[index] = body
+
+    # ================================
+    def refresh(self, index, **kwargs):
+        """
+            Method to refresh an index
+        """
+
+        pass
+
+# ================================
+class FakeElasticsearch(object):
+    """
+        Class to replace the Elasticsearch client during the tests : the documents are kept into a dict
+        and the received requests are recorded
+    """
+
+    # =================
+    def __init__(self):
+        """
+            Class constructor
+        """
+
+        self.stored_documents = {}
+        self.stored_routings = {}
+        self.operations = []
+        self.requests = []
+        self.indices = FakeIndices(self)
+        self.available = True
+
+    # ================
+    @property
+    def documents(self):
+        """
+            Property that gives the documents, by index name (or alias) and id
+        """
+
+        return self.get_view(self.stored_documents)
+
+    # ===============
+    @property
+    def routings(self):
+        """
+            Property that gives the routings of the documents, by index name (or alias) and id
+        """
+
+        return self.get_view(self.stored_routings)
+
+    # ===========================
+    def get_view(self, values):
+        """
+            Method to get values of the documents, by index name (their alias, if any) and id
+        """
+
+        names = { index: alias for alias, index in self.indices.aliases.items() }
+
+        return { (names.get(index, index), id): value for (index, id), value in values.items() }
+
+    # ===========================
+    def check_availability(self):
+        """
+            Method to simulate an Elasticsearch outage
+        """
+
+        if not self.available:
+
+            raise ConnectionError("N/A", "Elasticsearch is not available", None)
+
+    # ===========================================
+    def index(self, index, id, body, **kwargs):
+        """
+            Method to index a document
+        """
+
+        self.check_availability()
+        self.requests.append(("index", index, int(id)))
+        self.stored_documents[(self.indices.resolve(index), int(id))] = body
+
+    # ===================================
+    def delete(self, index, id, **kwargs):
+        """
+            Method to delete a document
+        """
+
+        self.check_availability()
+        self.requests.append(("delete", index, int(id)))
+        self.stored_documents.pop((self.indices.resolve(index), int(id)), None)
+
+    # =============================
+    def bulk(self, body, **kwargs):
+        """
+            Method to execute several operations
+        """
+
+        self.check_availability()
+        self.requests.append(("bulk", len(body)))
+        self.last_bulk_body = body
+        self.last_bulk_refresh = kwargs.get("refresh")
+
+        items = []
+        lines = iter(body)
+
+        for line in lines:
+
+            operation, metadata = list(line.items())[0]
+            key = (self.indices.resolve(metadata["_index"]), int(metadata["_id"]))
+
+            self.stored_routings[key] = metadata.get("_routing")
+            self.operations.append((operation, key[1]))
+
+            if operation == "index":
+
+                self.stored_documents[key] = next(lines)
+
+            elif operation == "update":
+
+                update = next(lines)
+
+                if key in self.stored_documents or not update.get("doc_as_upsert"):
+
+                    self.stored_documents[key].update(update["doc"])
+
+                else:
+
+                    self.stored_documents[key] = dict(update["doc"])
+
+            else:
+
+                self.stored_documents.pop(key, None)
+
+            items.append({operation: {"_id": metadata["_id"], "status": 200}})
+
+        return {"errors": False, "items": items}
+
+    # =======================================
+    def search(self, index, body, **kwargs):
+        """
+            Method to search for documents (every document containing the searched text gets the same score)
+        """
+
+        self.check_availability()
+        self.requests.append(("search", body))
+
+        return self.get_response(index, body)
+
+    # ===============================
+    def msearch(self, body, **kwargs):
+        """
+            Method to run several searches (each one being a header and a body)
+        """
+
+        self.check_availability()
+        self.requests.append(("msearch", len(body) // 2))
+
+        return {"responses": [ self.get_response(header["index"], search_body)
+                               for header, search_body in zip(body[::2], body[1::2]) ]}
+
+    # ====================================
+    def get_response(self, index, body):
+        """
+            Method to get the response of a search
+        """
+
+        if "range" in body["query"]:
+
+            return self.get_range_response(index, body)
+
+        filters = [ list(clause["term"].items())[0] for clause in body["query"]["bool"]["filter"] ]
+
+        # the suggestions match the prefixes of the words
+        if "match" in body["query"]["bool"]["must"]:
+
+            field, query = list(body["query"]["bool"]["must"]["match"].items())[0]
+            fields = [field.split(".")[0]]
+            matches = lambda word, text: any( text_word.startswith(word) for text_word in text.split() )
+
+        # only the words of the first alternative are searched
+        else:
+
+            query = body["query"]["bool"]["must"]["bool"]["must"][0]
+
+            # the fuzzy queries are searched exactly
+            if "bool" in query:
+
+                query = query["bool"]["should"][0]
+
+            query = query["multi_match"]
+            fields = query["fields"]
+            matches = lambda word, text: word in text
+
+        hits = [ dict({"_id": str(id), "sort": [1.0, id]}, **self.get_source(document, body))
+                 for (document_index, id), document in sorted(self.stored_documents.items())
+                 if document_index == self.indices.resolve(index)
+                 and all( document.get(field) == value for field, value in filters )
+                 and all( any( matches(word, str(document.get(field)).lower()) for field in fields )
+                          for word in query["query"].lower().split() ) ]
+
+        total = len(hits)
+
+        if "search_after" in body:
+
+            hits = [ hit for hit in hits if hit["sort"][1] > body["search_after"][1] ]
+
+        else:
+
+            hits = hits[body.get("from", 0):]
+
+        return {"hits": {"total": {"value": total}, "hits": hits[:body["size"]]}}
+
+    # =====================================
+    def get_source(self, document, body):
+        """
+            Method to get the returned fields of a document, and the beginning of its highlighted fields
+        """
+
+        hit = {"_source": { field: value for field, value in document.items()
+                            if field in body.get("_source", document) }}
+
+        if "highlight" in body:
+
+            size = body["highlight"]["fragment_size"]
+
+            hit["highlight"] = { field: [escape(document[field][:size])] for field in body["highlight"]["fields"]
+                                 if document.get(field) }
+
+        return hit
+
+    # ==========================================
+    def get_range_response(self, index, body):
+        """
+            Method to get the response of a search of the documents between two ids (the checksums of their
+            buckets or their update dates)
+        """
+
+        bounds = body["query"]["range"]["id"]
+
+        documents = [ (id, timegm(document["update_date"].utctimetuple()), self.stored_routings.get((name, id)))
+                      for (name, id), document in sorted(self.stored_documents.items())
+                      if name == self.indices.resolve(index) and bounds["gte"] <= id <= bounds["lte"] ]
+
+        if "aggs" in body:
+
+            size = body["aggs"]["buckets"]["histogram"]["interval"]
+            buckets = {}
+
+            for id, update_date, routing in documents:
+
+                bucket = buckets.setdefault(id - id % size, {"key": float(id - id % size), "doc_count": 0,
+                                                             "hashes": {"value": 0.}})
+                bucket["doc_count"] += 1
+                bucket["hashes"]["value"] += get_checksum_hash(id, update_date)
+
+            return {"hits": {"hits": []}, "aggregations": {"buckets": {"buckets": list(buckets.values())}}}
+
+        return {"hits": {"hits": [ {"_id": str(id), "_routing": routing, "fields": {"update_date": [str(update_date)]}}
+                                   for id, update_date, routing in documents[:body["size"]] ]}}
+
+# ==============================
+class TestSearchOutbox(TestCase):
+    """
+        Class to test the indexing outbox
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(TestConfig)
+        self.app.config["SEARCH_OUTBOX_ENABLED"] = True
+        self.app.elasticsearch = FakeElasticsearch()
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(self.test_user)
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ===================================
+    def test_changes_written_to_outbox(self):
+        """
+            Method to test that the commits write into the outbox instead of calling Elasticsearch
+        """
+
+        test_article = Article(title = "Test 1", synthesis = "Synthèse 1", author = self.test_user)
+        db.session.add(test_article)
+        db.session.commit()
+
+        entries = SearchOutbox.query.all()
+
+        self.assertEqual([ (entry.operation, entry.index, entry.object_id) for entry in entries ],
+                         [("index", "article", test_article.id)])
+        self.assertEqual(self.app.elasticsearch.requests, [])
+
+        # the outbox entries are not written if the transaction is rolled back
+        db.session.add(Article(title = "Test 2", synthesis = "Synthèse 2", author = self.test_user))
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertEqual(SearchOutbox.query.count(), 1)
+        self.assertEqual(get_search_metrics()["outbox_depth"], 1)
+
+    # ========================
+    def test_drain_outbox(self):
+        """
+            Method to test the sending of the outbox content to Elasticsearch
+        """
+
+        test_article_1 = Article(title = "Test 1", synthesis = "Synthèse 1", author = self.test_user)
+        test_article_2 = Article(title = "Test 2", synthesis = "Synthèse 2", author = self.test_user)
+        db.session.add_all([test_article_1, test_article_2])
+        db.session.commit()
+
+        test_article_1.synthesis = "Synthèse 1 modifiée"
+        db.session.commit()
+
+        test_article_2_id = test_article_2.id
+        db.session.delete(test_article_2)
+        db.session.commit()
+
+        self.assertEqual(SearchOutbox.query.count(), 4)
+
+        self.assertEqual(drain_outbox(), 4)
+
+        # a single "_bulk" request with the current state of each object
+        self.assertEqual(self.app.elasticsearch.requests, [("bulk", 3)])
+        self.assertEqual(self.app.elasticsearch.documents,
+                         {("article", test_article_1.id): {"id": test_article_1.id,
+                                                           "title": "Test 1",
+                                                           "synthesis": "Synthèse 1 modifiée",
+                                                           "references": [],
+                                                           "update_date": test_article_1.update_date,
+                                                           "user_id": self.test_user.id}})
+        self.assertNotIn(("article", test_article_2_id), self.app.elasticsearch.documents)
+
+        self.assertEqual(SearchOutbox.query.count(), 0)
+        self.assertEqual(drain_outbox(), 0)
+
+        # a new reference only updates the references of the document
+        db.session.add(Reference(description = "Référence", article = test_article_1))
+        db.session.commit()
+
+        self.assertEqual([ entry.operation for entry in SearchOutbox.query ], ["update"])
+        self.assertEqual(drain_outbox(), 1)
+        self.assertEqual(self.app.elasticsearch.documents[("article", test_article_1.id)]["references"], ["Référence"])
+        self.assertEqual(self.app.elasticsearch.documents[("article", test_article_1.id)]["update_date"],
+                         Article.query.get(test_article_1.id).update_date)
+
+    # =====================================
+    def test_drain_outbox_with_outage(self):
+        """
+            Method to test the retries when Elasticsearch is not available
+        """
+
+        db.session.add(Article(title = "Test 1", synthesis = "Synthèse 1", author = self.test_user))
+        db.session.commit()
+
+        self.app.elasticsearch.available = False
+
+        self.assertEqual(drain_outbox(), 0)
+
+        entry = SearchOutbox.query.one()
+
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn("Elasticsearch is not available", entry.last_error)
+
+        # the entry is retried only once the back-off delay is elapsed
+        self.app.elasticsearch.available = True
+
+        self.assertEqual(drain_outbox(), 0)
+        self.assertEqual(get_search_metrics()["outbox_retrying"], 1)
+
+        entry.next_attempt_date = entry.creation_date
+        db.session.commit()
+
+        self.assertEqual(drain_outbox(), 1)
+        self.assertEqual(get_search_metrics()["outbox_depth"], 0)
+
+# ================================
+class TestSearchIndexing(TestCase):
+    """
+        Class to test the indexing performed at commit time (i.e. without the indexing outbox)
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(TestConfig)
+        self.app.elasticsearch = FakeElasticsearch()
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(self.test_user)
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ========================================
+    def test_single_bulk_request_per_commit(self):
+        """
+            Method to test that the changes of a commit are coalesced into a single "_bulk" request
+        """
+
+        test_articles = [ Article(title = "Test {}".format(number), synthesis = "Synthèse", author = self.test_user)
+                          for number in range(10) ]
+
+        db.session.add_all(test_articles)
+        db.session.flush()
+
+        # the same article is both added and modified within the transaction : it is sent only once
+        test_articles[0].synthesis = "Synthèse modifiée"
+        db.session.flush()
+
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.requests, [("bulk", 20)])
+        self.assertEqual(len(self.app.elasticsearch.documents), 10)
+        self.assertEqual(self.app.elasticsearch.documents[("article", test_articles[0].id)]["synthesis"],
+                         "Synthèse modifiée")
+
+    # =======================================
+    def test_last_operation_is_kept(self):
+        """
+            Method to test that only the last operation on an object is sent
+        """
+
+        test_article = Article(title = "Test 1", synthesis = "Synthèse 1", author = self.test_user)
+        db.session.add(test_article)
+        db.session.commit()
+
+        test_article.synthesis = "Synthèse modifiée"
+        db.session.flush()
+
+        db.session.delete(test_article)
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.requests, [("bulk", 2), ("bulk", 1)])
+        self.assertEqual(self.app.elasticsearch.documents, {})
+
+        # nothing is sent for a rolled back transaction
+        db.session.add(Article(title = "Test 2", synthesis = "Synthèse 2", author = self.test_user))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+
+        self.assertEqual(len(self.app.elasticsearch.requests), 2)
+
+    # ===================
+    def test_reindex(self):
+        """
+            Method to test the reindexing of all the articles by chunks
+        """
+
+        db.session.add_all([ Article(title = "Test {}".format(number), synthesis = "Synthèse", author = self.test_user)
+                             for number in range(25) ])
+        db.session.commit()
+
+        self.app.elasticsearch = FakeElasticsearch()
+
+        progress = []
+
+        self.assertEqual(reindex(Article, chunk_size = 10, callback = progress.append), (25, 0))
+        self.assertEqual(progress, [10, 10, 5])
+        self.assertEqual(self.app.elasticsearch.requests, [("bulk", 20), ("bulk", 20), ("bulk", 10)])
+        self.assertEqual(len(self.app.elasticsearch.documents), 25)
+
+        # partial reindexing
+        self.assertEqual(Article.reindex(chunk_size = 10, min_id = 5, max_id = 9), (5, 0))
+
+        result = self.app.test_cli_runner().invoke(args = ["search", "reindex", "--chunk-size", "10"])
+
+        self.assertIn("25 documents indexed", result.output)
+
+    # ====================================
+    def test_search_after_pagination(self):
+        """
+            Method to test that the pages following the first one are reached through "search_after"
+        """
+
+        db.session.add_all([ Article(title = "Python {}".format(number), synthesis = "", author = self.test_user)
+                             for number in range(5) ])
+        db.session.commit()
+
+        articles, total, cursor = Article.search("python", 1, 2)
+
+        self.assertEqual(total, 5)
+        self.assertEqual([ article.title for article in articles ], ["Python 0", "Python 1"])
+
+        articles, total, cursor = Article.search("python", 2, 2, cursor = cursor)
+
+        self.assertEqual([ article.title for article in articles ], ["Python 2", "Python 3"])
+
+        body = self.app.elasticsearch.requests[-1][1]
+
+        self.assertEqual(body["search_after"], [1.0, 2])
+        self.assertNotIn("from", body)
+        self.assertEqual(body["sort"], [{"_score": "desc"}, {"id": "asc"}])
+
+        # the pages can still be reached through their number
+        self.assertEqual([ article.id for article in Article.search("python", 2, 2)[0] ],
+                         [ article.id for article in articles ])
+
+        articles, total, cursor = Article.search("python", 3, 2, cursor = cursor)
+
+        self.assertEqual([ article.title for article in articles ], ["Python 4"])
+
+        with self.assertRaises(ValueError):
+
+            Article.search("python", 2, 2, cursor = "invalid")
+
+    # ======================================
+    def test_search_results_from_index(self):
+        """
+            Method to test that the search results are built from the documents of the index
+        """
+
+        test_article = Article(title = "Python", synthesis = "Un langage", author = self.test_user)
+        db.session.add(test_article)
+        db.session.commit()
+
+        # the dates are serialized by Elasticsearch
+        self.app.elasticsearch.documents[("article", test_article.id)]["update_date"] = "2020-05-17T10:30:00.123456"
+
+        results, total, cursor = Article.search("python", 1, 10)
+
+        self.assertIsInstance(results[0], SearchResult)
+        self.assertEqual((results[0].id, results[0].title, results[0].highlights), (test_article.id, "Python", ["Un langage"]))
+        self.assertEqual(results[0].update_date, datetime(2020, 5, 17, 10, 30, 0, 123456))
+
+        # only fragments of the synthesis are returned
+        body = self.app.elasticsearch.requests[-1][1]
+
+        self.assertNotIn("synthesis", body["_source"])
+        self.assertEqual(body["highlight"]["fragment_size"], self.app.config["SEARCH_HIGHLIGHT_FRAGMENT_SIZE"])
+        self.assertNotIn("synthesis", vars(results[0]))
+
+        # the documents indexed without every field are loaded from the database
+        del self.app.elasticsearch.documents[("article", test_article.id)]["update_date"]
+        invalidate_search_cache()
+
+        self.assertEqual(Article.search("python", 1, 10)[0], [test_article])
+
+        self.app.config["SEARCH_RESULTS_FROM_INDEX"] = False
+        self.app.elasticsearch.documents[("article", test_article.id)]["update_date"] = "2020-05-17T10:30:00.123456"
+        invalidate_search_cache()
+
+        self.assertEqual(Article.search("python", 1, 10)[0], [test_article])
+
+    # ====================================
+    def test_user_filter_and_routing(self):
+        """
+            Method to test that the documents are routed by owner and that the searches are restricted to the
+            articles of the User
+        """
+
+        other_user = User(username = "Alice", email = "other dummy data")
+        test_article = Article(title = "Python", synthesis = "", author = self.test_user)
+        other_article = Article(title = "Python 2", synthesis = "", author = other_user)
+
+        db.session.add_all([other_user, test_article, other_article])
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.routings[("article", other_article.id)], str(other_user.id))
+
+        results, total, cursor = Article.search("python", 1, 10, self.test_user.id)
+
+        self.assertEqual(([ result.id for result in results ], total), ([test_article.id], 1))
+
+        body = self.app.elasticsearch.requests[-1][1]
+
+        self.assertEqual(body["query"]["bool"]["filter"], [{"term": {"user_id": self.test_user.id}}])
+        self.assertEqual(Article.search("python", 1, 10)[1], 2)
+
+        # the deletion is routed as well
+        db.session.delete(other_article)
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.routings[("article", other_article.id)], str(other_user.id))
+
+    # ===============================
+    def test_index_mappings(self):
+        """
+            Method to test that the index is created explicitly with the mappings of the model
+        """
+
+        index_body = self.app.elasticsearch.indices.indexes["article_v1"]
+
+        self.assertEqual(self.app.elasticsearch.indices.aliases, {"article": "article_v1"})
+
+        self.assertIn("french_text", index_body["settings"]["analysis"]["analyzer"])
+        self.assertFalse(index_body["mappings"]["dynamic"])
+        self.assertEqual(index_body["mappings"]["properties"]["synthesis"], {"type": "text", "analyzer": "french_text"})
+        self.assertEqual(set(index_body["mappings"]["properties"]), set(get_source_fields(Article)) | {"references"})
+
+        # the index is only recreated on demand
+        result = self.app.test_cli_runner().invoke(args = ["search", "init"])
+
+        self.assertIn("not created", result.output)
+
+        result = self.app.test_cli_runner().invoke(args = ["search", "init", "--recreate"])
+
+        self.assertIn("Index article created", result.output)
+
+    # ==========================
+    def test_rebuild_index(self):
+        """
+            Method to test the rebuild of an index into a new version, while the articles are modified
+        """
+
+        self.app.config["SEARCH_REBUILD_CHECK_INTERVAL"] = 0
+
+        test_articles = [ Article(title = "Test {}".format(number), synthesis = "Python", author = self.test_user)
+                          for number in range(3) ]
+
+        db.session.add_all(test_articles)
+        db.session.commit()
+
+        # the changes committed during the rebuild are sent to both versions
+        def modify_articles(indexed):
+
+            test_articles[0].synthesis = "Rust"
+            db.session.delete(test_articles[1])
+            db.session.commit()
+
+        self.assertEqual(rebuild_index(Article, chunk_size = 10, callback = modify_articles), (3, 0, "article_v2"))
+
+        indices = self.app.elasticsearch.indices
+
+        self.assertEqual(indices.aliases, {"article": "article_v2"})
+        self.assertEqual(sorted(indices.indexes), ["article_v2"])
+        self.assertEqual(sorted(self.app.elasticsearch.documents), [("article", 1), ("article", 3)])
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["synthesis"], "Rust")
+        self.assertEqual(indices.settings["article_v2"]["index"]["number_of_replicas"], 1)
+        self.assertIsNone(SearchRebuild.query.get("article"))
+
+        self.assertEqual([ document["id"] for document in query_index("article", "python", 1, 10)[0] ], [3])
+
+        result = self.app.test_cli_runner().invoke(args = ["search", "rebuild", "--chunk-size", "10"])
+
+        self.assertIn("index article now uses article_v3", result.output)
+
+    # ===================================================
+    def test_references_added_during_rebuild(self):
+        """
+            Method to test the rebuild of an index while a reference is added to an article which has already been
+            read, and whose change is not sent to the new version (it is kept in the outbox)
+        """
+
+        self.app.config["SEARCH_REBUILD_CHECK_INTERVAL"] = 0
+
+        test_article = Article(title = "Python", synthesis = "Un langage", author = self.test_user,
+                               update_date = datetime(2020, 1, 1))
+        db.session.add(test_article)
+        db.session.commit()
+
+        # the catch-up of the rebuild selects the article through its update date
+        def add_reference(indexed):
+
+            self.app.config["SEARCH_OUTBOX_ENABLED"] = True
+
+            db.session.add(Reference(description = "python.org", article = test_article))
+            db.session.commit()
+
+        self.assertEqual(rebuild_index(Article, chunk_size = 10, callback = add_reference), (1, 0, "article_v2"))
+
+        self.assertEqual(SearchOutbox.query.count(), 1)
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["references"], ["python.org"])
+
+    # =============================================
+    def test_deletion_during_rebuild(self):
+        """
+            Method to test the rebuild of an index while an article which has already been read is deleted
+            (without the incremental synchronization)
+        """
+
+        self.app.config["SEARCH_REBUILD_CHECK_INTERVAL"] = 0
+        self.app.config["SEARCH_SYNC_ENABLED"] = False
+
+        test_articles = [ Article(title = "Test {}".format(number), synthesis = "Python", author = self.test_user)
+                          for number in range(3) ]
+
+        db.session.add_all(test_articles)
+        db.session.commit()
+
+        elasticsearch = self.app.elasticsearch
+        bulk = elasticsearch.bulk
+
+        # the article is deleted once read by the rebuild, but before its document is sent
+        def bulk_after_deletion(body, **kwargs):
+
+            if any( line.get("index", {}).get("_index") == "article_v2" for line in body ) and test_articles[1].id:
+
+                deleted_article = test_articles.pop(1)
+                db.session.delete(deleted_article)
+                db.session.commit()
+
+            return bulk(body, **kwargs)
+
+        elasticsearch.bulk = bulk_after_deletion
+
+        self.assertEqual(rebuild_index(Article, chunk_size = 10)[2], "article_v2")
+
+        self.assertEqual(sorted(elasticsearch.documents), [("article", 1), ("article", 3)])
+        self.assertEqual(SearchTombstone.query.count(), 0)
+
+    # ==========================
+    def test_verify_index(self):
+        """
+            Method to test the consistency checks of an index, which only compare the documents of the buckets
+            whose checksums differ
+        """
+
+        self.app.config.update(SEARCH_VERIFY_FANOUT = 4, SEARCH_VERIFY_LEAF_SIZE = 5)
+
+        db.session.add_all([ Article(title = "Test {}".format(number), synthesis = "Synthèse", author = self.test_user)
+                             for number in range(40) ])
+        db.session.commit()
+
+        self.assertEqual(verify_index(Article), ([], [], [], 0))
+        self.assertEqual(len(self.app.elasticsearch.requests), 2)
+
+        # the index drifts from the database
+        documents = self.app.elasticsearch.stored_documents
+
+        documents.pop(("article_v1", 3))
+        documents[("article_v1", 17)] = dict(documents[("article_v1", 17)], update_date = datetime(2020, 1, 1))
+        documents[("article_v1", 50)] = dict(documents[("article_v1", 17)], id = 50)
+
+        self.app.elasticsearch.requests = []
+
+        self.assertEqual(verify_index(Article), ([3], [17], [50], 0))
+
+        # only the mismatching buckets are drilled down
+        self.assertLess(len(self.app.elasticsearch.requests), 20)
+
+        result = self.app.test_cli_runner().invoke(args = ["search", "verify", "--repair"])
+
+        self.assertIn("1 missing, 1 outdated, 1 extra document(s)", result.output)
+        self.assertIn("outdated: 17", result.output)
+        self.assertIn("3 document(s) repaired, 0 failure(s)", result.output)
+
+        self.assertEqual(verify_index(Article), ([], [], [], 0))
+        self.assertEqual(self.app.elasticsearch.documents[("article", 17)]["update_date"],
+                         Article.query.get(17).update_date)
+
+        # the differences of several documents do not cancel each other out (e.g. swapped update dates)
+        db.session.execute(Article.__table__.update().where(Article.id == 21).values(update_date = datetime(2020, 1, 1)))
+        db.session.execute(Article.__table__.update().where(Article.id == 22).values(update_date = datetime(2021, 1, 1)))
+        db.session.commit()
+
+        documents[("article_v1", 21)] = dict(documents[("article_v1", 21)], update_date = datetime(2021, 1, 1))
+        documents[("article_v1", 22)] = dict(documents[("article_v1", 22)], update_date = datetime(2020, 1, 1))
+
+        self.assertEqual(verify_index(Article), ([], [21, 22], [], 0))
+
+        # the fractional seconds are dropped as by Elasticsearch (SQLite would round them to milliseconds)
+        update_date = datetime(2020, 1, 1, 12, 0, 59, 999700)
+
+        db.session.execute(Article.__table__.update().where(Article.id == 30).values(update_date = update_date))
+        db.session.commit()
+
+        documents[("article_v1", 30)] = dict(documents[("article_v1", 30)], update_date = update_date)
+
+        self.assertEqual(verify_index(Article), ([], [21, 22], [], 0))
+
+    # =========================
+    def test_suggestions(self):
+        """
+            Method to test that the suggestions are queried from the prefixes subfield of the titles
+        """
+
+        db.session.add_all([Article(title = "Le framework Flask", synthesis = "", author = self.test_user),
+                            Article(title = "Python", synthesis = "", author = self.test_user)])
+        db.session.commit()
+
+        self.assertEqual(suggest("article", "fla", 5, self.test_user.id), [{"id": 1, "title": "Le framework Flask"}])
+
+        body = self.app.elasticsearch.requests[-1][1]
+
+        self.assertEqual(body["query"]["bool"]["must"], {"match": {"title.prefixes": {"query": "fla",
+                                                                                      "operator": "and"}}})
+        self.assertEqual(body["_source"], ["title"])
+
+        # the suggestions are computed in-process without Elasticsearch
+        self.app.elasticsearch = None
+
+        self.assertEqual(suggest("article", "pyth", 5, self.test_user.id), [{"id": 2, "title": "Python"}])
+
+    # ==============================
+    def test_partial_updates(self):
+        """
+            Method to test that only the changed fields of the modified objects are sent
+        """
+
+        test_article = Article(title = "Python", synthesis = "Une longue synthèse", author = self.test_user)
+        db.session.add(test_article)
+        db.session.commit()
+
+        requests = len(self.app.elasticsearch.requests)
+
+        # nothing searchable has changed (the previous values are loaded, as when the article is edited)
+        test_article = Article.query.get(1)
+        test_article.synthesis = "Une longue synthèse"
+        test_article.creation_date = datetime(2020, 1, 1)
+        db.session.commit()
+
+        self.assertEqual(len(self.app.elasticsearch.requests), requests)
+
+        test_article.title = "Le langage Python"
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.last_bulk_body,
+                         [{"update": {"_index": "article", "_id": 1, "_routing": str(self.test_user.id)}},
+                          {"doc": {"title": "Le langage Python"}}])
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["synthesis"], "Une longue synthèse")
+        self.assertEqual(suggest("article", "lang", 5, self.test_user.id), [{"id": 1, "title": "Le langage Python"}])
+
+    # =================================
+    def test_references_updates(self):
+        """
+            Method to test that the references are indexed into the document of their article, and that their
+            changes only update this field
+        """
+
+        test_article = Article(title = "Python", synthesis = "Un langage", author = self.test_user)
+        db.session.add(test_article)
+        db.session.add(Reference(description = "python.org", article = test_article))
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["references"], ["python.org"])
+
+        reference = Reference(description = "docs.python.org", article = test_article)
+        db.session.add(reference)
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.operations[-1], ("update", 1))
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["references"],
+                         ["python.org", "docs.python.org"])
+        self.assertEqual(self.app.elasticsearch.routings[("article", 1)], str(self.test_user.id))
+
+        articles, total, cursor = Article.search("docs", 1, 10, self.test_user.id)
+
+        self.assertEqual([ article.id for article in articles ], [1])
+
+        db.session.delete(reference)
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.operations[-1], ("update", 1))
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["references"], ["python.org"])
+        self.assertEqual(self.app.elasticsearch.documents[("article", 1)]["title"], "Python")
+
+    # ==============================
+    def test_recent_writes(self):
+        """
+            Method to test the refresh policies, and the overlay of the documents which are not searchable yet
+            on the results of their author
+        """
+
+        test_articles = [Article(title = "Python", synthesis = "Un langage", author = self.test_user),
+                         Article(title = "Flask", synthesis = "Un framework python", author = self.test_user)]
+
+        db.session.add_all(test_articles)
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.last_bulk_refresh, "false")
+
+        # the index has not been refreshed yet
+        documents = self.app.elasticsearch.stored_documents
+        flask_document = documents.pop(("article_v1", 2))
+
+        results, total, cursor = query_index("article", "python", 1, 10, self.test_user.id)
+
+        self.assertEqual(([ document["id"] for document in results ], total), ([2, 1], 2))
+
+        # the writes are only overlaid on the results of their author
+        self.assertEqual(query_index("article", "python", 1, 10)[1], 1)
+
+        # the modified and deleted documents are overlaid as well
+        stale_document = dict(documents[("article_v1", 1)])
+
+        test_articles[0].synthesis = "Un serpent"
+        db.session.delete(test_articles[1])
+        db.session.commit()
+
+        documents[("article_v1", 1)] = stale_document
+        documents[("article_v1", 2)] = flask_document
+
+        self.assertEqual(query_index("article", "langage", 1, 10, self.test_user.id)[:2], ([], 0))
+        self.assertEqual(query_index("article", "framework", 1, 10, self.test_user.id)[:2], ([], 0))
+        self.assertEqual([ document["id"] for document in query_index("article", "serpent", 1, 10,
+                                                                      self.test_user.id)[0] ], [1])
+
+        # the interactive requests wait for the refresh instead
+        with self.app.test_request_context():
+
+            self.app.preprocess_request()
+
+            db.session.add(Article(title = "Django", synthesis = "", author = self.test_user))
+            db.session.commit()
+
+            self.assertEqual(self.app.elasticsearch.last_bulk_refresh, "wait_for")
+
+        self.assertNotIn(3, self.app.search_cache.get_recent_writes("article", str(self.test_user.id)))
+
+    # ==================================
+    def test_multi_search_api(self):
+        """
+            Method to test the searches sent at once through the search API
+        """
+
+        other_user = User(username = "Alice", email = "other dummy data")
+
+        db.session.add_all([Article(title = "Python", synthesis = "Un langage", author = self.test_user),
+                            Article(title = "Flask", synthesis = "Un framework python", author = self.test_user),
+                            Article(title = "Django", synthesis = "Un framework python", author = other_user)])
+        db.session.commit()
+
+        token = self.test_user.get_token()
+        db.session.commit()
+
+        client = self.app.test_client()
+        headers = {"Authorization": "Bearer " + token}
+
+        queries = {"queries": [{"q": "python", "per_page": 1}, {"q": "framework"}, {"q": "rust"}]}
+
+        response = client.post("/api/search", json = queries, headers = headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([ (item["ids"], item["total"]) for item in response.get_json()["items"] ],
+                         [([1], 2), ([2], 1), ([], 0)])
+        self.assertEqual(self.app.elasticsearch.requests[-1], ("msearch", 3))
+
+        # the next page is reached through the cursor
+        cursor = response.get_json()["items"][0]["next_cursor"]
+
+        response = client.post("/api/search", json = {"queries": [{"q": "python", "page": 2, "per_page": 1,
+                                                                  "cursor": cursor}]},
+                               headers = headers)
+
+        self.assertEqual(response.get_json()["items"], [{"q": "python", "ids": [2], "total": 2, "next_cursor": None}])
+
+        # the results are cached
+        requests = len(self.app.elasticsearch.requests)
+
+        response = client.post("/api/search", json = queries, headers = headers)
+
+        self.assertEqual(len(self.app.elasticsearch.requests), requests)
+
+        self.assertEqual(client.post("/api/search", json = {"queries": []}, headers = headers).status_code, 400)
+        self.assertEqual(client.post("/api/search", json = {"queries": [{"q": "python", "cursor": "invalid"}]},
+                                     headers = headers).status_code, 400)
+        self.assertEqual(client.post("/api/search", json = queries).status_code, 401)
+
+    # ================================
+    def test_outage_fallback(self):
+        """
+            Method to test the searches and the indexing while Elasticsearch is not available
+        """
+
+        self.app.search_breaker = CircuitBreaker(1, 60)
+        self.app.elasticsearch.available = False
+
+        # the changes are queued into the outbox
+        db.session.add(Article(title = "Test 1", synthesis = "Synthèse 1", author = self.test_user))
+        db.session.commit()
+
+        self.assertEqual(self.app.elasticsearch.documents, {})
+        self.assertEqual([ (entry.operation, entry.object_id) for entry in SearchOutbox.query ], [("index", 1)])
+        self.assertEqual(get_search_metrics()["breaker_state"], "open")
+
+        # the searches are made through the database, without requesting Elasticsearch
+        requests = len(self.app.elasticsearch.requests)
+
+        articles, total, cursor = Article.search("test", 1, 10, self.test_user.id)
+
+        self.assertEqual(total, 1)
+        self.assertEqual([ article.title for article in articles ], ["Test 1"])
+        self.assertEqual(suggest("article", "tes", 5, self.test_user.id), [{"id": 1, "title": "Test 1"}])
+        self.assertEqual(len(self.app.elasticsearch.requests), requests)
+        self.assertEqual(get_search_metrics()["breaker_rejected_requests"], 2)
+
+        # the state of the breaker of the serving process is exposed to the administrators
+        token = self.test_user.get_token()
+        db.session.commit()
+
+        client = self.app.test_client()
+        headers = {"Authorization": "Bearer " + token}
+
+        self.assertEqual(client.get("/api/search/metrics", headers = headers).status_code, 403)
+
+        self.app.config["ADMINS"] = "admin@example.com, " + self.test_user.email
+
+        response = client.get("/api/search/metrics", headers = headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["breaker_state"], "open")
+        self.assertEqual(response.get_json()["outbox_depth"], 1)
+
+        # once Elasticsearch is back, the queued changes are sent
+        self.app.elasticsearch.available = True
+        self.app.search_breaker.reset_timeout = 0
+
+        self.assertEqual(drain_outbox(), 1)
+        self.assertIn(("article", 1), self.app.elasticsearch.documents)
+        self.assertEqual(get_search_metrics()["breaker_state"], "closed")
+
+    # ========================
+    def test_id_ranges(self):
+        """
+            Method to test the split of the ids range into partitions
+        """
+
+        self.assertEqual(get_id_ranges(1, 10, 3), [(1, 4), (5, 8), (9, 10)])
+        self.assertEqual(get_id_ranges(1, 2, 4), [(1, 1), (2, 2)])
+        self.assertEqual(get_id_ranges(5, 5, 2), [(5, 5)])
+
+# ============================
+class TestSearchSync(TestCase):
+    """
+        Class to test the incremental synchronization of the indexes
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(TestConfig)
+        self.app.config["SEARCH_SYNC_ENABLED"] = True
+        self.app.config["SEARCH_SYNC_OVERLAP"] = 0
+        self.app.elasticsearch = FakeElasticsearch()
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(self.test_user)
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # =====================
+    def test_sync_index(self):
+        """
+            Method to test that only the changes made since the previous synchronization are sent
+        """
+
+        test_articles = [ Article(title = "Test {}".format(number), synthesis = "Synthèse", author = self.test_user)
+                          for number in range(3) ]
+
+        db.session.add_all(test_articles)
+        db.session.commit()
+
+        # first synchronization : everything is indexed
+        self.app.elasticsearch = FakeElasticsearch()
+
+        self.assertEqual(sync_index(Article), (3, 0, 0))
+        self.assertEqual(len(self.app.elasticsearch.documents), 3)
+
+        # only the modified and deleted articles are synchronized
+        test_articles[0].synthesis = "Synthèse modifiée"
+        test_articles[0].update_date = datetime.utcnow()
+        db.session.delete(test_articles[1])
+        db.session.commit()
+
+        self.assertEqual(SearchTombstone.query.count(), 1)
+
+        self.app.elasticsearch.requests = []
+
+        self.assertEqual(sync_index(Article), (1, 1, 0))
+        self.assertEqual(self.app.elasticsearch.requests, [("bulk", 1), ("bulk", 2)])
+        self.assertEqual(len(self.app.elasticsearch.documents), 2)
+        self.assertEqual(self.app.elasticsearch.documents[("article", test_articles[0].id)]["synthesis"],
+                         "Synthèse modifiée")
+
+        # nothing has changed since the previous synchronization and the tombstones have been pruned
+        self.assertEqual(sync_index(Article), (0, 0, 0))
+        self.assertEqual(SearchTombstone.query.count(), 0)
+
+        # the article whose references have changed is synchronized as well
+        db.session.add(Reference(description = "python.org", article = test_articles[2]))
+        db.session.commit()
+
+        self.app.elasticsearch = FakeElasticsearch()
+
+        self.assertEqual(sync_index(Article), (1, 0, 0))
+        self.assertEqual(self.app.elasticsearch.documents[("article", test_articles[2].id)]["references"],
+                         ["python.org"])
+
+# ==============================
+class TestSQLiteSearch(TestCase):
+    """
+        Class to test the SQLite FTS5 search backend
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(SQLiteTestConfig)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(self.test_user)
+        db.session.commit()
+
+        self.test_articles = [Article(title = "Python", synthesis = "Un langage de programmation", author = self.test_user),
+                              Article(title = "Flask", synthesis = "Un framework web écrit en Python", author = self.test_user),
+                              Article(title = "Rust", synthesis = "Un autre langage", author = self.test_user)]
+
+        db.session.add_all(self.test_articles)
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ===================
+    def test_search(self):
+        """
+            Method to test the ranked and paginated search
+        """
+
+        articles, total, cursor = Article.search("python", 1, 10)
+
+        self.assertEqual(total, 2)
+        self.assertEqual([ article.title for article in articles ], ["Python", "Flask"])
+
+        articles, total, cursor = Article.search("python", 2, 1)
+
+        self.assertEqual(total, 2)
+        self.assertEqual([ article.title for article in articles ], ["Flask"])
+
+        # the accents and the case are ignored
+        articles, total, cursor = Article.search("ECRIT", 1, 10)
+
+        self.assertEqual([ article.title for article in articles ], ["Flask"])
+
+        articles, total, cursor = Article.search("langage", 1, 10)
+
+        self.assertEqual(total, 2)
+
+        articles, total, cursor = Article.search("!!", 1, 10)
+
+        self.assertEqual(total, 0)
+
+    # ==============================
+    def test_cursor_pagination(self):
+        """
+            Method to test that the pages reached through the cursors are the same as the numbered ones
+        """
+
+        db.session.add_all([ Article(title = "Langage {}".format(number), synthesis = "", author = self.test_user)
+                             for number in range(7) ])
+        db.session.commit()
+
+        expected = [ [ article.id for article in Article.search("langage", page, 3)[0] ] for page in range(1, 5) ]
+
+        pages = []
+        cursor = None
+
+        for page in range(1, 5):
+
+            articles, total, cursor = Article.search("langage", page, 3, cursor = cursor)
+
+            pages.append([ article.id for article in articles ])
+
+        self.assertEqual(total, 9)
+        self.assertEqual(pages, expected)
+        self.assertEqual(len(set(sum(pages, []))), 9)
+
+    # =====================================
+    def test_search_restricted_to_user(self):
+        """
+            Method to test that the searches of a User (and their total) are restricted to the articles of this User
+        """
+
+        other_user = User(username = "Alice", email = "other dummy data")
+        db.session.add(other_user)
+        db.session.add(Article(title = "Django", synthesis = "Un framework Python", author = other_user))
+        db.session.commit()
+
+        self.assertEqual(Article.search("python", 1, 10)[1], 3)
+
+        results, total, cursor = Article.search("python", 1, 10, self.test_user.id)
+
+        self.assertEqual(total, 2)
+        self.assertEqual([ result.title for result in results ], ["Python", "Flask"])
+
+    # ===================================
+    def test_index_maintained_by_triggers(self):
+        """
+            Method to test that the index follows the modifications and deletions of the articles
+        """
+
+        self.test_articles[2].synthesis = "Un langage concurrent de Python"
+        db.session.delete(self.test_articles[1])
+        db.session.commit()
+
+        articles, total, cursor = Article.search("python", 1, 10)
+
+        self.assertEqual(sorted( article.title for article in articles ), ["Python", "Rust"])
+
+        # the index can be rebuilt
+        result = self.app.test_cli_runner().invoke(args = ["search", "reindex"])
+
+        self.assertIn("2 documents indexed", result.output)
+        self.assertEqual(Article.search("python", 1, 10)[1], 2)
+
+# =============================
+class TestSearchCache(TestCase):
+    """
+        Class to test the cache of the search results
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(SQLiteTestConfig)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(self.test_user)
+        db.session.add(Article(title = "Python", synthesis = "Un langage", author = self.test_user))
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ============================
+    def test_hits_and_misses(self):
+        """
+            Method to test that the same normalized query is served from the cache
+        """
+
+        documents, total, cursor = query_index("article", "Python", 1, 10, self.test_user.id)
+
+        self.assertEqual(([ document["id"] for document in documents ], total), ([1], 1))
+        self.assertEqual(query_index("article", "  PYTHON ", 1, 10, self.test_user.id), (documents, total, cursor))
+
+        metrics = get_search_metrics()
+
+        self.assertEqual(metrics["cache_misses"], 1)
+        self.assertEqual(metrics["cache_hits"], 1)
+
+        # the counters of the serving process are exposed to the administrators
+        self.app.config["ADMINS"] = self.test_user.email
+
+        token = self.test_user.get_token()
+        db.session.commit()
+
+        response = self.app.test_client().get("/api/search/metrics", headers = {"Authorization": "Bearer " + token})
+
+        self.assertEqual((response.get_json()["cache_hits"], response.get_json()["cache_misses"]), (1, 1))
+        self.assertEqual(response.get_json()["process_id"], os.getpid())
+
+        # the page and the User are parts of the key
+        query_index("article", "python", 2, 10, self.test_user.id)
+        query_index("article", "python", 1, 10, None)
+
+        self.assertEqual(get_search_metrics()["cache_misses"], 3)
+
+    # ===================================
+    def test_invalidation_on_commit(self):
+        """
+            Method to test that the cached results are invalidated once an article is committed
+        """
+
+        generation = get_search_metrics()["cache_generation"]
+
+        self.assertEqual(query_index("article", "python", 1, 10)[1], 1)
+
+        db.session.add(Article(title = "Flask", synthesis = "Un framework Python", author = self.test_user))
+        db.session.commit()
+
+        self.assertEqual(query_index("article", "python", 1, 10)[1], 2)
+        self.assertEqual(get_search_metrics()["cache_generation"], generation + 1)
+
+        # a commit without any searchable object does not invalidate the cache
+        self.test_user.about_me = "dummy data"
+        db.session.commit()
+
+        self.assertEqual(get_search_metrics()["cache_generation"], generation + 1)
+
+    # ========================
+    def test_lru_and_ttl(self):
+        """
+            Method to test the eviction of the least recently used entries and the expiration of the entries
+        """
+
+        cache = SearchCache(2, 60)
+
+        cache.set("a", 1, 0)
+        cache.set("b", 2, 0)
+        cache.get("a")
+        cache.set("c", 3, 0)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+        # a result computed before an invalidation is not stored
+        cache.invalidate()
+        cache.set("d", 4, 0)
+
+        self.assertIsNone(cache.get("d"))
+
+        cache = SearchCache(2, 0)
+        cache.set("a", 1, 0)
+
+        self.assertIsNone(cache.get("a"))
+
+# =============================
+class TestSearchQuery(TestCase):
+    """
+        Class to test the search query language
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(SQLiteTestConfig)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(test_user)
+
+        db.session.add_all([Article(title = "Python", synthesis = "Un langage de programmation",
+                                    update_date = datetime(2019, 6, 1), author = test_user),
+                            Article(title = "Flask", synthesis = "Un framework web écrit en Python",
+                                    update_date = datetime(2020, 2, 29, 12), author = test_user),
+                            Article(title = "Rust", synthesis = "Un autre langage de programmation",
+                                    update_date = datetime(2020, 3, 1), author = test_user)])
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ========================
+    def test_parse_query(self):
+        """
+            Method to test the parsing of the search queries
+        """
+
+        self.assertEqual(parse_query('title:python -"autre langage" AND web OR update_date:2020-02 !!', Article),
+                         [[Clause("text", "python", "title"),
+                           Clause("phrase", "autre langage", negated = True),
+                           Clause("text", "web")],
+                          [Clause("range", (datetime(2020, 2, 1), datetime(2020, 3, 1)), "update_date")]])
+
+        # the unknown fields and the invalid dates are searched as text
+        self.assertEqual(parse_query("author:bob update_date:hier", Article),
+                         [[Clause("text", "author:bob"), Clause("text", "update_date:hier")]])
+
+        self.assertEqual(parse_range(">=2020-02-29"), (datetime(2020, 2, 29), None))
+        self.assertEqual(parse_range("<=2020"), (None, datetime(2021, 1, 1)))
+        self.assertEqual(parse_range("2019-12..2020"), (datetime(2019, 12, 1), datetime(2021, 1, 1)))
+        self.assertIsNone(parse_range("2020-13"))
+
+        self.assertEqual(normalize_query("  Python  OR  FLASK or "), "python OR flask or")
+
+    # =====================
+    def test_es_query(self):
+        """
+            Method to test the compilation of the search queries into Elasticsearch queries
+        """
+
+        query = get_es_query(parse_query("python web title:flask -update_date:2019", Article), Article)
+
+        exact_query, fuzzy_query = query["bool"]["must"][0]["bool"]["should"]
+
+        self.assertEqual(exact_query, {"multi_match": {"query": "python web",
+                                                       "type": "cross_fields",
+                                                       "operator": "and",
+                                                       "fields": ["title", "synthesis", "references"]}})
+        self.assertEqual(fuzzy_query["multi_match"]["type"], "best_fields")
+        self.assertEqual((fuzzy_query["multi_match"]["fuzziness"], fuzzy_query["multi_match"]["prefix_length"]),
+                         ("AUTO", 2))
+        self.assertEqual(query["bool"]["must"][1]["bool"]["should"][0],
+                         {"match": {"title": {"query": "flask", "operator": "and"}}})
+        self.assertEqual(query["bool"]["must_not"], [{"range": {"update_date": {"gte": "2019-01-01T00:00:00",
+                                                                                "lt": "2020-01-01T00:00:00"}}}])
+
+        query = get_es_query(parse_query("python OR rust", Article), Article)
+
+        self.assertEqual(len(query["bool"]["should"]), 2)
+
+    # ===========================
+    def test_query_language(self):
+        """
+            Method to test the search queries with both the SQLite FTS5 and the generic SQL backends
+        """
+
+        queries = [("python", ["Python", "Flask"]),
+                   ("python programmation", ["Python"]),
+                   ("title:python", ["Python"]),
+                   ('"un langage"', ["Python"]),
+                   ("programmation -rust", ["Python"]),
+                   ("rust OR flask", ["Flask", "Rust"]),
+                   ("langage update_date:2020", ["Rust"]),
+                   ("update_date:2020-02-29", ["Flask"]),
+                   ("-title:python", ["Flask", "Rust"])]
+
+        for backend in [SQLiteFTSBackend(), SQLBackend()]:
+
+            self.app.search_backend = backend
+
+            for query, titles in queries:
+
+                invalidate_search_cache()
+
+                articles, total, cursor = Article.search(query, 1, 10)
+
+                self.assertEqual(sorted( article.title for article in articles ), sorted(titles),
+                                 "{} ({})".format(query, backend.name))
+
+# ============================
+class TestPrefixTrie(TestCase):
+    """
+        Class to test the prefix tree of the in-process suggestions
+    """
+
+    # =====================
+    def test_search(self):
+        """
+            Method to test the search of the values by prefix (the shortest keys first)
+        """
+
+        trie = PrefixTrie()
+
+        trie.insert("flask", 1)
+        trie.insert("fla", 2)
+        trie.insert("python", 3)
+
+        self.assertEqual(trie.search("fl", 10), [2, 1])
+        self.assertEqual(trie.search("fl", 1), [2])
+        self.assertEqual(trie.search("r", 10), [])
+
+    # =====================
+    def test_remove(self):
+        """
+            Method to test that the empty nodes are removed along with the values
+        """
+
+        trie = PrefixTrie()
+
+        trie.insert("flask", 1)
+        trie.insert("fla", 2)
+        trie.remove("flask", 1)
+
+        self.assertEqual(trie.root, {"f": {"l": {"a": {None: {2}}}}})
+
+        trie.remove("fla", 2)
+
+        self.assertEqual(trie.root, {})
+
+    # ======================
+    def test_get_key(self):
+        """
+            Method to test the keys of the titles (case, accents and punctuation are ignored)
+        """
+
+        self.assertEqual(get_suffixes("L'Été indien"), ["l ete indien", "ete indien", "indien"])
+        self.assertEqual(get_key("Été "), "ete ")
+
+# =================================
+class TestTitleSuggester(TestCase):
+    """
+        Class to test the in-process suggestions of titles
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(TestConfig)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        self.other_user = User(username = "Alice", email = "other dummy data")
+
+        db.session.add_all([Article(title = "Le framework Flask", synthesis = "", author = self.test_user),
+                            Article(title = "Fortran", synthesis = "", author = self.other_user)])
+        db.session.commit()
+
+        self.suggester = self.app.search_suggester
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ==================================
+    def test_changes_during_load(self):
+        """
+            Method to test that the changes committed while the titles are read are not lost
+        """
+
+        query = db.session.query
+
+        def query_and_commit(*args):
+
+            self.suggester.update([("index", "article", 3, "Flask-Login", self.test_user.id)])
+
+            return query(*args)
+
+        db.session.query = query_and_commit
+
+        try:
+
+            titles = self.suggester.load(Article, self.test_user.id)
+
+        finally:
+
+            del db.session.query
+
+        self.assertEqual(titles["entries"], {1: ("Le framework Flask", 1), 3: ("Flask-Login", 3)})
+        self.assertEqual(self.suggester.pending, [])
+
+    # ===========================
+    def test_owners_and_size(self):
+        """
+            Method to test that the titles are loaded per owner, and that only the most recently used ones are kept
+        """
+
+        self.assertEqual(suggest("article", "f", 5, self.test_user.id), [{"id": 1, "title": "Le framework Flask"}])
+
+        # an article given to another user is suggested to its new owner only
+        self.suggester.update([("index", "article", 1, "Le framework Flask", self.other_user.id)])
+
+        self.assertEqual(suggest("article", "f", 5, self.test_user.id), [])
+
+        self.suggester.size = 1
+        self.suggester.ttl = 0
+
+        self.assertEqual(suggest("article", "f", 5, self.other_user.id), [{"id": 2, "title": "Fortran"}])
+        self.assertEqual(list(self.suggester.tries), [("article", self.other_user.id)])
+
+        # the expired titles are loaded again (e.g. with the changes of the other processes)
+        db.session.execute(Article.__table__.update().where(Article.id == 2).values(title = "Forth"))
+
+        self.assertEqual(suggest("article", "f", 5, self.other_user.id), [{"id": 2, "title": "Forth"}])
+
+# ==================================
+class TestSpellingCorrector(TestCase):
+    """
+        Class to test the in-process corrections of the misspelled searches
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(TestConfig)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        other_user = User(username = "Alice", email = "other dummy data")
+
+        test_article = Article(title = "Python", synthesis = "Un langage de programmation", author = self.test_user)
+
+        db.session.add_all([test_article,
+                            Reference(description = "documentation officielle", article = test_article),
+                            Article(title = "Rust", synthesis = "Un autre langage", author = other_user)])
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # =======================
+    def test_distance(self):
+        """
+            Method to test the edit distance (the transpositions being a single edit)
+        """
+
+        self.assertEqual(get_distance("pyhton", "python"), 1)
+        self.assertEqual(get_distance("flsk", "flask"), 1)
+        self.assertEqual(get_distance("kitten", "sitting"), 3)
+        self.assertEqual(get_distance("", "rust"), 4)
+
+    # ======================
+    def test_correct(self):
+        """
+            Method to test the corrections of the words of the articles of a user
+        """
+
+        user_id = self.test_user.id
+
+        self.assertEqual(correct_query("article", "Pyhton langaeg", user_id), "python langage")
+        self.assertEqual(correct_query("article", "documantation", user_id), "documentation")
+        self.assertIsNone(correct_query("article", "python langage", user_id))
+
+        # the syntax is kept and the words of the other users are not suggested
+        self.assertEqual(correct_query("article", "title:pyhton OR rsut -update_date:2020", user_id),
+                         "title:python OR rsut -update_date:2020")
+        self.assertEqual(correct_query("article", "rsut"), "rust")
+
+        # the dictionary follows the committed changes
+        db.session.add(Article(title = "Flask", synthesis = "", author = self.test_user))
+        db.session.commit()
+
+        self.assertEqual(correct_query("article", "flsk", user_id), "flask")
+
+        # only the dictionaries of the owners of the committed articles are invalidated
+        other_user = User.query.filter_by(username = "Alice").first()
+
+        db.session.add(Article(title = "Haskell", synthesis = "", author = other_user))
+        db.session.commit()
+
+        self.assertIn(("article", user_id), self.app.search_spelling.dictionaries)
+        self.assertNotIn(("article", None), self.app.search_spelling.dictionaries)
+
+        # only the most recently used dictionaries are kept
+        self.app.search_spelling.size = 1
+
+        correct_query("article", "haskel", other_user.id)
+
+        self.assertEqual(list(self.app.search_spelling.dictionaries), [("article", other_user.id)])
+
+# ===========================
+class TestSQLSearch(TestCase):
+    """
+        Class to test the generic SQL search backend
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(SQLTestConfig)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+    # ===================
+    def test_search(self):
+        """
+            Method to test the search through "LIKE" filters
+        """
+
+        test_user = User(username = "Bob", email = "dummy data")
+        db.session.add(test_user)
+        db.session.commit()
+
+        db.session.add_all([Article(title = "Python", synthesis = "Un langage", author = test_user),
+                            Article(title = "Flask", synthesis = "Un framework Python", author = test_user),
+                            Article(title = "Rust", synthesis = "Un autre langage", author = test_user)])
+        db.session.commit()
+
+        articles, total, cursor = Article.search("python", 1, 10)
+
+        self.assertEqual(total, 2)
+        self.assertEqual([ article.title for article in articles ], ["Flask", "Python"])
+
+        articles, total, cursor = Article.search("python", 1, 1)
+
+        self.assertEqual([ article.title for article in articles ], ["Flask"])
+
+        articles, total, cursor = Article.search("python", 2, 1, cursor = cursor)
+
+        self.assertEqual([ article.title for article in articles ], ["Python"])
+
+        # the references are searched along with their article
+        db.session.add(Reference(description = "rust-lang.org", article = Article.query.get(3)))
+        db.session.commit()
+
+        articles, total, cursor = Article.search("references:lang", 1, 10)
+
+        self.assertEqual([ article.title for article in articles ], ["Rust"])
+        self.assertEqual(Article.search("-rust-lang langage", 1, 10)[1], 1)
+
+# ================================
+class TestSemanticSearch(TestCase):
+    """
+        Class to test the semantic search (latent semantic analysis)
+    """
+
+    # ==============
+    def setUp(self):
+        """
+            Method executed before each test
+        """
+
+        self.app = create_app(TestConfig)
+        self.app.elasticsearch = FakeElasticsearch()
+        self.app.config["SEARCH_SEMANTIC_PATH"] = mkdtemp()
+        self.app.search_semantic = create_search_semantic(self.app)
+
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        db.create_all()
+
+        self.test_user = User(username = "Bob", email = "dummy data")
+        other_user = User(username = "Alice", email = "other dummy data")
+
+        db.session.add_all([Article(title = "Chats", synthesis = "Le chat est un animal de compagnie", author = self.test_user),
+                            Article(title = "Félins", synthesis = "Le chat et le tigre sont des félins", author = self.test_user),
+                            Article(title = "Voitures", synthesis = "Une voiture électrique", author = self.test_user),
+                            Article(title = "Chats sauvages", synthesis = "Un chat", author = other_user)])
+        db.session.commit()
+
+    # =================
+    def tearDown(self):
+        """
+            Method executed after each test
+        """
+
+        db.session.remove()
+        db.drop_all()
+
+        self.app_context.pop()
+
+        rmtree(self.app.config["SEARCH_SEMANTIC_PATH"])
+
+    # ============================
+    def test_truncated_svd(self):
+        """
+            Method to test the truncated singular value decomposition against the full one
+        """
+
+        matrix = np.random.RandomState(1).random_sample((30, 20)) * (np.random.RandomState(2).random_sample((30, 20)) > 0.7)
+
+        left_vectors, values, right_vectors = get_truncated_svd(csr_matrix(matrix), 5)
+
+        self.assertEqual((left_vectors.shape, values.shape, right_vectors.shape), ((30, 5), (5,), (5, 20)))
+        self.assertTrue(np.allclose(values, np.linalg.svd(matrix, compute_uv = False)[:5]))
+        self.assertTrue(np.allclose(left_vectors.T @ left_vectors, np.eye(5)))
+
+    # ====================
+    def test_search(self):
+        """
+            Method to test the semantic search, alone and blended with the keyword search
+        """
+
+        user_id = self.test_user.id
+
+        # without any model, the searches are keyword ones
+        self.assertIsNone(self.app.search_semantic.search("article", "tigre", 10, user_id))
+        self.assertEqual([ article.id for article in Article.search("tigre", 1, 10, user_id, semantic = True)[0] ], [2])
+
+        self.assertEqual(build_semantic_model(Article, self.app.config["SEARCH_SEMANTIC_PATH"], 3)[:2], (4, 3))
+
+        # the articles sharing the context of the searched words are found, only among the articles of the user
+        results = self.app.search_semantic.search("article", "tigre AND title:félins", 10, user_id)
+
+        self.assertEqual([ object_id for object_id, similarity in results ], [2, 1])
+        self.assertEqual(self.app.search_semantic.get_similarities("article", "tigre", [1, 3, 99])[99], 0.)
+        self.assertEqual(self.app.search_semantic.search("article", "inconnu", 10, user_id), [])
+
+        # the keyword results are ranked first, followed by the semantic ones (loaded from the database)
+        articles, total, cursor = Article.search("tigre", 1, 10, user_id, semantic = True)
+
+        self.assertEqual([ article.id for article in articles ], [2, 1])
+        self.assertEqual((total, cursor), (2, None))
+        self.assertEqual([ article.title for article in Article.search("tigre", 2, 1, user_id, semantic = True)[0] ],
+                         ["Chats"])
+
+        # the articles given to another user since the model has been built are not found anymore
+        Article.query.get(1).author = User.query.filter_by(username = "Alice").first()
+        db.session.commit()
+
+        articles, total, cursor = Article.search("tigre", 1, 10, user_id, semantic = True)
+
+        self.assertEqual(([ article.id for article in articles ], total), ([2], 1))
+
+        # a rebuilt model is loaded again
+        db.session.add(Article(title = "Tigres", synthesis = "Le tigre est un félin", author = self.test_user))
+        db.session.commit()
+
+        build_semantic_model(Article, self.app.config["SEARCH_SEMANTIC_PATH"], 3)
+
+        self.assertIn(5, [ object_id for object_id, similarity in self.app.search_semantic.search("article",
+                                                                                                  "tigre",
+                                                                                                  10,
+                                                                                                  user_id) ])
+        self.assertEqual(len(benchmark_semantic_search(self.app.search_semantic, "article", 10, 5)), 10)
+
+# ================================
+class TestCircuitBreaker(TestCase):
+    """
+        Class to test the circuit breaker of the requests sent to Elasticsearch
+    """
+
+    # ======================
+    def test_states(self):
+        """
+            Method to test the transitions between the states of the breaker
+        """
+
+        breaker = CircuitBreaker(2, 60)
+
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+
+        # a success resets the consecutive failures
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+        # once the reset timeout is elapsed, a single trial request is allowed
+        breaker.reset_timeout = 0
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+        self.assertFalse(breaker.allow())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+        self.assertEqual(breaker.get_metrics(), {"breaker_state": "closed",
+                                                 "breaker_failures": 0,
+                                                 "breaker_openings": 2,
+                                                 "breaker_rejected_requests": 2})
+
+    # ============================
+    def test_trial_release(self):
+        """
+            Method to test that the trial request of the half open breaker is released by any error
+        """
+
+        app = create_app(TestConfig)
+        app.search_breaker = CircuitBreaker(1, 0)
+        app.search_breaker.record_failure()
+
+        with app.app_context():
+
+            for attempt in range(2):
+
+                # "int" does not accept the timeout argument
+                with self.assertRaises(TypeError):
+
+                    ElasticsearchBackend().request(int, "ELASTICSEARCH_SEARCH_TIMEOUT")
+
+                self.assertEqual(app.search_breaker.state, "half_open")
+                self.assertFalse(app.search_breaker.trial_pending)
+
+
+# ==================================================================================================
+#
+# FUNCTIONS
+#
+# ==================================================================================================
+
+# ==================================================================================================
+#
+# USE
+#
+# ==================================================================================================
+
+if __name__ == "__main__":
+
+    main(verbosity = 1)
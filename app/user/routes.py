@@ -12,7 +12,7 @@ from flask import render_template, flash, redirect, url_for, request, abort
 from flask_login import current_user, login_required
 
 from app import db
-from app.models import User, Article
+from app.models import User
 
 from app.user import bp
 from app.user.forms import UserProfileEditorForm
@@ -57,13 +57,6 @@ def user(username):
 
         return redirect(url_for("main.index"))
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     user = User.query.filter_by(username = username).first_or_404()
 
     if user == current_user:
@@ -85,13 +78,6 @@ def user_profile_edition():
         :rtype: str
     """
 
-    tmp_article = Article.query.filter_by(title = "TMP").first()
-
-    if tmp_article:
-
-        db.session.delete(tmp_article)
-        db.session.commit()
-
     if current_user.github_login.startswith("syntNone-") and current_user.github_login.endswith("-syntNone"):
 
         github_login = ""
@@ -52,8 +52,118 @@ class Config(object):
 
     # Elasticsearch configuration
     ELASTICSEARCH_URL = os.environ.get("ELASTICSEARCH_URL")
+
+    # Elasticsearch client configuration : the connections are pooled (ELASTICSEARCH_MAXSIZE per node), the requests
+    # time out (in seconds, a shorter timeout for the interactive searches) and the timed out requests are retried
+    ELASTICSEARCH_MAXSIZE = int(os.environ.get("ELASTICSEARCH_MAXSIZE") or 10)
+    ELASTICSEARCH_TIMEOUT = float(os.environ.get("ELASTICSEARCH_TIMEOUT") or 10)
+    ELASTICSEARCH_SEARCH_TIMEOUT = float(os.environ.get("ELASTICSEARCH_SEARCH_TIMEOUT") or 2)
+    ELASTICSEARCH_MAX_RETRIES = int(os.environ.get("ELASTICSEARCH_MAX_RETRIES") or 1)
+
+    # Circuit breaker configuration : after SEARCH_BREAKER_THRESHOLD consecutive failures, Elasticsearch is not
+    # requested anymore during SEARCH_BREAKER_RESET_TIMEOUT seconds (the searches are made through the database and
+    # the changes are queued into the indexing outbox)
+    SEARCH_BREAKER_THRESHOLD = int(os.environ.get("SEARCH_BREAKER_THRESHOLD") or 5)
+    SEARCH_BREAKER_RESET_TIMEOUT = float(os.environ.get("SEARCH_BREAKER_RESET_TIMEOUT") or 30)
+
     SEARCH_ARTICLES_PER_PAGE = int(os.environ.get("SEARCH_ARTICLES_PER_PAGE"))
 
+    # Deepest result reachable through a page number (the next pages are reached through a cursor)
+    SEARCH_MAX_RESULT_WINDOW = int(os.environ.get("SEARCH_MAX_RESULT_WINDOW") or 10000)
+
+    # Search results displayed from the documents of the index, without loading the articles from the database
+    # (unless SEARCH_RESULTS_FROM_DATABASE is defined)
+    SEARCH_RESULTS_FROM_INDEX = os.environ.get("SEARCH_RESULTS_FROM_DATABASE") is None
+
+    # Typo tolerance of the searched words : maximum number of edits ("AUTO" : 0 up to 2 characters, 1 up to 5,
+    # 2 beyond, "0" to disable it), number of first characters without any typo and maximum number of matched terms
+    # per word (the fewer the cheaper)
+    SEARCH_FUZZINESS = os.environ.get("SEARCH_FUZZINESS") or "AUTO"
+    SEARCH_FUZZY_PREFIX_LENGTH = int(os.environ.get("SEARCH_FUZZY_PREFIX_LENGTH") or 2)
+    SEARCH_FUZZY_MAX_EXPANSIONS = int(os.environ.get("SEARCH_FUZZY_MAX_EXPANSIONS") or 20)
+
+    # Corrections of the misspelled searches ("did you mean") : maximum number of edits of a word, lifetime (in
+    # seconds) and maximum number of the dictionaries of the words of the Users kept in memory, and maximum number of
+    # results of a corrected search (the searches with more results are not corrected)
+    SEARCH_SPELLING_MAX_DISTANCE = int(os.environ.get("SEARCH_SPELLING_MAX_DISTANCE") or 2)
+    SEARCH_SPELLING_TTL = float(os.environ.get("SEARCH_SPELLING_TTL") or 300)
+    SEARCH_SPELLING_SIZE = int(os.environ.get("SEARCH_SPELLING_SIZE") or 100)
+    SEARCH_SPELLING_MAX_RESULTS = int(os.environ.get("SEARCH_SPELLING_MAX_RESULTS") or 2)
+
+    # Semantic search (latent semantic analysis built through "flask search semantic") : directory of the models,
+    # number of dimensions of their vectors, minimum similarity of the semantic results, number of results of the
+    # keyword and semantic searches ranked together, and weight of the semantic similarity in their blended score
+    SEARCH_SEMANTIC_PATH = os.environ.get("SEARCH_SEMANTIC_PATH") or os.path.join(basedir, "semantic")
+    SEARCH_SEMANTIC_DIMENSIONS = int(os.environ.get("SEARCH_SEMANTIC_DIMENSIONS") or 100)
+    SEARCH_SEMANTIC_MIN_SIMILARITY = float(os.environ.get("SEARCH_SEMANTIC_MIN_SIMILARITY") or 0.1)
+    SEARCH_SEMANTIC_CANDIDATES = int(os.environ.get("SEARCH_SEMANTIC_CANDIDATES") or 100)
+    SEARCH_SEMANTIC_WEIGHT = float(os.environ.get("SEARCH_SEMANTIC_WEIGHT") or 0.5)
+
+    # Size (in characters) and number of the fragments of the syntheses displayed with the search results
+    SEARCH_HIGHLIGHT_FRAGMENT_SIZE = int(os.environ.get("SEARCH_HIGHLIGHT_FRAGMENT_SIZE") or 150)
+    SEARCH_HIGHLIGHT_FRAGMENTS = int(os.environ.get("SEARCH_HIGHLIGHT_FRAGMENTS") or 2)
+
+    # Related articles displayed along with an article : maximum number, and minimum similarity (cosine of the TF-IDF
+    # vectors of their titles and syntheses)
+    RELATED_ARTICLES_COUNT = int(os.environ.get("RELATED_ARTICLES_COUNT") or 5)
+    RELATED_ARTICLES_MIN_SCORE = float(os.environ.get("RELATED_ARTICLES_MIN_SCORE") or 0.1)
+
+    # The related articles of the changed articles are computed in background by "flask articles drain" (or by a
+    # thread of each process if RELATED_ARTICLES_DRAINER_THREAD is defined), for at most RELATED_ARTICLES_BATCH_SIZE
+    # users at once, once the oldest change of a user has been pending for RELATED_ARTICLES_DRAIN_DELAY seconds (each
+    # update computes the vectors of all the articles of the user)
+    RELATED_ARTICLES_DRAINER_THREAD = os.environ.get("RELATED_ARTICLES_DRAINER_THREAD") is not None
+    RELATED_ARTICLES_BATCH_SIZE = int(os.environ.get("RELATED_ARTICLES_BATCH_SIZE") or 20)
+    RELATED_ARTICLES_DRAIN_DELAY = float(os.environ.get("RELATED_ARTICLES_DRAIN_DELAY") or 30)
+
+    # Search backend ("elasticsearch", "sqlite" or "sql", chosen from the configuration if not defined)
+    SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND")
+
+    # Maximum number of queries of a search API request, and of results per query
+    SEARCH_API_MAX_QUERIES = int(os.environ.get("SEARCH_API_MAX_QUERIES") or 10)
+    SEARCH_API_MAX_PER_PAGE = int(os.environ.get("SEARCH_API_MAX_PER_PAGE") or 100)
+
+    # Maximum number of titles suggested while typing a search, and lifetime (in seconds) and maximum number of the
+    # in-process prefix trees of the titles of the Users (when the search backend has no suggestion index)
+    SEARCH_SUGGEST_SIZE = int(os.environ.get("SEARCH_SUGGEST_SIZE") or 8)
+    SEARCH_SUGGEST_TTL = float(os.environ.get("SEARCH_SUGGEST_TTL") or 300)
+    SEARCH_SUGGEST_CACHE_SIZE = int(os.environ.get("SEARCH_SUGGEST_CACHE_SIZE") or 100)
+
+    # Search results cache configuration (disabled if the size is 0)
+    SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE") or 1000)
+    SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL") or 60)
+
+    # Refresh policies of the indexing requests ("false", "wait_for" or "true") : the interactive requests (i.e.
+    # of the "main" blueprint) wait for the changes to be searchable, the other ones (API, commands, outbox) do not,
+    # and their documents are overlaid on the search results of their owner during SEARCH_RECENT_WRITES_TTL seconds
+    SEARCH_REFRESH_POLICY = os.environ.get("SEARCH_REFRESH_POLICY") or "false"
+    SEARCH_INTERACTIVE_REFRESH_POLICY = os.environ.get("SEARCH_INTERACTIVE_REFRESH_POLICY") or "wait_for"
+    SEARCH_RECENT_WRITES_TTL = float(os.environ.get("SEARCH_RECENT_WRITES_TTL") or 5)
+
+    # Indexing outbox configuration (changes are sent to Elasticsearch in background instead of during the commit)
+    SEARCH_OUTBOX_ENABLED = os.environ.get("SEARCH_OUTBOX_ENABLED") is not None
+    SEARCH_OUTBOX_DRAINER_THREAD = os.environ.get("SEARCH_OUTBOX_DRAINER_THREAD") is not None
+    SEARCH_OUTBOX_BATCH_SIZE = int(os.environ.get("SEARCH_OUTBOX_BATCH_SIZE") or 500)
+    SEARCH_OUTBOX_POLL_INTERVAL = float(os.environ.get("SEARCH_OUTBOX_POLL_INTERVAL") or 1)
+    SEARCH_OUTBOX_RETRY_DELAY = float(os.environ.get("SEARCH_OUTBOX_RETRY_DELAY") or 1)
+    SEARCH_OUTBOX_MAX_RETRY_DELAY = float(os.environ.get("SEARCH_OUTBOX_MAX_RETRY_DELAY") or 300)
+
+    # Reindexing configuration
+    SEARCH_REINDEX_CHUNK_SIZE = int(os.environ.get("SEARCH_REINDEX_CHUNK_SIZE") or 500)
+
+    # Delay (in seconds) before a process sends its changes to the new version of an index being rebuilt
+    # (the changes of this delay are caught up by the rebuild, which must be shorter than SEARCH_SYNC_OVERLAP)
+    SEARCH_REBUILD_CHECK_INTERVAL = float(os.environ.get("SEARCH_REBUILD_CHECK_INTERVAL") or 1)
+
+    # Consistency checks configuration : number of sub-buckets of a bucket whose checksums differ, and greatest
+    # number of ids of a bucket whose documents are compared one by one
+    SEARCH_VERIFY_FANOUT = int(os.environ.get("SEARCH_VERIFY_FANOUT") or 16)
+    SEARCH_VERIFY_LEAF_SIZE = int(os.environ.get("SEARCH_VERIFY_LEAF_SIZE") or 1000)
+
+    # Incremental synchronization configuration (the deletions are recorded only if it is enabled)
+    SEARCH_SYNC_ENABLED = os.environ.get("SEARCH_SYNC_ENABLED") is not None
+    SEARCH_SYNC_OVERLAP = float(os.environ.get("SEARCH_SYNC_OVERLAP") or 60)
+
     # OAuth configuration
     OAUTH_CREDENTIALS = {
                          "github": {
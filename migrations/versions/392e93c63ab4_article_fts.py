@@ -0,0 +1,44 @@
+"""Article full-text index
+
+Revision ID: 392e93c63ab4
+Revises: 5273862c889b
+Create Date: 2026-10-17 21:46:21.937540
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '392e93c63ab4'
+down_revision = '5273862c889b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 table of the SQLite search backend (see "app.search.sql.get_fts_ddl"), filled with the existing articles
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5(title, synthesis, content='article', "
+               "content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+    op.execute("CREATE TRIGGER IF NOT EXISTS article_fts_insert AFTER INSERT ON article BEGIN "
+               "INSERT INTO article_fts(rowid, title, synthesis) VALUES(new.id, new.title, new.synthesis); END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS article_fts_delete AFTER DELETE ON article BEGIN "
+               "INSERT INTO article_fts(article_fts, rowid, title, synthesis) "
+               "VALUES('delete', old.id, old.title, old.synthesis); END")
+    op.execute("CREATE TRIGGER IF NOT EXISTS article_fts_update AFTER UPDATE OF title, synthesis ON article BEGIN "
+               "INSERT INTO article_fts(article_fts, rowid, title, synthesis) "
+               "VALUES('delete', old.id, old.title, old.synthesis); "
+               "INSERT INTO article_fts(rowid, title, synthesis) VALUES(new.id, new.title, new.synthesis); END")
+    op.execute("INSERT INTO article_fts(article_fts) VALUES('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS article_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS article_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS article_fts_insert")
+    op.execute("DROP TABLE IF EXISTS article_fts")